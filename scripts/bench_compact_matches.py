@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+bench_compact_matches.py — memory of the joined match frame vs
+`elo_core.CompactMatches`.
+
+Builds every skill-set's matches of a synthetic corpus in both forms, each
+in a fresh process so peak RSS is its own, and runs `run_elo` (with
+history) and `evaluate_random_holdout` on them.  Reports the bytes per
+match held by the matches themselves, the peak RSS and the time, and
+checks that both forms give identical ratings, history and hold-out
+predictions.
+
+    uv run scripts/bench_compact_matches.py [n_scores]
+"""
+import hashlib
+import json
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from elo_core import SKILLSETS, build_matches_for_skillset, run_elo, evaluate_random_holdout
+from synthetic import make_scores
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+N_SCORES  = 300_000
+N_PLAYERS = 1_500
+N_CHARTS  = 15_000
+ZIPF      = 0.5
+SEED      = 0
+MODES     = ("frame", "compact")
+
+HOLDOUT_FRAC    = 0.1
+MIN_CAL_MATCHES = 50
+
+# ──────────────────────────────
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024     # KiB on Linux
+
+
+def matches_nbytes(matches) -> int:
+    if isinstance(matches, pd.DataFrame):
+        return int(matches.memory_usage(deep=True).sum())
+    return matches.nbytes
+
+
+def run_mode(mode: str, n_scores: int) -> dict:
+    """Build, simulate and evaluate every skill-set (run in its own process)."""
+    data = make_scores(n_scores, n_players=N_PLAYERS, n_charts=N_CHARTS, zipf=ZIPF, seed=SEED)
+    warm = build_matches_for_skillset(data.head(2_000), SKILLSETS[0], compact=mode == "compact")
+    run_elo(warm)                                                        # JIT warm-up
+    evaluate_random_holdout(warm, HOLDOUT_FRAC, np.random.default_rng(SEED), min_cal_matches=0)
+    base = peak_rss_mb()
+
+    h, n_matches, n_bytes, seconds = hashlib.sha1(), 0, 0, {"build": 0.0, "run_elo": 0.0,
+                                                             "holdout": 0.0}
+    rng = np.random.default_rng(SEED)
+    for sk in SKILLSETS:
+        t0 = time.perf_counter()
+        matches = build_matches_for_skillset(data, sk, compact=mode == "compact")
+        t1 = time.perf_counter()
+        final_df, hist_df = run_elo(matches, return_history=True)
+        t2 = time.perf_counter()
+        probs, outcomes = evaluate_random_holdout(matches, HOLDOUT_FRAC, rng,
+                                                  min_cal_matches=MIN_CAL_MATCHES)
+        t3 = time.perf_counter()
+        for key, dt in zip(seconds, (t1 - t0, t2 - t1, t3 - t2)):
+            seconds[key] += dt
+        n_matches += len(matches)
+        n_bytes += matches_nbytes(matches)
+        for frame in (final_df, hist_df):
+            h.update(pd.util.hash_pandas_object(frame).to_numpy().tobytes())
+        h.update(probs.tobytes() + outcomes.tobytes())
+        del matches
+    return {"mode": mode, "matches": n_matches, "bytes": n_bytes, "seconds": seconds,
+            "base_rss_mb": base, "peak_rss_mb": peak_rss_mb(), "digest": h.hexdigest()}
+
+
+def main() -> None:
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        print(json.dumps(run_mode(sys.argv[2], int(sys.argv[3]))))
+        return
+
+    n_scores = int(sys.argv[1]) if len(sys.argv) > 1 else N_SCORES
+    results = []
+    for mode in MODES:
+        out = subprocess.run([sys.executable, __file__, "--child", mode, str(n_scores)],
+                             check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    n = results[0]["matches"]
+    print(f"{n_scores:,} scores → {n:,} matches over {len(SKILLSETS)} skill-sets")
+    print(f"{'form':<9}{'MiB':>8}{'B/match':>9}{'peak RSS':>12}{'+run':>10}"
+          f"{'build s':>9}{'run_elo s':>11}{'holdout s':>11}")
+    for r in results:
+        s = r["seconds"]
+        print(f"{r['mode']:<9}{r['bytes'] / 2**20:>8.0f}{r['bytes'] / max(n, 1):>9.1f}"
+              f"{r['peak_rss_mb']:>8.0f} MiB{r['peak_rss_mb'] - r['base_rss_mb']:>6.0f} MiB"
+              f"{s['build']:>9.2f}{s['run_elo']:>11.2f}{s['holdout']:>11.2f}")
+    frame, compact = results
+    print(f"Matches {frame['bytes'] / max(compact['bytes'], 1):.1f}x smaller, "
+          f"peak RSS growth {frame['peak_rss_mb'] - frame['base_rss_mb']:.0f} → "
+          f"{compact['peak_rss_mb'] - compact['base_rss_mb']:.0f} MiB.")
+    if frame["digest"] != compact["digest"]:
+        raise SystemExit("The two forms gave different results!")
+    print("Both forms give identical ratings, history and hold-out predictions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+bench_history_io.py — write / read cost of the per-score history formats.
+
+Builds a synthetic history in `run_elo.build_tables` layout (score_id,
+player, elo_after_score, delta_elo, datetime, skillset) and times
+
+* ``csv``      — ``to_csv`` / ``read_csv`` (the old primary output)
+* ``parquet``  — `run_elo.save_history` / ``read_parquet``
+* ``parquet (projected)`` — ``read_parquet(columns=HISTORY_COLUMNS)`` as
+  `run_chart_elo_est` does
+
+reporting file size and whether each read returns the written dtypes.
+
+    uv run scripts/bench_history_io.py [n_rows]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from elo_core import SKILLSETS
+from run_elo import save_history
+from run_chart_elo_est import HISTORY_COLUMNS
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+N_ROWS    = 2_000_000
+N_PLAYERS = 5_000
+REPEATS   = 3
+
+# ──────────────────────────────
+def make_history(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2016-01-01", tz="UTC")
+    return pd.DataFrame({
+        "score_id":        rng.permutation(n_rows).astype(np.int64) + 1,
+        "player":          pd.Series(rng.integers(0, N_PLAYERS, n_rows)).map("player{:05d}".format),
+        "elo_after_score": rng.normal(1500.0, 300.0, n_rows),
+        "delta_elo":       rng.normal(0.0, 5.0, n_rows),
+        "datetime":        start + pd.to_timedelta(rng.integers(0, 3_000 * 86_400, n_rows), unit="s"),
+        "skillset":        np.asarray(SKILLSETS)[rng.integers(0, len(SKILLSETS), n_rows)],
+    })
+
+
+def best_of(fn, repeats: int = REPEATS) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else N_ROWS
+    history = make_history(n_rows)
+    print(f"History: {n_rows:,} rows, {N_PLAYERS:,} players")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, pq_path = Path(tmp) / "history.csv", Path(tmp) / "history.parquet"
+        write_csv, _ = best_of(lambda: history.to_csv(csv_path, index=False))
+        write_pq,  _ = best_of(lambda: save_history(history, pq_path))
+
+        cases = [
+            ("csv", write_csv, csv_path, lambda: pd.read_csv(csv_path)),
+            ("parquet", write_pq, pq_path, lambda: pd.read_parquet(pq_path)),
+            ("parquet (projected)", None, pq_path,
+             lambda: pd.read_parquet(pq_path, columns=HISTORY_COLUMNS)),
+        ]
+        print(f"{'format':<21}{'write s':>9}{'read s':>9}{'size':>11}  typed")
+        for name, write_s, path, read in cases:
+            read_s, back = best_of(read)
+            typed = (isinstance(back["datetime"].dtype, pd.DatetimeTZDtype)
+                     and isinstance(back["skillset"].dtype, pd.CategoricalDtype))
+            write = f"{write_s:>9.2f}" if write_s is not None else f"{'—':>9}"
+            print(f"{name:<21}{write}{read_s:>9.2f}"
+                  f"{path.stat().st_size / 2**20:>7.0f} MiB  {'yes' if typed else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+bench_ingest_memory.py — peak memory of the score-ingestion paths.
+
+Writes a synthetic per-player corpus (`synthetic.write_player_files`) and
+builds every skill-set's matches from it three ways, each in a fresh
+process so peak RSS is its own (reported after ingestion and overall):
+
+* ``load``      — `load_scores` with every column, then the match builder
+* ``projected`` — `load_scores(columns=MATCH_COLUMNS)` without the cache
+* ``stream``    — `spill_scores` + `stream_matches_for_skillset`, as in
+                  `iter_skillset_matches` (batches → chart-key buckets)
+
+and checks that all three produce the same matches.
+
+    uv run scripts/bench_ingest_memory.py [n_scores]
+"""
+import hashlib
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+
+from elo_core import (
+    SKILLSETS, MATCH_COLUMNS,
+    load_scores, build_matches_for_skillset, spill_scores, stream_matches_for_skillset,
+)
+from synthetic import make_scores, write_player_files
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+N_SCORES  = 1_000_000
+N_PLAYERS = 2_000
+N_CHARTS  = 200_000
+ZIPF      = 0.3        # flat popularity: few matches per score, ingestion dominates
+MODES     = ("load", "projected", "stream")
+
+# ──────────────────────────────
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024     # KiB on Linux
+
+
+def digest(matches: pd.DataFrame) -> str:
+    """Dtype-independent hash of a match frame's values."""
+    h = hashlib.sha1()
+    for col in matches:
+        values = matches[col]
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            values = values.dt.tz_convert(None)
+        values = values.to_numpy("datetime64[ns]" if values.dtype.kind == "M" else None)
+        if values.dtype.kind not in "biufM":
+            values = values.astype(object)
+        h.update(col.encode() + pd.util.hash_array(values).tobytes())
+    return h.hexdigest()
+
+
+def run_mode(mode: str, scores_dir: Path) -> dict:
+    """Build all matches with one ingestion path (run in its own process)."""
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory() as spill_dir:
+        if mode == "stream":
+            spill_scores(scores_dir, Path(spill_dir))
+            build = lambda sk: stream_matches_for_skillset(Path(spill_dir), sk)
+        else:
+            data = (load_scores(scores_dir) if mode == "load"
+                    else load_scores(scores_dir, MATCH_COLUMNS, cache=False))
+            build = lambda sk: build_matches_for_skillset(data, sk)
+        ingest = peak_rss_mb()
+
+        digests, n_matches = {}, 0
+        for sk in SKILLSETS:
+            matches = build(sk)
+            digests[sk], n_matches = digest(matches), n_matches + len(matches)
+            del matches
+    return {"mode": mode, "seconds": time.perf_counter() - t0, "matches": n_matches,
+            "base_rss_mb": base, "ingest_rss_mb": ingest, "peak_rss_mb": peak_rss_mb(),
+            "digests": digests}
+
+
+def main() -> None:
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        print(json.dumps(run_mode(sys.argv[2], Path(sys.argv[3]))))
+        return
+
+    n_scores = int(sys.argv[1]) if len(sys.argv) > 1 else N_SCORES
+    with tempfile.TemporaryDirectory() as tmp:
+        scores_dir = Path(tmp)
+        t0 = time.perf_counter()
+        n_files = write_player_files(
+            make_scores(n_scores, n_players=N_PLAYERS, n_charts=N_CHARTS, zipf=ZIPF),
+            scores_dir)
+        size_mb = sum(f.stat().st_size for f in scores_dir.iterdir()) / 2**20
+        print(f"Wrote {n_scores:,} scores in {n_files:,} files ({size_mb:.0f} MiB) "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+        results = []
+        for mode in MODES:
+            out = subprocess.run([sys.executable, __file__, "--child", mode, str(scores_dir)],
+                                 check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    # growth of peak RSS over the peak right after imports (0 = never exceeded it)
+    print(f"{'mode':<11}{'seconds':>9}{'peak RSS':>12}{'+ingest':>11}{'+total':>11}")
+    for r in results:
+        print(f"{r['mode']:<11}{r['seconds']:>9.1f}{r['peak_rss_mb']:>8.0f} MiB"
+              f"{r['ingest_rss_mb'] - r['base_rss_mb']:>7.0f} MiB"
+              f"{r['peak_rss_mb'] - r['base_rss_mb']:>7.0f} MiB")
+    if any(r["digests"] != results[0]["digests"] for r in results):
+        raise SystemExit("Ingestion paths produced different matches!")
+    print(f"All paths produce identical matches ({results[0]['matches']:,}).")
+
+
+if __name__ == "__main__":
+    main()
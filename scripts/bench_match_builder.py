@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+bench_match_builder.py — compare the engines of
+`elo_core.build_matches_for_skillset` on a synthetic corpus.
+
+For every skill-set the matches are built with each engine in
+`MATCH_ENGINES`, checked for identical output and timed.
+
+    uv run scripts/bench_match_builder.py [n_scores]
+"""
+import sys
+import time
+import pandas as pd
+
+from elo_core import SKILLSETS, MATCH_ENGINES, build_matches_for_skillset
+from synthetic import make_scores
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+N_SCORES  = 5_000_000
+N_PLAYERS = 5_000
+N_CHARTS  = 1_000_000
+ZIPF      = 0.4
+
+# ──────────────────────────────
+def main() -> None:
+    n_scores = int(sys.argv[1]) if len(sys.argv) > 1 else N_SCORES
+    t0 = time.perf_counter()
+    data = make_scores(n_scores, n_players=N_PLAYERS, n_charts=N_CHARTS, zipf=ZIPF)
+    print(f"Generated {n_scores:,} scores in {time.perf_counter() - t0:.1f}s")
+
+    build_matches_for_skillset(data.head(1_000), SKILLSETS[0])    # JIT warm-up
+
+    rows, totals = [], dict.fromkeys(MATCH_ENGINES, 0.0)
+    for sk in SKILLSETS:
+        out = {}
+        for eng in MATCH_ENGINES:
+            t0 = time.perf_counter()
+            out[eng] = build_matches_for_skillset(data, sk, engine=eng)
+            totals[eng] += time.perf_counter() - t0
+            rows.append({"skillset": sk, "engine": eng, "matches": len(out[eng]),
+                         "seconds": time.perf_counter() - t0})
+        ref = out[MATCH_ENGINES[-1]]
+        for eng, matches in out.items():
+            # the groupby engine keeps score ids as object dtype
+            pd.testing.assert_frame_equal(matches, ref, check_dtype=False, check_exact=True)
+
+    table = pd.DataFrame(rows).pivot(index="skillset", columns="engine", values="seconds")
+    print(table.loc[SKILLSETS].round(2).to_string())
+    base = totals["groupby"]
+    for eng, sec in totals.items():
+        print(f"{eng:<8} total {sec:8.2f}s  ({base / sec:.1f}x)")
+    print("All engines produce identical matches.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+bench_pipeline.py — time the pipeline stages on synthetic corpora of
+several sizes and compare the results against a stored baseline.
+
+For every size in ``--sizes`` a fresh process writes a synthetic scores
+directory (`synthetic.write_player_files`, scraper layout) and runs, under
+`instrument`:
+
+* ``load_scores``      — `load_scores(columns=MATCH_COLUMNS)` without the cache
+* ``build_matches``    — `build_matches_for_skillset(compact=True)`, every skill-set
+* ``run_elo``          — `run_elo` on those matches
+* ``evaluate_holdout`` — `evaluate_random_holdout` on the same matches
+
+Wall time, rows, throughput and peak RSS per stage and size are written to
+``--out``.  With ``--baseline`` every stage is compared with the baseline
+run and the script exits with status 1 if one got slower (or bigger) than
+``--tolerance`` allows; ``--save-baseline`` stores the run as the baseline.
+``--repeat N`` keeps each stage's fastest of N runs, for noisy machines.
+
+    uv run scripts/bench_pipeline.py --save-baseline
+    uv run scripts/bench_pipeline.py --baseline output/bench_baseline.json
+    uv run scripts/bench_pipeline.py --sizes 100000 1000000
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+import elo_core
+import instrument
+from elo_core import (
+    SKILLSETS, MATCH_COLUMNS,
+    load_scores, build_matches_for_skillset, run_elo, evaluate_random_holdout,
+)
+from synthetic import make_scores, write_player_files
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+SIZES             = (100_000, 300_000, 1_000_000)
+SCORES_PER_PLAYER = 200
+SCORES_PER_CHART  = 20
+ZIPF              = 0.5
+SEED              = 0
+STAGES            = ("load_scores", "build_matches", "run_elo", "evaluate_holdout")
+
+HOLDOUT_FRAC      = 0.1
+MIN_CAL_MATCHES   = 50
+
+OUT_RESULTS       = Path("output/bench_pipeline.json")
+BASELINE          = Path("output/bench_baseline.json")
+TOLERANCE         = 0.25     # allowed slow-down / growth before it counts as a regression
+MIN_SECONDS       = 0.2      # stage differences below this are timer noise
+
+# ──────────────────────────────
+def corpus_shape(n_scores: int) -> dict:
+    """Players and charts grow with the corpus, as they do in the real data."""
+    return {"n_players": max(100, n_scores // SCORES_PER_PLAYER),
+            "n_charts":  max(1_000, n_scores // SCORES_PER_CHART),
+            "zipf": ZIPF, "seed": SEED}
+
+
+def run_size(n_scores: int) -> list[dict]:
+    """Write a corpus of *n_scores* and time every stage on it (own process)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        scores_dir = Path(tmp)
+        write_player_files(make_scores(n_scores, **corpus_shape(n_scores)), scores_dir)
+
+        warm = build_matches_for_skillset(                            # JIT warm-up
+            load_scores(scores_dir, MATCH_COLUMNS, cache=False).head(2_000), SKILLSETS[0],
+            compact=True)
+        run_elo(warm)
+        evaluate_random_holdout(warm, HOLDOUT_FRAC, np.random.default_rng(SEED),
+                                min_cal_matches=0)
+
+        instrument.enable()
+        data = load_scores(scores_dir, MATCH_COLUMNS, cache=False)
+        rng = np.random.default_rng(SEED)
+        for sk in SKILLSETS:
+            matches = build_matches_for_skillset(data, sk, compact=True)
+            run_elo(matches)
+            evaluate_random_holdout(matches, HOLDOUT_FRAC, rng,
+                                    min_cal_matches=MIN_CAL_MATCHES)
+            del matches
+        instrument.disable()
+
+    totals = instrument.summary(instrument.records())
+    rows = []
+    for name in STAGES:
+        tot = totals[name]
+        # throughput over what the stage consumes: scores for the loader, matches after
+        n = tot["rows_out"] if name in ("load_scores", "build_matches") else tot["rows_in"]
+        rows.append({"size": n_scores, "stage": name, "seconds": round(tot["seconds"], 4),
+                     "rows": n, "rows_per_s": round(n / max(tot["seconds"], 1e-9)),
+                     "peak_rss_mb": tot["peak_rss_mb"]})
+    return rows
+
+
+def compare(base: dict, new: dict, tolerance: float) -> list[str]:
+    """Print stage-by-stage changes; return the regressions."""
+    old = {(r["size"], r["stage"]): r for r in base["results"]}
+    regressions = []
+    print(f"{'size':>10} {'stage':<17}{'base s':>9}{'new s':>9}{'change':>9}"
+          f"{'base MiB':>10}{'new MiB':>9}")
+    for r in new["results"]:
+        b = old.get((r["size"], r["stage"]))
+        if b is None:
+            continue
+        change = r["seconds"] / b["seconds"] - 1 if b["seconds"] > 0 else 0.0
+        slower = change > tolerance and r["seconds"] - b["seconds"] > MIN_SECONDS
+        bigger = r["peak_rss_mb"] > b["peak_rss_mb"] * (1 + tolerance)
+        flag = " ".join(f for f, hit in (("SLOWER", slower), ("BIGGER", bigger)) if hit)
+        print(f"{r['size']:>10,} {r['stage']:<17}{b['seconds']:>9.2f}{r['seconds']:>9.2f}"
+              f"{change * 100:>+8.0f}%{b['peak_rss_mb']:>10.0f}{r['peak_rss_mb']:>9.0f}  {flag}")
+        if flag:
+            regressions.append(f"{r['stage']} @ {r['size']:,}: {flag}")
+    return regressions
+
+
+def main() -> None:
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        print(json.dumps(run_size(int(sys.argv[2]))))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--out", type=Path, default=OUT_RESULTS)
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help=f"compare with this results file (e.g. {BASELINE})")
+    parser.add_argument("--save-baseline", nargs="?", type=Path, const=BASELINE, default=None,
+                        metavar="PATH", help=f"also store the results as the baseline ({BASELINE})")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        t0, runs = time.perf_counter(), []
+        for _ in range(args.repeat):
+            out = subprocess.run([sys.executable, __file__, "--child", str(n)],
+                                 check=True, capture_output=True, text=True).stdout
+            runs.append(json.loads(out.strip().splitlines()[-1]))
+        rows = [min(same, key=lambda r: r["seconds"]) for same in zip(*runs)]
+        results += rows
+        print(f"{n:>10,} scores  " + "  ".join(f"{r['stage']} {r['seconds']:.2f}s"
+                                               for r in rows)
+              + f"  ({time.perf_counter() - t0:.0f}s with corpus)")
+
+    payload = {
+        "run": {"started": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                "numba": elo_core.njit is not None, "cpus": os.cpu_count(),
+                "repeat": args.repeat,
+                "corpus": {n: corpus_shape(n) for n in args.sizes}},
+        "results": results,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(payload, indent=2))
+    print(f"Results → {args.out}")
+    if args.save_baseline:
+        shutil.copyfile(args.out, args.save_baseline)
+        print(f"Baseline → {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare(json.loads(args.baseline.read_text()), payload, args.tolerance)
+        if regressions:
+            raise SystemExit("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
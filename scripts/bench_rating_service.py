@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+bench_rating_service.py — latency of the rating service under load.
+
+Rates the older 95 % of a synthetic corpus with `run_elo.run_all_skillsets`,
+saves the checkpoint, loads it into `rating_service.RatingService` and
+
+1. calls ``handle`` in-process for a mix of player / top-N / win-probability
+   queries (the index itself, no transport),
+2. sends the same mix over keep-alive HTTP from ``--clients`` threads,
+3. posts the remaining 5 % of the scores in chronological chunks and checks
+   that the service ends with the ratings of a full run over all scores.
+
+    uv run scripts/bench_rating_service.py [n_scores]
+"""
+from __future__ import annotations
+from http.client import HTTPConnection
+from pathlib import Path
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+from elo_core import SKILLSETS, MATCH_COLUMNS
+from rating_service import RatingService, make_server
+from run_elo import load_checkpoint, run_all_skillsets, save_checkpoint
+from synthetic import make_scores
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+N_SCORES   = 300_000
+N_PLAYERS  = 3_000
+N_CHARTS   = 30_000
+ZIPF       = 0.5
+NEW_FRAC   = 0.05          # newest scores posted to the service
+N_CHUNKS   = 20
+N_QUERIES  = 20_000
+CLIENTS    = 4
+
+# ──────────────────────────────
+def query_mix(players: np.ndarray, n: int, seed: int = 0) -> list[dict]:
+    """Lookups 60 %, win probabilities 30 %, top-N 10 %."""
+    rng = np.random.default_rng(seed)
+    ops = rng.choice(["player", "winprob", "top"], size=n, p=[0.6, 0.3, 0.1])
+    a, b = rng.choice(players, size=n), rng.choice(players, size=n)
+    boards = ["overall", *SKILLSETS]
+    out = []
+    for i, op in enumerate(ops):
+        if op == "player":
+            out.append({"op": "player", "name": a[i]})
+        elif op == "winprob":
+            out.append({"op": "winprob", "a": a[i], "b": b[i], "skillset": SKILLSETS[i % 5]})
+        else:
+            out.append({"op": "top", "skillset": boards[i % len(boards)], "n": 10})
+    return out
+
+
+def as_path(request: dict) -> str:
+    if request["op"] == "player":
+        return f"/players/{request['name']}"
+    query = "&".join(f"{k}={v}" for k, v in request.items() if k != "op")
+    return f"/{request['op']}?{query}"
+
+
+def percentiles(seconds: list[float]) -> str:
+    us = np.asarray(seconds) * 1e6
+    p50, p99 = np.percentile(us, [50, 99])
+    return f"p50 {p50:7.1f} µs  p99 {p99:7.1f} µs  max {us.max():8.1f} µs"
+
+
+def bench_inprocess(service: RatingService, requests: list[dict]) -> None:
+    lat = []
+    for request in requests:
+        t0 = time.perf_counter()
+        status, _ = service.handle(request)
+        lat.append(time.perf_counter() - t0)
+        assert status == 200, request
+    print(f"in-process  {len(lat) / sum(lat):>9,.0f} req/s  {percentiles(lat)}")
+
+
+def bench_http(service: RatingService, requests: list[dict], clients: int) -> None:
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    lat: list[float] = []
+
+    def client(part: list[dict]) -> None:
+        conn, mine = HTTPConnection("127.0.0.1", port), []
+        for request in part:
+            t0 = time.perf_counter()
+            conn.request("GET", as_path(request))
+            response = conn.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - t0)
+            assert response.status == 200, request
+        conn.close()
+        lat.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(requests[i::clients],))
+               for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    server.shutdown()
+    print(f"HTTP ×{clients:<3}  {len(lat) / wall:>9,.0f} req/s  {percentiles(lat)}")
+
+
+def bench_updates(service: RatingService, new: pd.DataFrame, n_chunks: int) -> None:
+    # chunk on whole timestamps: every chunk must be newer than the last one
+    stamps = new["datetime"].drop_duplicates().to_numpy()
+    bounds = [s[0] for s in np.array_split(stamps, n_chunks) if len(s)][1:]
+    chunk_of = np.searchsorted(np.asarray(bounds), new["datetime"].to_numpy(), side="right")
+    lat, accepted = [], 0
+    for _, chunk in new.groupby(chunk_of, sort=True):
+        records = json.loads(chunk.assign(datetime=chunk["datetime"].map(pd.Timestamp.isoformat))
+                             .to_json(orient="records"))
+        t0 = time.perf_counter()
+        status, body = service.handle({"op": "scores", "scores": records})
+        lat.append(time.perf_counter() - t0)
+        assert status == 200, body
+        accepted += body["accepted"]
+    print(f"updates     {accepted:,} scores in {len(lat)} posts: "
+          f"{np.mean(lat) * 1e3:.0f} ms per post, {accepted / sum(lat):,.0f} scores/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("n_scores", type=int, nargs="?", default=N_SCORES)
+    parser.add_argument("--clients", type=int, default=CLIENTS)
+    parser.add_argument("--queries", type=int, default=N_QUERIES)
+    args = parser.parse_args()
+
+    scores = make_scores(args.n_scores, n_players=N_PLAYERS, n_charts=N_CHARTS, zipf=ZIPF)
+    scores["datetime"] = scores["datetime"].dt.tz_localize("UTC")      # as load_scores
+    scores = scores.sort_values("datetime", kind="stable")[MATCH_COLUMNS]
+    cut = scores["datetime"].iloc[int(len(scores) * (1 - NEW_FRAC))]
+    old, new = scores[scores["datetime"] < cut], scores[scores["datetime"] >= cut]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        save_checkpoint(Path(tmp), old, run_all_skillsets(old, workers=1))
+        print(f"Rated {len(old):,} scores in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+        t0 = time.perf_counter()
+        service = RatingService(load_checkpoint(Path(tmp)))
+    print(f"Loaded {len(service.boards['overall']):,} players in "
+          f"{time.perf_counter() - t0:.2f}s")
+
+    requests = query_mix(service.boards["overall"].players, args.queries)
+    bench_inprocess(service, requests)
+    bench_http(service, requests, args.clients)
+    bench_updates(service, new, N_CHUNKS)
+
+    full = run_all_skillsets(scores, workers=1)
+    for sk in SKILLSETS:
+        expect = full[sk][0]["elo"]
+        board = service.boards[sk]
+        got = pd.Series(board.rating, index=board.players).reindex(expect.index)
+        if not np.allclose(got.to_numpy(), expect.to_numpy(), rtol=0, atol=1e-9):
+            raise SystemExit(f"Service ratings differ from a full run for {sk}!")
+    print("Service ratings after the updates match a full run.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+bench_run_elo.py — compare the Elo engines of `elo_core.run_elo`.
+
+Builds matches for one skill-set of a synthetic corpus, runs every engine
+in `ELO_ENGINES` (plus the array engine without numba when numba is
+installed), checks that the outputs are identical and prints timings,
+plus the time of the Glicko system (`run_elo(system="glicko")`) on the
+same array loop for comparison.
+
+    uv run scripts/bench_run_elo.py [n_scores]
+"""
+import sys
+import time
+import pandas as pd
+
+import elo_core
+from elo_core import SKILLSETS, ELO_ENGINES, build_matches_for_skillset, run_elo
+from synthetic import make_scores
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+N_SCORES  = 200_000
+N_PLAYERS = 2_000
+N_CHARTS  = 20_000
+REPEATS   = 3
+
+# ──────────────────────────────
+def timed(fn, repeats: int = REPEATS):
+    best, out = float("inf"), None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    n_scores = int(sys.argv[1]) if len(sys.argv) > 1 else N_SCORES
+    data = make_scores(n_scores, n_players=N_PLAYERS, n_charts=N_CHARTS)
+    matches = build_matches_for_skillset(data, SKILLSETS[0])
+    print(f"{n_scores:,} scores → {len(matches):,} matches "
+          f"({matches['id_A'].nunique():,} batches)")
+
+    runs = {eng: (lambda eng=eng: run_elo(matches, return_history=True, engine=eng))
+            for eng in ELO_ENGINES}
+    if elo_core._elo_kernel_jit is not None:
+        run_elo(matches.head(100), engine="array")          # JIT warm-up
+
+        def array_nojit():
+            jit, elo_core._elo_kernel_jit = elo_core._elo_kernel_jit, None
+            try:
+                return run_elo(matches, return_history=True, engine="array")
+            finally:
+                elo_core._elo_kernel_jit = jit
+        runs["array (no numba)"] = array_nojit
+
+    results = {name: timed(fn, 1 if name == "loop" else REPEATS)
+               for name, fn in runs.items()}
+
+    ref_final, ref_hist = results["loop"][1]
+    for name, (_, (final_df, hist_df)) in results.items():
+        pd.testing.assert_frame_equal(final_df, ref_final, check_exact=True)
+        pd.testing.assert_frame_equal(hist_df, ref_hist, check_exact=True)
+
+    run_elo(matches.head(100), system="glicko")                   # JIT warm-up
+    glicko = timed(lambda: run_elo(matches, return_history=True, system="glicko"))
+
+    base = results["loop"][0]
+    print(f"{'engine':<18}{'seconds':>10}{'speed-up':>10}")
+    for name, (sec, _) in [*results.items(), ("glicko (array)", glicko)]:
+        print(f"{name:<18}{sec:>10.3f}{base / sec:>9.1f}x")
+    print("All Elo engines produce identical final/peak/history output.")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,9 +15,23 @@ from elo_core import (
 from __future__ import annotations
 from pathlib import Path
 from collections import defaultdict
+import hashlib
+import json
+import math
+import tempfile
 import numpy as np
 import pandas as pd
-from typing import List, Tuple, Union
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+
+from instrument import instrumented
+
+try:                                    # optional compiled kernel
+    from numba import njit
+except ImportError:                     # pragma: no cover - numba is optional
+    njit = None
 
 # ──────────────────────────────
 # CONSTANTS (edit here → everywhere)
@@ -32,48 +46,244 @@ RATE_DIFF_SCALE = 100.0
 
 WIFE_RANGE: Tuple[float,float] = (89.0, 99.0)
 
+ELO_ENGINES: Tuple[str, ...]   = ("array", "loop")      # run_elo(engine=…)
+MATCH_ENGINES: Tuple[str, ...] = ("sorted", "groupby")  # build_matches_for_skillset(engine=…)
+RATING_SYSTEMS: Tuple[str, ...] = ("elo", "glicko")   # run_elo(system=…)
+
+# glicko: rating deviation (RD) of a new player, the floor that keeps
+# established ratings moving, and the RD growth per idle day (c in RD² + c²·t)
+GLICKO_RD_INIT: float    = 350.0
+GLICKO_RD_MIN: float     = 30.0
+GLICKO_RD_PER_DAY: float = 1.0
+
+# opponents of a new personal best (build_matches_for_skillset(opponents=…)):
+# every other best on the chart, or at most MAX_OPPONENTS of them
+OPPONENT_STRATEGIES: Tuple[str, ...] = ("all", "nearest", "stratified")
+MAX_OPPONENTS: int = 16
+
+# score columns build_matches_for_skillset reads
+MATCH_COLUMNS: List[str] = ["id", "player", "chart_key", "skillset", "wife", "rate", "datetime"]
+
+# one row per (chart, player) personal best, see build_matches_for_skillset
+PB_STATE_COLUMNS: List[str] = ["chart_key", "player", "id", "rate", "wife", "datetime"]
+
 SKILLSETS: List[str] = [
     "stream", "jumpstream", "handstream",
     "chordjacks", "technical",
 ]
 
+# columns load_scores(columns=…) can project, and the file it caches them in
+SCORE_COLUMNS: List[str] = ["id", "player", "chart_key", "chart_id", "wife", "rate",
+                            "datetime", *SKILLSETS, "skillset"]
+SCORES_CACHE = "scores_cache.arrow"
+
 __all__ = [
     "RATING_INIT", "K_FACTOR", "TOLERANCE", "TAU_GAP_DAYS",
-    "WIFE_RANGE", "SKILLSETS",
+    "WIFE_RANGE", "SKILLSETS", "MATCH_ENGINES", "MATCH_COLUMNS",
+    "OPPONENT_STRATEGIES", "MAX_OPPONENTS",
+    "SCORE_COLUMNS", "SCORES_CACHE",
+    "PB_STATE_COLUMNS",
     "load_scores", "build_matches_for_skillset",
-    "outcome_from_scores", "run_elo",
+    "matches_fingerprint", "stored_matches_for_skillset",
+    "iter_score_batches", "spill_scores", "stream_matches_for_skillset",
+    "iter_skillset_matches", "CompactMatches", "MATCH_FRAME_COLUMNS", "ChartBests",
+    "outcome_from_scores", "outcome_dynamic", "expected_score", "glicko_expected_score",
+    "run_elo", "ELO_ENGINES",
+    "RATING_SYSTEMS", "GLICKO_RD_INIT", "GLICKO_RD_MIN", "GLICKO_RD_PER_DAY",
+    "RatingSnapshots",
+    "add_match_features", "match_gap_days", "match_outcome", "k_eff_from_gap",
+    "holdout_test_mask", "run_elo_grid", "run_glicko_holdout", "evaluate_random_holdout",
 ]
 
+def _rows(out) -> int:
+    """Row count of a result, or of its first element when it is a tuple."""
+    return len(out[0] if isinstance(out, tuple) else out)
+
+
+def _skillset_rows(df, sk, *args, **kwargs) -> int:
+    return int((df["skillset"] == sk).sum())
+
+
+def _skillset_tag(df, sk, *args, **kwargs) -> dict:
+    return {"skillset": sk}
+
 # ──────────────────────────────
 # Data‑loading utilities
 # ──────────────────────────────
 
-def load_scores(scores_dir: Path) -> pd.DataFrame:
+@instrumented("load_scores", rows_out=len)
+def load_scores(scores_dir: Path, columns: List[str] | None = None,
+                *, cache: bool = True) -> pd.DataFrame:
     """Read all `*score_data*.parquet` in *scores_dir* and pre‑clean them.
 
     Adds columns: chart_key, chart_id, dominant *skillset*, datetime⇢Timestamp.
     Filters scores outside *WIFE_RANGE*.
+
+    With *columns* ⊆ ``SCORE_COLUMNS`` only those columns are read
+    (pyarrow projection, ``chart.key`` / ``chart.id`` by struct field, the
+    WIFE filter pushed into the reader) and player / chart_key / skillset
+    are categorical.  The result is consolidated into ``SCORES_CACHE`` in
+    *scores_dir*, which later calls memory-map instead of re-reading the
+    per-player files while their names, sizes and mtimes are unchanged.
+    *columns* None reads every column, as the chart script needs.
     """
-    files = list(scores_dir.glob("*score_data*.parquet"))
+    files = sorted(scores_dir.glob("*score_data*.parquet"))
     if not files:
         raise FileNotFoundError(f"No '*score_data*.parquet' found in {scores_dir}")
 
+    if columns is not None and set(columns) <= set(SCORE_COLUMNS):
+        return _load_score_columns(scores_dir, files, cache)[list(columns)]
+
     df = pd.concat((pd.read_parquet(f) for f in files), ignore_index=True)
-    df["chart_key"] = df["chart"].apply(lambda x: x["key"])
-    df["chart_id"]  = df["chart"].apply(lambda x: x["id"])
+    df["chart_key"] = df["chart"].str.get("key")
+    df["chart_id"]  = df["chart"].str.get("id")
     df = df[(df["wife"] > WIFE_RANGE[0]) & (df["wife"] < WIFE_RANGE[1])].copy()
     df["skillset"] = df[SKILLSETS].idxmax(axis=1)
     df["datetime"] = pd.to_datetime(df["datetime"])
+    return df if columns is None else df[list(columns)]
+
+
+def _scores_fingerprint(files: List[Path]) -> str:
+    """Cache key: loader rules plus name / size / mtime of every input file."""
+    stats = [(f.name, f.stat().st_size, f.stat().st_mtime_ns) for f in files]
+    return json.dumps({"version": 1, "wife_range": list(WIFE_RANGE),
+                       "columns": SCORE_COLUMNS, "files": stats})
+
+
+def _load_score_columns(scores_dir: Path, files: List[Path], cache: bool) -> pd.DataFrame:
+    """``SCORE_COLUMNS`` of all *files*, via the consolidated cache when fresh."""
+    path = scores_dir / SCORES_CACHE
+    key = _scores_fingerprint(files)
+    if cache and path.exists():
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        if (table.schema.metadata or {}).get(b"elo_core.fingerprint") == key.encode():
+            return table.to_pandas()
+
+    raw = ["id", "player", "wife", "rate", "datetime", *SKILLSETS]
+    wife = pc.field("wife")
+    pushdown = (wife > WIFE_RANGE[0]) & (wife < WIFE_RANGE[1])
+    tables = []
+    for f in files:
+        t = pq.read_table(f, columns=raw + ["chart"], filters=pushdown)
+        chart = t.column("chart")
+        t = t.select(raw).append_column(
+            "chart_key", pc.struct_field(chart, "key")).append_column(
+            "chart_id", pc.struct_field(chart, "id"))
+        tables.append(t)
+    table = pa.concat_tables(tables, promote_options="permissive")
+
+    df = table.to_pandas()
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    df["skillset"] = pd.Categorical(df[SKILLSETS].idxmax(axis=1), categories=SKILLSETS)
+    df["player"] = df["player"].astype("category")
+    df["chart_key"] = df["chart_key"].astype("category")
+    df = df[SCORE_COLUMNS]
+
+    if cache:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), b"elo_core.fingerprint": key.encode()})
+        tmp = path.with_suffix(".tmp")
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        tmp.replace(path)
     return df
 
 # ──────────────────────────────
 # Match‑construction logic (top‑rate pairs)
 # ──────────────────────────────
 
-def build_matches_for_skillset(df: pd.DataFrame, sk: str) -> pd.DataFrame:
-    """Return chronological DataFrame of pairwise matches for *sk*."""
+@instrumented("build_matches", rows_in=_skillset_rows, rows_out=_rows, tags=_skillset_tag)
+def build_matches_for_skillset(
+    df: pd.DataFrame,
+    sk: str,
+    *,
+    engine:   str = "sorted",
+    pb_state: pd.DataFrame | None = None,
+    return_state: bool = False,
+    opponents: str = "all",
+    max_opponents: int = MAX_OPPONENTS,
+    compact:  bool = False,
+) -> Union[pd.DataFrame, "CompactMatches", Tuple]:
+    """Return chronological DataFrame of pairwise matches for *sk*.
+
+    *engine* selects how the (id_A, id_B) pairs are found (see
+    ``MATCH_ENGINES``): "sorted" sorts the skill-set once by
+    (chart_key, datetime) and walks chart segments over integer arrays,
+    "groupby" is the reference per-chart DataFrame loop.  Both emit the
+    same pairs in the same order.
+
+    *opponents* ("sorted" only, see ``OPPONENT_STRATEGIES``) bounds the
+    pairs per new personal best.  "all" pairs it with every other best on
+    the chart, so a chart played by n players yields O(n²) matches.
+    "nearest" keeps the *max_opponents* bests closest by (rate, wife), and
+    "stratified" keeps *max_opponents* bests spread evenly over the
+    chart's (rate, wife) order.  Both find them in a per-chart sorted
+    array of bests.  With at most *max_opponents* other bests on a chart,
+    every strategy emits the "all" pairs.
+
+    *pb_state* / *return_state* ("sorted" only) carry the per-chart
+    personal bests between calls: a frame with ``PB_STATE_COLUMNS``, one
+    row per (chart, player) in the order players first appeared on the
+    chart.  Passing the state returned for older scores and only the newer
+    scores in *df* yields exactly the matches those newer scores add.
+
+    Rows carry the default ``gap_days`` / ``s_A`` columns of
+    :func:`add_match_features`.  With *compact* the same rows come back as
+    :class:`CompactMatches`, built from the pairs without the joined frame.
+    """
     sdf = df[df["skillset"] == sk].copy()
+    if engine != "sorted" and (pb_state is not None or return_state or opponents != "all"):
+        raise ValueError("pb_state / return_state / opponents need engine='sorted'")
+    if opponents not in OPPONENT_STRATEGIES:
+        raise ValueError(f"Unknown opponents {opponents!r}; expected one of {OPPONENT_STRATEGIES}")
+
+    if engine == "sorted":
+        pairs, state = _toprate_pairs_sorted(sdf, pb_state, opponents, max_opponents)
+    elif engine == "groupby":
+        pairs = _toprate_pairs_groupby(sdf)
+    else:
+        raise ValueError(f"Unknown match engine {engine!r}; expected one of {MATCH_ENGINES}")
 
+    if pairs.empty:
+        matches = CompactMatches.from_frame(pd.DataFrame()) if compact else pd.DataFrame()
+    else:
+        known = sdf if pb_state is None else pd.concat([pb_state, sdf], ignore_index=True)
+        matches = (CompactMatches.from_pairs(pairs, known) if compact
+                   else _finish_matches(_join_pairs(pairs, known)))
+
+    if return_state:
+        return matches, state
+    return matches
+
+
+def _join_pairs(pairs: pd.DataFrame, known: pd.DataFrame) -> pd.DataFrame:
+    """(id_A, id_B) pairs → match rows, still in emission order."""
+    lookup = known.set_index("id")[["player", "wife", "rate", "datetime"]]
+    return (pairs
+            .join(lookup, on="id_A")
+            .join(lookup, on="id_B", rsuffix="_B")
+            .rename(columns={
+                "player": "player_A", "wife": "wife_A",
+                "rate":   "rate_A",   "datetime": "datetime_A"}))
+
+
+def _finish_matches(matches: pd.DataFrame) -> pd.DataFrame:
+    """Chronological order by the later score, plus the default features."""
+    # Stable: matches with the same `latest` (all those one score adds) keep
+    # emission order, so a resumed build appends exactly what a full build
+    # has.  Builds before the checkpoint mode used the default quicksort,
+    # whose tie order depends on the whole array (and the CPU's sort
+    # kernel); ratings differ from those builds by float rounding only.
+    matches["latest"] = matches[["datetime_A", "datetime_B"]].max(axis=1)
+    matches = (matches.sort_values("latest", kind="stable")
+               .drop(columns="latest").reset_index(drop=True))
+    return add_match_features(matches)
+
+
+def _toprate_pairs_groupby(sdf: pd.DataFrame) -> pd.DataFrame:
+    """Reference pair construction: one small DataFrame per chart."""
     # group per chart into small arrays for fast Python iteration
     grp = sdf.groupby("chart_key")[["id", "datetime", "player", "rate"]]
     chart_arrays = grp.apply(np.array)
@@ -98,15 +308,668 @@ def build_matches_for_skillset(df: pd.DataFrame, sk: str) -> pd.DataFrame:
         return pd.DataFrame()
 
     match_ids = np.concatenate([toprate_pairs(a) for a in chart_arrays.values])
-    lookup = sdf.set_index("id")[["player", "wife", "rate", "datetime"]]
-    matches = (pd.DataFrame(match_ids, columns=["id_A", "id_B"])
-               .join(lookup, on="id_A")
-               .join(lookup, on="id_B", rsuffix="_B")
-               .rename(columns={
-                   "player": "player_A", "wife": "wife_A",
-                   "rate":   "rate_A",   "datetime": "datetime_A"}))
-    matches["latest"] = matches[["datetime_A", "datetime_B"]].max(axis=1)
-    return matches.sort_values("latest").drop(columns="latest").reset_index(drop=True)
+    return pd.DataFrame(match_ids, columns=["id_A", "id_B"])
+
+
+def _chart_segments(sdf: pd.DataFrame, n_seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (row order, chart offsets) sorting *sdf* by (chart_key, datetime).
+
+    Charts come in sorted key order and rows keep their original order on
+    equal datetimes, except on charts with such ties, which are re-sorted
+    with the same (unstable) quicksort the groupby engine applies per chart.
+    The first *n_seed* rows are personal-best seeds: they lead their chart
+    in their given order, ahead of every regular row.
+    """
+    chart, _ = pd.factorize(sdf["chart_key"].to_numpy(object), sort=True)
+    dt = pd.DatetimeIndex(sdf["datetime"]).asi8
+    is_new = np.arange(len(sdf)) >= n_seed
+    key = dt.copy()
+    key[:n_seed] = np.arange(n_seed)
+    keep = np.flatnonzero(chart >= 0)
+    order = keep[np.lexsort((key[keep], is_new[keep], chart[keep]))]
+
+    c_s, dt_s, new_s = chart[order], dt[order], is_new[order]
+    bounds = np.flatnonzero(c_s[1:] != c_s[:-1]) + 1
+    offsets = np.concatenate(([0], bounds, [len(order)])).astype(np.int64)
+
+    tie_rows = np.flatnonzero((c_s[1:] == c_s[:-1]) & (dt_s[1:] == dt_s[:-1])
+                              & new_s[1:] & new_s[:-1])
+    tie_segs = np.unique(np.searchsorted(offsets, tie_rows, side="right") - 1)
+    for seg in tie_segs:
+        lo, hi = offsets[seg], offsets[seg + 1]
+        lo += np.count_nonzero(order[lo:hi] < n_seed)
+        rows = np.sort(order[lo:hi])
+        # datetime64 (not int64) so numpy picks the same sort kernel as pandas
+        order[lo:hi] = rows[np.argsort(dt[rows].view("M8[ns]"), kind="quicksort")]
+    return order, offsets
+
+
+def _toprate_kernel(offsets, player, rate, seed, slot, seen, best_rate, best_row,
+                    out_A, out_B, out_state, fill):
+    """Walk chart segments and emit (new PB row, opponent best row) pairs.
+
+    *slot* maps a player to its position in the current chart's *seen*
+    list (insertion order, -1 when unseen).  *seed* rows only restore a
+    personal best.  After each chart its bests are written to *out_state*
+    in insertion order.  With ``fill=False`` only the number of pairs and
+    state rows is returned, so the output buffers can be preallocated.
+    """
+    n = n_state = 0
+    for c in range(len(offsets) - 1):
+        n_seen = 0
+        for i in range(offsets[c], offsets[c + 1]):
+            p = player[i]
+            s = slot[p]
+            if s < 0:
+                s = n_seen
+                slot[p] = s
+                seen[s] = p
+                n_seen += 1
+            elif not rate[i] > best_rate[s]:
+                continue
+            if not seed[i]:
+                for j in range(n_seen):
+                    if j != s:
+                        if fill:
+                            out_A[n] = i
+                            out_B[n] = best_row[j]
+                        n += 1
+            best_rate[s] = rate[i]
+            best_row[s] = i
+        for j in range(n_seen):
+            if fill:
+                out_state[n_state] = best_row[j]
+            n_state += 1
+            slot[seen[j]] = -1
+    return n, n_state
+
+
+_toprate_kernel_jit = njit(cache=True, nogil=True)(_toprate_kernel) if njit else None
+
+
+def _rank_search(ranked, n_ranked, best_rate, best_wife, r, w, s):
+    """Position of (*r*, *w*, slot *s*) in ``ranked[:n_ranked]``.
+
+    *ranked* holds player slots sorted by (best_rate, best_wife, slot); the
+    result is the number of them ordered before the key (binary search).
+    """
+    lo, hi = 0, n_ranked
+    while lo < hi:
+        mid = (lo + hi) // 2
+        t = ranked[mid]
+        if (best_rate[t] < r or (best_rate[t] == r and (
+                best_wife[t] < w or (best_wife[t] == w and t < s)))):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _rank_remove(ranked, pos, n_ranked, s):
+    """Drop slot *s* from ``ranked[:n_ranked]``; returns the new length."""
+    for q in range(pos[s], n_ranked - 1):
+        ranked[q] = ranked[q + 1]
+        pos[ranked[q]] = q
+    return n_ranked - 1
+
+
+def _rank_insert(ranked, pos, n_ranked, at, s):
+    """Insert slot *s* at position *at* of ``ranked[:n_ranked]``; returns the new length."""
+    for q in range(n_ranked, at, -1):
+        ranked[q] = ranked[q - 1]
+        pos[ranked[q]] = q
+    ranked[at] = s
+    pos[s] = at
+    return n_ranked + 1
+
+
+if njit:        # the kernels below and ChartBests call these compiled
+    _rank_search, _rank_remove, _rank_insert = (
+        njit(cache=True, nogil=True)(f) for f in (_rank_search, _rank_remove, _rank_insert))
+
+
+def _sparse_kernel(offsets, player, rate, wife, seed, slot, seen, best_rate, best_wife,
+                   best_row, ranked, pos, picked, stratified, max_opp,
+                   out_A, out_B, out_state, fill):
+    """:func:`_toprate_kernel` pairing each new PB with at most *max_opp* bests.
+
+    *ranked* holds the current chart's player slots sorted by their best
+    (rate, wife, slot) and *pos* each slot's position in it (the layout of
+    :class:`ChartBests`), so the position of a new best is a binary
+    search.  Opponents are the *max_opp* ranked bests nearest to it
+    (expanding both ways), or with *stratified* the bests at evenly spaced
+    ranks; they are emitted in slot order like the unbounded kernel.
+    """
+    n = n_state = 0
+    for c in range(len(offsets) - 1):
+        n_seen = n_ranked = 0
+        for i in range(offsets[c], offsets[c + 1]):
+            p = player[i]
+            s = slot[p]
+            if s < 0:
+                s = n_seen
+                slot[p] = s
+                seen[s] = p
+                n_seen += 1
+            elif not rate[i] > best_rate[s]:
+                continue
+            else:
+                n_ranked = _rank_remove(ranked, pos, n_ranked, s)
+
+            r, w = rate[i], wife[i]
+            at = _rank_search(ranked, n_ranked, best_rate, best_wife, r, w, s)
+
+            if not seed[i]:
+                m = 0
+                if n_ranked <= max_opp:
+                    for q in range(n_ranked):
+                        picked[m] = ranked[q]
+                        m += 1
+                elif stratified:
+                    for j in range(max_opp):
+                        picked[m] = ranked[(2 * j + 1) * n_ranked // (2 * max_opp)]
+                        m += 1
+                else:
+                    lo, hi = at - 1, at
+                    while m < max_opp:
+                        if hi >= n_ranked:
+                            take_lo = True
+                        elif lo < 0:
+                            take_lo = False
+                        else:
+                            a, b = ranked[lo], ranked[hi]
+                            da, db = r - best_rate[a], best_rate[b] - r
+                            take_lo = da < db or (da == db and w - best_wife[a]
+                                                  <= best_wife[b] - w)
+                        if take_lo:
+                            picked[m] = ranked[lo]
+                            lo -= 1
+                        else:
+                            picked[m] = ranked[hi]
+                            hi += 1
+                        m += 1
+                for j in range(1, m):               # slot order, as the full kernel
+                    t = picked[j]
+                    q = j - 1
+                    while q >= 0 and picked[q] > t:
+                        picked[q + 1] = picked[q]
+                        q -= 1
+                    picked[q + 1] = t
+                for j in range(m):
+                    if fill:
+                        out_A[n] = i
+                        out_B[n] = best_row[picked[j]]
+                    n += 1
+
+            best_rate[s] = r
+            best_wife[s] = w
+            best_row[s] = i
+            n_ranked = _rank_insert(ranked, pos, n_ranked, at, s)
+        for j in range(n_seen):
+            if fill:
+                out_state[n_state] = best_row[j]
+            n_state += 1
+            slot[seen[j]] = -1
+    return n, n_state
+
+
+_sparse_kernel_jit = njit(cache=True, nogil=True)(_sparse_kernel) if njit else None
+
+
+def _toprate_pairs_sorted(sdf: pd.DataFrame,
+                          pb_state: pd.DataFrame | None = None,
+                          opponents: str = "all",
+                          max_opponents: int = MAX_OPPONENTS,
+                          ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Pair construction over one (chart_key, datetime) sort of *sdf*.
+
+    Returns the (id_A, id_B) pairs and the personal-best state afterwards.
+    """
+    if pb_state is not None and len(pb_state):
+        frame = pd.concat([pb_state[PB_STATE_COLUMNS], sdf[PB_STATE_COLUMNS]],
+                          ignore_index=True)
+        n_seed = len(pb_state)
+    else:
+        frame = sdf[PB_STATE_COLUMNS].reset_index(drop=True)
+        n_seed = 0
+
+    order, offsets = _chart_segments(frame, n_seed)
+    ids = frame["id"].to_numpy()[order]
+    player, _ = pd.factorize(frame["player"].to_numpy(object)[order])
+    player = player.astype(np.int32)
+    rate = frame["rate"].to_numpy(np.float64)[order]
+    seed = order < n_seed
+
+    n_players = int(player.max()) + 1 if len(player) else 0
+    slot = np.full(n_players, -1, dtype=np.int32)
+    seen = np.empty(n_players, dtype=np.int32)
+    best_rate = np.empty(n_players, dtype=np.float64)
+    best_row = np.empty(n_players, dtype=np.int64)
+    args = [offsets, player, rate, seed, slot, seen, best_rate, best_row]
+    impl, impl_jit = _toprate_kernel, _toprate_kernel_jit
+    if opponents != "all":
+        wife = frame["wife"].to_numpy(np.float64)[order]
+        args = [offsets, player, rate, wife, seed, slot, seen, best_rate,
+                np.empty(n_players, dtype=np.float64), best_row,
+                np.empty(n_players, dtype=np.int32), np.empty(n_players, dtype=np.int32),
+                np.empty(max(max_opponents, 0), dtype=np.int32),
+                opponents == "stratified", max_opponents]
+        impl, impl_jit = _sparse_kernel, _sparse_kernel_jit
+
+    if impl_jit is not None:
+        def kernel(out_A, out_B, out_state, fill):
+            return impl_jit(*args, out_A, out_B, out_state, fill)
+    else:
+        args = [a.tolist() if isinstance(a, np.ndarray) else a for a in args]
+
+        def kernel(out_A, out_B, out_state, fill):
+            return impl(*args, out_A, out_B, out_state, fill)
+
+    empty = np.empty(0, dtype=np.int64)
+    n_pairs, n_state = kernel(empty, empty, empty, False)
+    out_A = np.empty(n_pairs, dtype=np.int64)
+    out_B = np.empty(n_pairs, dtype=np.int64)
+    out_state = np.empty(n_state, dtype=np.int64)
+    if impl_jit is not None:
+        kernel(out_A, out_B, out_state, True)
+    else:
+        buf_A, buf_B, buf_state = [0] * n_pairs, [0] * n_pairs, [0] * n_state
+        kernel(buf_A, buf_B, buf_state, True)
+        out_A[:], out_B[:], out_state[:] = buf_A, buf_B, buf_state
+
+    state = frame.take(order[out_state]).reset_index(drop=True)
+    if n_pairs == 0:
+        return pd.DataFrame(), state
+    return pd.DataFrame({"id_A": ids[out_A], "id_B": ids[out_B]}), state
+
+# ──────────────────────────────
+# Compact matches
+# ──────────────────────────────
+# columns of a build_matches_for_skillset frame
+MATCH_FRAME_COLUMNS: List[str] = ["id_A", "id_B", "player_A", "wife_A", "rate_A", "datetime_A",
+                                  "player_B", "wife_B", "rate_B", "datetime_B", "gap_days", "s_A"]
+
+
+class CompactMatches:
+    """Matches as two int32 indices into a per-score side table.
+
+    Row *i* compares scores ``score_A[i]`` and ``score_B[i]``; the side
+    table holds each score once: ``id``, ``player`` (int32 code into
+    *players*), ``wife``, ``rate`` and ``datetime``.  A match costs 8 bytes
+    instead of the ~120 of the joined frame, whose player names and
+    per-score columns are repeated for every pair.
+
+    ``matches[col]`` gives any column of the :func:`build_matches_for_skillset`
+    frame (``MATCH_FRAME_COLUMNS``) as a Series gathered on demand, so
+    :func:`run_elo`, :func:`holdout_test_mask` and :func:`run_elo_grid`
+    take either form and give identical results.
+    """
+
+    def __init__(self, score_A: np.ndarray, score_B: np.ndarray, ids: np.ndarray,
+                 player: np.ndarray, players: np.ndarray, wife: np.ndarray,
+                 rate: np.ndarray, datetime):
+        self.score_A = np.asarray(score_A, dtype=np.int32)
+        self.score_B = np.asarray(score_B, dtype=np.int32)
+        self.ids     = np.asarray(ids, dtype=np.int64)
+        self.player  = np.asarray(player, dtype=np.int32)
+        self.players = np.asarray(players, dtype=object)
+        self.wife    = np.asarray(wife, dtype=np.float64)
+        self.rate    = np.asarray(rate, dtype=np.float64)
+        self.datetime = pd.DatetimeIndex(datetime)
+
+    @classmethod
+    def from_frame(cls, matches: pd.DataFrame) -> "CompactMatches":
+        """Compact a :func:`build_matches_for_skillset` frame."""
+        if matches.empty:
+            return cls(*[np.empty(0)] * 4, np.empty(0, dtype=object), np.empty(0), np.empty(0),
+                       pd.DatetimeIndex([]))
+        n = len(matches)
+        both = lambda col: np.concatenate([matches[f"{col}_A"].to_numpy(),
+                                           matches[f"{col}_B"].to_numpy()])
+        codes, ids = pd.factorize(both("id"), sort=False)
+        first = np.empty(len(ids), dtype=np.int64)
+        first[codes[::-1]] = np.arange(2 * n - 1, -1, -1)       # first row of each score
+        player, players = pd.factorize(np.concatenate([
+            matches["player_A"].to_numpy(object), matches["player_B"].to_numpy(object)])[first])
+        when = pd.concat([matches["datetime_A"], matches["datetime_B"]]).array[first]
+        return cls(codes[:n], codes[n:], ids, player, players,
+                   both("wife")[first], both("rate")[first], when)
+
+    @classmethod
+    def from_pairs(cls, pairs: pd.DataFrame, known: pd.DataFrame) -> "CompactMatches":
+        """(id_A, id_B) pairs of scores in *known* → chronological compact matches.
+
+        Same rows and order as ``_finish_matches(_join_pairs(pairs, known))``.
+        """
+        index = pd.Index(known["id"].to_numpy())
+        if not index.is_unique:                  # the join would repeat rows
+            return cls.from_frame(_finish_matches(_join_pairs(pairs, known)))
+        pos_A = index.get_indexer(pairs["id_A"].to_numpy())
+        pos_B = index.get_indexer(pairs["id_B"].to_numpy())
+        when = pd.DatetimeIndex(known["datetime"])
+        latest = np.maximum(when.asi8[pos_A], when.asi8[pos_B])
+        order = np.argsort(latest, kind="stable")
+        player, players = pd.factorize(known["player"].to_numpy(object))
+        return cls(pos_A[order], pos_B[order], index.to_numpy(), player, players,
+                   known["wife"].to_numpy(np.float64), known["rate"].to_numpy(np.float64), when)
+
+    def __len__(self) -> int:
+        return len(self.score_A)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.score_A) == 0
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index(MATCH_FRAME_COLUMNS)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.score_A.nbytes + self.score_B.nbytes + self.ids.nbytes + self.player.nbytes
+                + self.wife.nbytes + self.rate.nbytes + self.datetime.asi8.nbytes
+                + sum(len(p) for p in self.players.tolist()) + self.players.nbytes)
+
+    def take(self, order: np.ndarray) -> "CompactMatches":
+        """Rows *order*; the side table is shared."""
+        out = object.__new__(CompactMatches)
+        out.__dict__.update(self.__dict__, score_A=self.score_A[order],
+                            score_B=self.score_B[order])
+        return out
+
+    def __contains__(self, col: str) -> bool:
+        return col in MATCH_FRAME_COLUMNS
+
+    def __getitem__(self, col: str) -> pd.Series:
+        if col == "gap_days":
+            return (self["datetime_A"] - self["datetime_B"]).dt.days.abs()
+        if col == "s_A":
+            return pd.Series(match_outcome(self))
+        name, side = col[:-2], col[-1:]
+        rows = self.score_A if side == "A" else self.score_B
+        if name == "id":
+            return pd.Series(self.ids[rows])
+        if name == "player":
+            return pd.Series(self.players[self.player[rows]], dtype=object)
+        if name in ("wife", "rate"):
+            return pd.Series(getattr(self, name)[rows])
+        if name == "datetime":
+            return pd.Series(self.datetime.take(rows))
+        raise KeyError(col)
+
+    def tables(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(pairs, scores) frames for the match store; see :meth:`from_tables`."""
+        pairs = pd.DataFrame({"score_A": self.score_A, "score_B": self.score_B})
+        scores = pd.DataFrame({"id": self.ids,
+                               "player": pd.Categorical.from_codes(self.player, self.players),
+                               "wife": self.wife, "rate": self.rate, "datetime": self.datetime})
+        return pairs, scores
+
+    @classmethod
+    def from_tables(cls, pairs: pd.DataFrame, scores: pd.DataFrame) -> "CompactMatches":
+        if pairs.empty:
+            return cls.from_frame(pd.DataFrame())
+        player = pd.Categorical(scores["player"])
+        return cls(pairs["score_A"].to_numpy(), pairs["score_B"].to_numpy(),
+                   scores["id"].to_numpy(), player.codes, player.categories.to_numpy(object),
+                   scores["wife"].to_numpy(), scores["rate"].to_numpy(), scores["datetime"])
+
+    def to_frame(self) -> pd.DataFrame:
+        """The :func:`build_matches_for_skillset` frame."""
+        if self.empty:
+            return pd.DataFrame()
+        return pd.DataFrame({col: self[col].to_numpy() for col in MATCH_FRAME_COLUMNS})
+
+
+# ──────────────────────────────
+# Per-chart personal-best index
+# ──────────────────────────────
+class ChartBests:
+    """Personal bests on one chart, keyed by integer player id.
+
+    Array-backed like the match kernels: per slot (insertion order) the
+    player, score id, rate and wife of the best, a sorted player-id →
+    slot map, and *ranked* / *pos* keeping the slots in (rate, wife)
+    order through the same ``_rank_*`` routines the builder uses.  A best
+    only improves on a strictly higher rate, as in
+    :func:`build_matches_for_skillset`.  Lookups, ranks and rate ranges
+    are binary searches; an update shifts the arrays past its position.
+    """
+
+    def __init__(self, capacity: int = 8):
+        self.n = 0
+        self.player = np.empty(capacity, dtype=np.int64)
+        self.score  = np.empty(capacity, dtype=np.int64)
+        self.rate   = np.empty(capacity, dtype=np.float64)
+        self.wife   = np.empty(capacity, dtype=np.float64)
+        self.ranked = np.empty(capacity, dtype=np.int32)
+        self.pos    = np.empty(capacity, dtype=np.int32)
+        self._ids   = np.empty(0, dtype=np.int64)       # sorted player ids …
+        self._slots = np.empty(0, dtype=np.int32)       # … and their slots
+
+    @classmethod
+    def from_bests(cls, player, score, rate, wife) -> "ChartBests":
+        """Index the given bests (one per player, in insertion order)."""
+        index = cls(max(len(player), 1))
+        for p, sid, r, w in zip(np.asarray(player).tolist(), np.asarray(score).tolist(),
+                                np.asarray(rate).tolist(), np.asarray(wife).tolist()):
+            index.update(p, sid, r, w)
+        return index
+
+    def __len__(self) -> int:
+        return self.n
+
+    def copy(self) -> "ChartBests":
+        """An independent copy (to update while readers still use this one)."""
+        other = ChartBests.__new__(ChartBests)
+        other.__dict__.update({k: v.copy() if isinstance(v, np.ndarray) else v
+                               for k, v in self.__dict__.items()})
+        return other
+
+    def slot(self, player: int) -> int:
+        """Slot of *player*, -1 without a best here."""
+        i = int(np.searchsorted(self._ids, player))
+        return int(self._slots[i]) if i < len(self._ids) and self._ids[i] == player else -1
+
+    def update(self, player: int, score: int, rate: float, wife: float) -> bool:
+        """Record a score; True when it is *player*'s new best."""
+        s = self.slot(player)
+        if s >= 0:
+            if not rate > self.rate[s]:
+                return False
+            n_ranked = _rank_remove(self.ranked, self.pos, self.n, s)
+        else:
+            if self.n == len(self.player):
+                self._grow()
+            s, n_ranked = self.n, self.n
+            i = int(np.searchsorted(self._ids, player))
+            self._ids = np.insert(self._ids, i, player)
+            self._slots = np.insert(self._slots, i, s)
+            self.player[s] = player
+            self.n += 1
+        at = _rank_search(self.ranked, n_ranked, self.rate, self.wife, rate, wife, s)
+        self.score[s], self.rate[s], self.wife[s] = score, rate, wife
+        _rank_insert(self.ranked, self.pos, n_ranked, at, s)
+        return True
+
+    def _grow(self) -> None:
+        for name in ("player", "score", "rate", "wife", "ranked", "pos"):
+            arr = getattr(self, name)
+            setattr(self, name, np.concatenate([arr, np.empty_like(arr)]))
+
+    def best(self, player: int) -> Tuple[int, float, float] | None:
+        """(score id, rate, wife) of *player*'s best, or None."""
+        s = self.slot(player)
+        return None if s < 0 else (int(self.score[s]), float(self.rate[s]), float(self.wife[s]))
+
+    def better_than(self, rate: float, wife: float) -> int:
+        """How many players have a best strictly above (*rate*, *wife*)."""
+        return self.n - _rank_search(self.ranked, self.n, self.rate, self.wife,
+                                     rate, wife, np.iinfo(np.int32).max)
+
+    def rank(self, player: int) -> int | None:
+        """1 + the players with a better best than *player*'s, or None."""
+        s = self.slot(player)
+        return None if s < 0 else self.better_than(self.rate[s], self.wife[s]) + 1
+
+    def bests(self, lo: float = -np.inf, hi: float = np.inf) -> Dict[str, np.ndarray]:
+        """Bests with *lo* ≤ rate ≤ *hi*, best first, as ``player`` / ``score`` / ``rate`` / ``wife`` arrays."""
+        a = _rank_search(self.ranked, self.n, self.rate, self.wife, lo, -np.inf, -1)
+        b = _rank_search(self.ranked, self.n, self.rate, self.wife,
+                         hi, np.inf, np.iinfo(np.int32).max)
+        slots = self.ranked[a:b][::-1]
+        return {"player": self.player[slots], "score": self.score[slots],
+                "rate": self.rate[slots], "wife": self.wife[slots]}
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """All bests in insertion order — the row order of a ``pb_state`` chart."""
+        n = self.n
+        return {"player": self.player[:n], "score": self.score[:n],
+                "rate": self.rate[:n], "wife": self.wife[:n]}
+
+
+# ──────────────────────────────
+# Streaming ingestion
+# ──────────────────────────────
+STREAM_BATCH_ROWS   = 65_536
+STREAM_PREFIX_CHARS = 2       # chart-key prefix per spill bucket ("X" + 1 hex → 16)
+STREAM_CHUNK_ROWS   = 65_536  # scores per build chunk; a larger chart is its own chunk
+
+
+def iter_score_batches(scores_dir: Path,
+                       batch_rows: int = STREAM_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield ``MATCH_COLUMNS`` rows of every score file, ~*batch_rows* at a time.
+
+    Same rows and values as :func:`load_scores` (WIFE filter, dominant
+    skill-set, parsed datetime), but only about one batch is ever in
+    memory and the ``song`` / other columns are never read.  Record
+    batches of small files are pooled until *batch_rows* rows are buffered.
+    """
+    files = sorted(scores_dir.glob("*score_data*.parquet"))
+    if not files:
+        raise FileNotFoundError(f"No '*score_data*.parquet' found in {scores_dir}")
+    raw = ["id", "player", "wife", "rate", "datetime", *SKILLSETS]
+
+    def convert(tables: list) -> pd.DataFrame:
+        table = pa.concat_tables(tables, promote_options="permissive")
+        df = table.to_pandas()
+        df["skillset"] = df[SKILLSETS].idxmax(axis=1)
+        df["datetime"] = pd.to_datetime(df["datetime"])
+        return df[MATCH_COLUMNS]
+
+    buffer, n_buffered = [], 0
+    for f in files:
+        for batch in pq.ParquetFile(f).iter_batches(batch_size=batch_rows,
+                                                    columns=raw + ["chart"]):
+            wife = batch.column("wife")
+            batch = batch.filter(pc.and_(pc.greater(wife, WIFE_RANGE[0]),
+                                         pc.less(wife, WIFE_RANGE[1])))
+            if batch.num_rows == 0:
+                continue
+            table = pa.Table.from_batches([batch.select(raw)]).append_column(
+                "chart_key", pc.struct_field(batch.column("chart"), "key"))
+            buffer.append(table)
+            n_buffered += table.num_rows
+            if n_buffered >= batch_rows:
+                yield convert(buffer)
+                buffer, n_buffered = [], 0
+    if buffer:
+        yield convert(buffer)
+
+
+@instrumented("spill_scores")
+def spill_scores(scores_dir: Path, spill_dir: Path,
+                 prefix_chars: int = STREAM_PREFIX_CHARS,
+                 batch_rows: int = STREAM_BATCH_ROWS) -> None:
+    """Partition the streamed scores into ``spill_dir/{sk}/{bucket}.arrow``.
+
+    A bucket holds the charts whose key starts with one *prefix_chars*
+    prefix; file names are the hex of that prefix, so sorting them sorts
+    the buckets in chart-key order.  *spill_dir* must be empty (or not
+    exist yet): leftover buckets would be read as part of this corpus.
+    """
+    if spill_dir.exists() and any(spill_dir.iterdir()):
+        raise FileExistsError(f"spill_dir {spill_dir} is not empty")
+    writers: dict = {}
+    schema = None
+    try:
+        for df in iter_score_batches(scores_dir, batch_rows):
+            bucket = df["chart_key"].str.slice(0, prefix_chars)
+            for (sk, prefix), part in df.groupby(["skillset", bucket], sort=False):
+                table = pa.Table.from_pandas(part.drop(columns="skillset"),
+                                             preserve_index=False)
+                schema = schema or table.schema
+                key = (sk, prefix)
+                if key not in writers:
+                    path = spill_dir / sk / f"{prefix.encode().hex()}.arrow"
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    sink = pa.OSFile(str(path), "wb")
+                    writers[key] = (sink, pa.ipc.new_file(sink, schema))
+                writers[key][1].write_table(table.cast(schema))
+    finally:
+        for sink, writer in writers.values():
+            writer.close()
+            sink.close()
+
+
+@instrumented("stream_matches", rows_out=len,
+              tags=lambda spill_dir, sk, *a, **_: {"skillset": sk})
+def stream_matches_for_skillset(spill_dir: Path, sk: str, opponents: str = "all",
+                                max_opponents: int = MAX_OPPONENTS,
+                                chunk_rows: int = STREAM_CHUNK_ROWS) -> pd.DataFrame:
+    """:func:`build_matches_for_skillset` over the spilled buckets of *sk*.
+
+    Charts are independent, so pairs are built a few whole charts at a
+    time — chunks of about *chunk_rows* scores, or one chart if it is
+    larger — and concatenated in chart-key order, the order the full build
+    emits, before the same chronological sort.  Each bucket stays memory-
+    mapped; besides the matches, only one chunk's scores and an index of
+    the bucket's rows (8 bytes per score) are held, so the scores in memory
+    are bounded by the largest chart, not by the corpus.
+    """
+    parts = []
+    for path in sorted((spill_dir / sk).glob("*.arrow")):
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+            keys = pc.dictionary_encode(table.column("chart_key")).combine_chunks()
+            chart_rank = np.argsort(np.argsort(keys.dictionary.to_numpy(zero_copy_only=False)))
+            chart = chart_rank[keys.indices.to_numpy()]
+            order = np.argsort(chart, kind="stable")     # a chart's rows keep file order
+            ends = np.cumsum(np.bincount(chart, minlength=len(chart_rank)))
+            del keys, chart
+            lo = 0
+            while lo < len(order):               # whole charts up to chunk_rows, ≥ 1 chart
+                i = np.searchsorted(ends, lo + chunk_rows, side="right") - 1
+                hi = int(ends[i] if i >= 0 and ends[i] > lo
+                         else ends[np.searchsorted(ends, lo, side="right")])
+                sdf = table.take(pa.array(order[lo:hi])).to_pandas()
+                pairs, _ = _toprate_pairs_sorted(sdf, None, opponents, max_opponents)
+                if not pairs.empty:
+                    parts.append(_join_pairs(pairs, sdf))
+                lo = hi
+            del table
+    if not parts:
+        return pd.DataFrame()
+    return _finish_matches(pd.concat(parts, ignore_index=True))
+
+
+def iter_skillset_matches(scores_dir: Path, spill_dir: Path | None = None,
+                          prefix_chars: int = STREAM_PREFIX_CHARS,
+                          opponents: str = "all",
+                          max_opponents: int = MAX_OPPONENTS,
+                          ) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Stream the score files once and yield ``(sk, matches)`` per skill-set.
+
+    Peak memory is one record batch while spilling, then one chunk of
+    charts (see :func:`stream_matches_for_skillset`) plus the matches of
+    the current skill-set.  *spill_dir* defaults to a temporary directory
+    removed afterwards; one given must be empty.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_dir = Path(tmp) if spill_dir is None else spill_dir
+        spill_scores(scores_dir, spill_dir, prefix_chars)
+        for sk in SKILLSETS:
+            yield sk, stream_matches_for_skillset(spill_dir, sk, opponents, max_opponents)
 
 # ──────────────────────────────
 # Core Elo helpers
@@ -133,6 +996,26 @@ def outcome_dynamic(
     return 1.0 / (1.0 + np.exp(-z))
 
 
+def expected_score(RA: float, RB: float) -> float:
+    """Elo expected score of a player rated *RA* against one rated *RB*.
+
+    The ``expA`` of the :func:`run_elo` update, i.e. the win probability
+    the ratings predict; works element-wise on arrays.
+    """
+    return 1.0 / (1.0 + 10.0 ** ((RB - RA) / 400.0))
+
+
+def glicko_expected_score(RA: float, RB: float, rdA: float, rdB: float) -> float:
+    """Glicko win probability of *RA* (deviation *rdA*) against *RB* (*rdB*).
+
+    :func:`expected_score` with the rating difference scaled by
+    g(√(rdA² + rdB²)): the prediction the ``system="glicko"`` hold-out
+    scores; works element-wise on arrays.
+    """
+    g = 1.0 / np.sqrt(1.0 + _GLICKO_G * (np.square(rdA) + np.square(rdB)))
+    return 1.0 / (1.0 + 10.0 ** (-g * (RA - RB) / 400.0))
+
+
 def outcome_from_scores(rA: float, rB: float, wA: float, wB: float,
                         tol: float = TOLERANCE) -> float:
     """Return 1 if A beats B, 0 if B beats A, 0.5 for draw."""
@@ -146,6 +1029,154 @@ def outcome_from_scores(rA: float, rB: float, wA: float, wB: float,
         return 0.0
     return 0.5
 
+# ──────────────────────────────
+# Match features (whole-column)
+# ──────────────────────────────
+
+def match_gap_days(matches: pd.DataFrame) -> np.ndarray:
+    """Whole days between the two scores of each match: ``|(tA - tB).days|``."""
+    return (matches["datetime_A"] - matches["datetime_B"]).dt.days.abs().to_numpy()
+
+
+def match_outcome(matches: pd.DataFrame,
+                  alpha: float = RATE_DIFF_SCALE,
+                  beta:  float = WIFE_DIFF_SCALE) -> np.ndarray:
+    """Column-wise :func:`outcome_dynamic` for player A."""
+    return outcome_dynamic(matches["rate_A"].to_numpy(np.float64),
+                           matches["rate_B"].to_numpy(np.float64),
+                           matches["wife_A"].to_numpy(np.float64),
+                           matches["wife_B"].to_numpy(np.float64),
+                           alpha, beta)
+
+
+def k_eff_from_gap(gap_days: np.ndarray, k: float,
+                   tau_gap_days: float = TAU_GAP_DAYS) -> np.ndarray:
+    """Time-decayed K per match: ``k * exp(-gap_days / tau)``."""
+    gap_days = np.asarray(gap_days)
+    tau = np.float64(tau_gap_days)
+    if np.isinf(tau):
+        return np.full(gap_days.shape, k, dtype=np.float64)
+    return k * np.exp(-gap_days / tau)
+
+
+def add_match_features(
+    matches: pd.DataFrame,
+    *,
+    alpha: float = RATE_DIFF_SCALE,
+    beta:  float = WIFE_DIFF_SCALE,
+    k:     float | None = None,
+    tau_gap_days: float = TAU_GAP_DAYS,
+) -> pd.DataFrame:
+    """Return *matches* with the per-row inputs of the Elo update as columns.
+
+    Adds ``gap_days`` (kept if already present), ``s_A`` for the given
+    outcome scales and, when *k* is given, ``k_eff`` for *tau_gap_days*.
+    The sequential simulations then only do rating arithmetic.
+    """
+    out = matches.copy(deep=False)
+    if "gap_days" not in out:
+        out["gap_days"] = match_gap_days(out)
+    out["s_A"] = match_outcome(out, alpha, beta)
+    if k is not None:
+        out["k_eff"] = k_eff_from_gap(out["gap_days"].to_numpy(), k, tau_gap_days)
+    return out
+
+# ──────────────────────────────
+# Persistent match store
+# ──────────────────────────────
+MATCH_STORE_VERSION = 2     # bump when the match-construction rules change
+
+
+def matches_fingerprint(df: pd.DataFrame, sk: str, opponents: str = "all",
+                        max_opponents: int = MAX_OPPONENTS) -> str:
+    """Hash of *sk*'s ``MATCH_COLUMNS`` rows and of the match rules."""
+    sdf = df.loc[df["skillset"] == sk, MATCH_COLUMNS]
+    rules = {"version": MATCH_STORE_VERSION, "skillset": sk,
+             "rate_diff_scale": RATE_DIFF_SCALE, "wife_diff_scale": WIFE_DIFF_SCALE}
+    if opponents != "all":
+        rules.update(opponents=opponents, max_opponents=max_opponents)
+    h = hashlib.sha1(json.dumps(rules).encode())
+    h.update(pd.util.hash_pandas_object(sdf, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _store_write(path: Path, frame: pd.DataFrame, fingerprint: str) -> None:
+    """Write *frame* as an uncompressed Arrow IPC file, player columns int32-coded."""
+    player_cols = [c for c in frame if c.startswith("player")]
+    codes, players = pd.factorize(np.concatenate(
+        [frame[c].to_numpy(object) for c in player_cols] or [np.empty(0, dtype=object)]))
+    players = pa.array(players.astype(object), type=pa.string())
+    arrays = {}
+    for col in frame:
+        if col in player_cols:
+            i = player_cols.index(col)
+            arrays[col] = pa.DictionaryArray.from_arrays(
+                codes[i * len(frame):(i + 1) * len(frame)].astype(np.int32), players)
+        else:
+            arrays[col] = pa.array(frame[col])
+    table = pa.table(arrays, metadata={b"elo_core.fingerprint": fingerprint.encode()})
+    tmp = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    tmp.replace(path)
+
+
+def _store_read(path: Path, fingerprint: str) -> pd.DataFrame | None:
+    """Memory-map *path*; None when missing or built from other inputs."""
+    if not path.exists():
+        return None
+    with pa.memory_map(str(path)) as source:    # buffers keep the mapping alive
+        table = pa.ipc.open_file(source).read_all()
+    if (table.schema.metadata or {}).get(b"elo_core.fingerprint") != fingerprint.encode():
+        return None
+    if table.num_columns == 0:
+        return pd.DataFrame()
+    return table.to_pandas(split_blocks=True)
+
+
+@instrumented("stored_matches", rows_in=_skillset_rows, rows_out=_rows, tags=_skillset_tag)
+def stored_matches_for_skillset(
+    df: pd.DataFrame,
+    sk: str,
+    store_dir: Path,
+    *,
+    return_state: bool = False,
+    opponents: str = "all",
+    max_opponents: int = MAX_OPPONENTS,
+    compact: bool = False,
+) -> Union[pd.DataFrame, CompactMatches, Tuple]:
+    """:func:`build_matches_for_skillset` through an on-disk store.
+
+    *store_dir* holds the matches in :class:`CompactMatches` form —
+    ``{sk}.arrow`` (int32 score pairs) and ``{sk}_scores.arrow`` (one row
+    per score) — and ``{sk}_pb_state.arrow``, all tagged with
+    :func:`matches_fingerprint`.  When the fingerprint matches, the stored
+    matches are memory-mapped instead of rebuilt: fixed-width numeric
+    columns without a copy, players as int32 codes (categorical).  Bounded
+    *opponents* are stored as ``{sk}_{opponents}{max_opponents}…`` next to
+    the full matches.  The matches come back as :class:`CompactMatches`
+    with *compact*, else as the joined frame.
+    """
+    fingerprint = matches_fingerprint(df, sk, opponents, max_opponents)
+    name = sk if opponents == "all" else f"{sk}_{opponents}{max_opponents}"
+    paths = [store_dir / f"{name}.arrow", store_dir / f"{name}_scores.arrow",
+             store_dir / f"{name}_pb_state.arrow"]
+    stored = [_store_read(p, fingerprint) for p in paths[:2 + return_state]]
+    if all(frame is not None for frame in stored):
+        matches = CompactMatches.from_tables(*stored[:2])
+        state = stored[2] if return_state else None
+    else:
+        matches, state = build_matches_for_skillset(df, sk, return_state=True, compact=True,
+                                                    opponents=opponents,
+                                                    max_opponents=max_opponents)
+        store_dir.mkdir(parents=True, exist_ok=True)
+        for path, frame in zip(paths, (*matches.tables(), state.reset_index(drop=True))):
+            _store_write(path, frame, fingerprint)
+    if not compact:
+        matches = matches.to_frame()
+    return (matches, state) if return_state else matches
+
+@instrumented("run_elo", rows_in=lambda matches, **_: len(matches), rows_out=_rows)
 def run_elo(
     matches: pd.DataFrame,
     *,
@@ -154,8 +1185,14 @@ def run_elo(
     tau_gap_days: float = TAU_GAP_DAYS,
     tol:        float  = TOLERANCE,
     return_history: bool = False,
-    
-) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
+    engine:     str    = "array",
+    initial:    pd.DataFrame | None = None,
+    snapshots:  Sequence | None = None,
+    system:     str    = "elo",
+    rd_init:    float  = GLICKO_RD_INIT,
+    rd_min:     float  = GLICKO_RD_MIN,
+    rd_per_day: float  = GLICKO_RD_PER_DAY,
+) -> Union[pd.DataFrame, Tuple[pd.DataFrame, ...]]:
     """
     Compute final and peak Elo ratings for a given series of matches.
 
@@ -166,6 +1203,35 @@ def run_elo(
       • Update each opponent B right away.
       • When all matches for this id_A are done, apply the summed ΔR_A once.
 
+    *engine* selects the implementation (see ``ELO_ENGINES``):
+
+      • "array" – players encoded to ints once, batches pre-computed,
+                  sequential update over NumPy arrays (numba-compiled
+                  when available).
+      • "loop"  – reference groupby / itertuples implementation.
+
+    Both engines give bit-for-bit identical output.  The array engine reuses
+    the ``gap_days`` / ``s_A`` columns of :func:`add_match_features` when
+    present.  *matches* may also be :class:`CompactMatches`.
+
+    *initial* resumes a previous simulation: the ``["elo", "peak"]`` frame
+    it returned seeds the ratings, and the result covers its players too.
+
+    *snapshots* (array engine) is a sorted list of dates: the same pass
+    also records the ratings as of each date (every score strictly
+    before it) as a :class:`RatingSnapshots`, appended to the returned
+    tuple.
+
+    *system* (see ``RATING_SYSTEMS``) "glicko" (array engine) rates with
+    Glicko instead: every player also carries a rating deviation (RD),
+    starting at *rd_init*, shrinking with each match down to *rd_min* and
+    growing by *rd_per_day* (c in RD² + c²·days) while the player is idle.
+    The batch ordering is the same, each batch being A's rating period;
+    *k* is unused and the time decay weights each match instead.  The
+    ratings gain ``rd`` and ``last_day`` (days since the epoch of the last
+    match, where RD growth restarts) columns, *initial* needs them too,
+    and the history gains ``rd_after_score``.
+
     Returns
     -------
     pd.DataFrame
@@ -174,8 +1240,61 @@ def run_elo(
         where “elo” is the rating after the final match and “peak” is the
         highest value that player reached at any point in the simulation.
     """
+    if engine not in ELO_ENGINES:
+        raise ValueError(f"Unknown Elo engine {engine!r}; expected one of {ELO_ENGINES}")
+    if system not in RATING_SYSTEMS:
+        raise ValueError(f"Unknown rating system {system!r}; expected one of {RATING_SYSTEMS}")
+    if system != "elo" and engine != "array":
+        raise ValueError(f"system={system!r} needs engine='array'")
+    system_opts = {"system": system, "rd_init": rd_init, "rd_min": rd_min,
+                   "rd_per_day": rd_per_day}
+    if snapshots is not None:
+        if engine != "array":
+            raise ValueError("snapshots need engine='array'")
+        return _run_elo_array(matches, rating_init=rating_init, k=k,
+                              tau_gap_days=tau_gap_days,
+                              return_history=return_history, initial=initial,
+                              snapshots=snapshots, **system_opts)
+    if matches.empty:
+        columns = ["elo", "peak"] + (["rd", "last_day"] if system == "glicko" else [])
+        final_df = (pd.DataFrame({col: [] for col in columns}, dtype=np.float64)
+                    if initial is None else
+                    initial[columns].sort_values("elo", ascending=False))
+        if return_history:
+            hist_df = pd.DataFrame(columns=["score_id", "player", "elo_after_score",
+                                            "delta_elo", "datetime"]
+                                   + (["rd_after_score"] if system == "glicko" else [])
+                                   ).set_index("score_id")
+            return final_df, hist_df
+        return final_df
+
+    if engine == "array":
+        return _run_elo_array(matches, rating_init=rating_init, k=k,
+                              tau_gap_days=tau_gap_days,
+                              return_history=return_history, initial=initial, **system_opts)
+    if isinstance(matches, CompactMatches):
+        matches = matches.to_frame()
+    return _run_elo_loop(matches, rating_init=rating_init, k=k,
+                         tau_gap_days=tau_gap_days, tol=tol,
+                         return_history=return_history, initial=initial)
+
+
+def _run_elo_loop(
+    matches: pd.DataFrame,
+    *,
+    rating_init: float,
+    k:          float,
+    tau_gap_days: float,
+    tol:        float,
+    return_history: bool,
+    initial:    pd.DataFrame | None,
+) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Reference implementation of :func:`run_elo` (per-row Python loop)."""
     rating: dict[str, float] = defaultdict(lambda: rating_init)
     peak:   dict[str, float] = defaultdict(lambda: rating_init)
+    if initial is not None:
+        rating.update(initial["elo"].to_dict())
+        peak.update(initial["peak"].to_dict())
     history:  list[dict]     = []          
     tau = np.float64(tau_gap_days)
 
@@ -225,3 +1344,653 @@ def run_elo(
     
     return final_df
     #return df
+
+
+# ──────────────────────────────
+# Array-backed Elo engine
+# ──────────────────────────────
+
+def _elo_batches(matches: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (row order, batch starts) grouping rows by id_A.
+
+    Batches appear in order of first appearance of id_A and rows keep their
+    original order inside a batch — i.e. ``groupby("id_A", sort=False)``.
+    """
+    codes, _ = pd.factorize(matches["id_A"].to_numpy(), sort=False)
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes)
+    starts = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=starts[1:])
+    return order, starts
+
+
+def _match_players(matches) -> Tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """(player_A, player_B, names) for :func:`_encode_players`.
+
+    :class:`CompactMatches` give their int32 player codes and the names
+    they index, frames the player names themselves (and None).
+    """
+    if isinstance(matches, CompactMatches):
+        return (matches.player[matches.score_A], matches.player[matches.score_B],
+                matches.players)
+    return matches["player_A"].to_numpy(object), matches["player_B"].to_numpy(object), None
+
+
+def _encode_players(player_A: np.ndarray, player_B: np.ndarray,
+                    starts: np.ndarray, known: np.ndarray | None = None,
+                    names: np.ndarray | None = None,
+                    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Integer-encode players in the order the simulation first touches them.
+
+    The access sequence is ``known…, A_0, B_0…, A_1, B_1…`` so ids (and
+    therefore the output index order) match the dict insertion order of the
+    loop engine; *known* players keep ids ``0..len(known)-1``.  With
+    *names*, *player_A* / *player_B* are integer codes into it.
+    """
+    if names is not None and known is not None:     # known players as codes too
+        known_codes = pd.Index(names).get_indexer(known)
+        new = known_codes < 0
+        known_codes[new] = len(names) + np.arange(int(new.sum()))
+        names, known = np.concatenate([names, known[new]]), known_codes
+    n_known = 0 if known is None else len(known)
+    n_rows, n_batches = len(player_B), len(starts) - 1
+    batch_of_row = np.repeat(np.arange(n_batches), np.diff(starts))
+    pos_A = n_known + starts[:-1] + np.arange(n_batches)
+    pos_B = n_known + np.arange(n_rows) + batch_of_row + 1
+
+    seq = np.empty(n_known + n_rows + n_batches, dtype=object if names is None else np.int64)
+    if n_known:
+        seq[:n_known] = known
+    seq[pos_A] = player_A[starts[:-1]]
+    seq[pos_B] = player_B
+    codes, players = pd.factorize(seq, sort=False)
+    if names is not None:
+        players = np.asarray(names, dtype=object)[players]
+    return (codes[pos_A].astype(np.int32),
+            codes[pos_B].astype(np.int32),
+            players)
+
+
+def _elo_kernel(idx_A, idx_B, starts, k_eff, s_A, rating, peak,
+                hist_elo, hist_delta):
+    """Sequential batch update; mutates *rating*, *peak* and the history buffers.
+
+    Works on lists (pure Python) or NumPy arrays (numba); the arithmetic is
+    written exactly as in :func:`_run_elo_loop` so results are bit-identical.
+    """
+    for j in range(len(starts) - 1):
+        lo, hi = starts[j], starts[j + 1]
+        pA = idx_A[j]
+        RA0 = rating[pA]
+        delta_A_sum = 0.0
+
+        for i in range(lo, hi):
+            pB = idx_B[i]
+            RB = rating[pB]
+            sA = s_A[i]
+            sB = 1.0 - sA
+            expA = 1.0 / (1.0 + 10.0 ** ((RB - RA0) / 400.0))
+
+            delta_A_sum += k_eff[i] * (sA - expA)
+
+            RB_new = RB + k_eff[i] * (sB - (1.0 - expA))
+            rating[pB] = RB_new
+            if RB_new > peak[pB]:
+                peak[pB] = RB_new
+
+        RA_new = RA0 + delta_A_sum
+        rating[pA] = RA_new
+        if RA_new > peak[pA]:
+            peak[pA] = RA_new
+        hist_elo[j] = RA_new
+        hist_delta[j] = delta_A_sum
+
+
+_elo_kernel_jit = njit(cache=True, nogil=True)(_elo_kernel) if njit else None
+
+_GLICKO_Q = float(np.log(10.0) / 400.0)
+_GLICKO_G = 3.0 * _GLICKO_Q ** 2 / float(np.pi) ** 2      # g(RD) = 1 / sqrt(1 + _GLICKO_G·RD²)
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def _glicko_kernel(idx_A, idx_B, starts, weight, s_A, day, test, rating, peak, rd, last,
+                   rd_min, rd_max, c2, hist_elo, hist_delta, hist_rd, probs, outcomes):
+    """Glicko counterpart of :func:`_elo_kernel`, same batch ordering.
+
+    A batch is A's rating period: A's rating and RD stay frozen while each
+    opponent B is updated right away as a one-game period against A, and
+    A's summed update is applied once at the end.  RDs first grow with the
+    days since the player's last match (*day* per batch, *last* per
+    player; ``c2`` per day, at most *rd_max*) and never drop below
+    *rd_min*.  *weight* scales each match's score and information like
+    the time decay of ``k_eff``.
+
+    *test* rows (hold-out) update nothing; they record A's expected score
+    under both players' uncertainty and the outcome into *probs* /
+    *outcomes*.  Works on lists (pure Python) or NumPy arrays (numba).
+    """
+    q, g_scale = _GLICKO_Q, _GLICKO_G
+    t = 0
+    for j in range(len(starts) - 1):
+        lo, hi = starts[j], starts[j + 1]
+        now = day[j]
+        pA = idx_A[j]
+        RA0 = rating[pA]
+        rdA = min(math.sqrt(rd[pA] * rd[pA] + c2 * (now - last[pA])), rd_max)
+        gA = 1.0 / math.sqrt(1.0 + g_scale * rdA * rdA)
+        score_sum = 0.0
+        info_sum = 0.0
+
+        for i in range(lo, hi):
+            pB = idx_B[i]
+            RB = rating[pB]
+            rdB = min(math.sqrt(rd[pB] * rd[pB] + c2 * (now - last[pB])), rd_max)
+            sA = s_A[i]
+            if test[i]:
+                g = 1.0 / math.sqrt(1.0 + g_scale * (rdA * rdA + rdB * rdB))
+                probs[t] = 1.0 / (1.0 + 10.0 ** (-g * (RA0 - RB) / 400.0))
+                outcomes[t] = sA
+                t += 1
+                continue
+            gB = 1.0 / math.sqrt(1.0 + g_scale * rdB * rdB)
+            w = weight[i]
+
+            expA = 1.0 / (1.0 + 10.0 ** (-gB * (RA0 - RB) / 400.0))
+            score_sum += w * gB * (sA - expA)
+            info_sum += w * gB * gB * expA * (1.0 - expA)
+
+            expB = 1.0 / (1.0 + 10.0 ** (-gA * (RB - RA0) / 400.0))
+            precision = 1.0 / (rdB * rdB) + q * q * w * gA * gA * expB * (1.0 - expB)
+            RB_new = RB + q / precision * w * gA * ((1.0 - sA) - expB)
+            rating[pB] = RB_new
+            rd[pB] = max(math.sqrt(1.0 / precision), rd_min)
+            last[pB] = now
+            if RB_new > peak[pB]:
+                peak[pB] = RB_new
+
+        precision = 1.0 / (rdA * rdA) + q * q * info_sum
+        delta_A = q / precision * score_sum
+        RA_new = RA0 + delta_A
+        rating[pA] = RA_new
+        rd[pA] = max(math.sqrt(1.0 / precision), rd_min)
+        last[pA] = now
+        if RA_new > peak[pA]:
+            peak[pA] = RA_new
+        hist_elo[j] = RA_new
+        hist_delta[j] = delta_A
+        hist_rd[j] = rd[pA]
+
+
+_glicko_kernel_jit = njit(cache=True, nogil=True)(_glicko_kernel) if njit else None
+
+
+def _run_elo_array(
+    matches: pd.DataFrame,
+    *,
+    rating_init: float,
+    k:          float,
+    tau_gap_days: float,
+    return_history: bool,
+    initial:    pd.DataFrame | None,
+    snapshots:  Sequence | None = None,
+    system:     str = "elo",
+    rd_init:    float = GLICKO_RD_INIT,
+    rd_min:     float = GLICKO_RD_MIN,
+    rd_per_day: float = GLICKO_RD_PER_DAY,
+) -> Union[pd.DataFrame, Tuple[pd.DataFrame, ...]]:
+    """Array-backed implementation of :func:`run_elo`."""
+    glicko = system == "glicko"
+    base = (pd.DataFrame({"elo": [], "peak": []}, dtype=np.float64) if initial is None
+            else initial[["elo", "peak"]])
+    if matches.empty:           # only reached with snapshots
+        out = run_elo(matches, return_history=return_history, initial=initial, system=system)
+        snaps = RatingSnapshots(snapshots, base, np.zeros(len(snapshots) + 1, dtype=np.int64),
+                                np.empty(0, dtype=np.int32), np.empty(0, dtype=object),
+                                np.empty(0), np.empty(0))
+        return (*out, snaps) if return_history else (out, snaps)
+
+    order, starts = _elo_batches(matches)
+    m = matches.take(order)
+    first = starts[:-1]
+
+    known = None if initial is None else initial.index.to_numpy(object)
+    player_A, player_B, names = _match_players(m)
+    idx_A, idx_B, players = _encode_players(player_A, player_B, starts, known, names)
+    n_known = 0 if initial is None else len(initial)
+    gap = m["gap_days"].to_numpy() if "gap_days" in m else match_gap_days(m)
+    k_eff = k_eff_from_gap(gap, 1.0 if glicko else k, tau_gap_days)    # glicko: match weight
+    s_A = (m["s_A"].to_numpy(np.float64) if "s_A" in m
+           else match_outcome(m))
+
+    n_players, n_batches = len(players), len(first)
+    rating = np.full(n_players, rating_init, dtype=np.float64)
+    peak = rating.copy()
+    if n_known:
+        rating[:n_known] = initial["elo"].to_numpy(np.float64)
+        peak[:n_known] = initial["peak"].to_numpy(np.float64)
+    if glicko:
+        day = _utc_ns(m["datetime_A"].array[first]) / _NS_PER_DAY
+        rd = np.full(n_players, rd_init, dtype=np.float64)
+        last = np.full(n_players, day[0])           # new players start at rd_init anyway
+        if n_known:
+            rd[:n_known] = initial["rd"].to_numpy(np.float64)
+            last[:n_known] = initial["last_day"].to_numpy(np.float64)
+        glicko_args = (rd_min, rd_init, rd_per_day ** 2)
+        no_test = np.zeros(len(m), dtype=bool)
+
+    if _elo_kernel_jit is not None:
+        hist_elo = np.empty(n_batches, dtype=np.float64)
+        hist_delta = np.empty(n_batches, dtype=np.float64)
+        hist_rd = np.empty(n_batches, dtype=np.float64)
+
+        if glicko:
+            def run(j0, j1):
+                _glicko_kernel_jit(idx_A[j0:j1], idx_B, starts[j0:j1 + 1], k_eff, s_A,
+                                   day[j0:j1], no_test, rating, peak, rd, last, *glicko_args,
+                                   hist_elo[j0:j1], hist_delta[j0:j1], hist_rd[j0:j1],
+                                   hist_rd[:0], hist_rd[:0])
+        else:
+            def run(j0, j1):
+                _elo_kernel_jit(idx_A[j0:j1], idx_B, starts[j0:j1 + 1], k_eff, s_A,
+                                rating, peak, hist_elo[j0:j1], hist_delta[j0:j1])
+    else:
+        # Python floats in lists are much faster to index than NumPy scalars
+        rating, peak = rating.tolist(), peak.tolist()
+        hist_elo = [0.0] * n_batches
+        hist_delta = [0.0] * n_batches
+        hist_rd = [0.0] * n_batches
+        lists = idx_A.tolist(), idx_B.tolist(), starts.tolist(), k_eff.tolist(), s_A.tolist()
+        if glicko:
+            rd, last, day = rd.tolist(), last.tolist(), day.tolist()
+            no_test = no_test.tolist()
+
+        def run(j0, j1):
+            seg_elo, seg_delta, seg_rd = [0.0] * (j1 - j0), [0.0] * (j1 - j0), [0.0] * (j1 - j0)
+            if glicko:
+                _glicko_kernel(lists[0][j0:j1], lists[1], lists[2][j0:j1 + 1], lists[3],
+                               lists[4], day[j0:j1], no_test, rating, peak, rd, last,
+                               *glicko_args, seg_elo, seg_delta, seg_rd, [], [])
+                hist_rd[j0:j1] = seg_rd
+            else:
+                _elo_kernel(lists[0][j0:j1], lists[1], lists[2][j0:j1 + 1], lists[3], lists[4],
+                            rating, peak, seg_elo, seg_delta)
+            hist_elo[j0:j1], hist_delta[j0:j1] = seg_elo, seg_delta
+
+    if snapshots is None:
+        run(0, n_batches)
+    else:
+        # windows of whole batches; keep who changed in each and their values
+        cuts = _snapshot_cuts(m["datetime_A"].array[first], snapshots)
+        take = ((lambda values, who: values[who]) if isinstance(rating, np.ndarray) else
+                (lambda values, who: np.array([values[i] for i in who.tolist()], dtype=np.float64)))
+        offsets, changed, elo_at, peak_at = [0], [], [], []
+        j0 = 0
+        for j1 in cuts:
+            run(j0, j1)
+            who = np.unique(np.concatenate([idx_A[j0:j1], idx_B[starts[j0]:starts[j1]]]))
+            changed.append(who)
+            elo_at.append(take(rating, who))
+            peak_at.append(take(peak, who))
+            offsets.append(offsets[-1] + len(who))
+            j0 = j1
+        run(j0, n_batches)
+        snaps = RatingSnapshots(snapshots, base, np.asarray(offsets, dtype=np.int64),
+                                np.concatenate([np.empty(0, np.int32), *changed]).astype(np.int32),
+                                players,
+                                np.concatenate([np.empty(0), *elo_at]),
+                                np.concatenate([np.empty(0), *peak_at]))
+
+    columns = {"elo": np.asarray(rating, dtype=np.float64),
+               "peak": np.asarray(peak, dtype=np.float64)}
+    if glicko:
+        columns.update(rd=np.asarray(rd, dtype=np.float64),
+                       last_day=np.asarray(last, dtype=np.float64))
+    final_df = (
+        pd.DataFrame(columns, index=pd.Index(players))
+        .sort_values("elo", ascending=False)
+    )
+    out = (final_df,)
+    if return_history:
+        hist_df = pd.DataFrame({
+            "score_id":        m["id_A"].to_numpy()[first].tolist(),
+            "player":          players[idx_A],
+            "elo_after_score": np.asarray(hist_elo, dtype=np.float64),
+            "delta_elo":       np.asarray(hist_delta, dtype=np.float64),
+            "datetime":        m["datetime_A"].array[first],
+        }).set_index("score_id")
+        if glicko:
+            hist_df["rd_after_score"] = np.asarray(hist_rd, dtype=np.float64)
+        out += (hist_df,)
+    if snapshots is not None:
+        out += (snaps,)
+    return out if len(out) > 1 else final_df
+
+# ──────────────────────────────
+# Rating snapshots
+# ──────────────────────────────
+
+def _utc_ns(values) -> np.ndarray:
+    """Datetimes → int64 ns since the epoch, tz-aware ones in UTC."""
+    idx = pd.DatetimeIndex(values)
+    if idx.tz is not None:
+        idx = idx.tz_convert(None)
+    return idx.as_unit("ns").asi8
+
+
+def _snapshot_cuts(batch_time: np.ndarray, dates: Sequence) -> np.ndarray:
+    """Number of batches strictly before each of the sorted *dates*."""
+    t, d = _utc_ns(batch_time), _utc_ns(dates)
+    if np.any(np.diff(d) < 0):
+        raise ValueError("Snapshot dates must be sorted")
+    if np.any(np.diff(t) < 0):
+        raise ValueError("Matches are not in chronological order")
+    return np.searchsorted(t, d, side="left")
+
+
+class RatingSnapshots:
+    """Ratings of one simulation as of several dates, stored as sparse changes.
+
+    Window *i* lists the players whose rating or peak changed between
+    ``dates[i-1]`` and ``dates[i]`` with their values as of ``dates[i]``,
+    so memory grows with the active players per window rather than with
+    players × dates.  :meth:`table` replays the windows onto *base* (the
+    ``initial`` ratings the simulation started from).
+    """
+
+    def __init__(self, dates: Sequence, base: pd.DataFrame, offsets: np.ndarray,
+                 changed: np.ndarray, players: np.ndarray,
+                 elo: np.ndarray, peak: np.ndarray):
+        self.dates   = pd.DatetimeIndex(dates)
+        self.base    = base[["elo", "peak"]]
+        self.offsets = offsets          # window i = rows offsets[i]:offsets[i + 1]
+        self.changed = changed          # player codes into *players*
+        self.players = players
+        self.elo     = elo
+        self.peak    = peak
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def index_of(self, when) -> int:
+        """Position of the last snapshot date on or before *when*."""
+        when = pd.Timestamp(when)
+        if self.dates.tz is not None and when.tzinfo is None:
+            when = when.tz_localize(self.dates.tz)
+        elif self.dates.tz is None and when.tzinfo is not None:
+            when = when.tz_convert(None)
+        i = int(self.dates.searchsorted(when, side="right")) - 1
+        if i < 0:
+            raise KeyError(f"No snapshot on or before {when}")
+        return i
+
+    def table(self, when) -> pd.DataFrame:
+        """``run_elo``-style ratings (index player; elo, peak) as of a snapshot.
+
+        *when* is a snapshot position (int) or a date, meaning the last
+        snapshot on or before it.  Players not rated by then are absent.
+        """
+        i = int(when) if isinstance(when, (int, np.integer)) else self.index_of(when)
+        end = self.offsets[i + 1]
+        last = np.full(len(self.players), -1, dtype=np.int64)      # newest row per player
+        np.maximum.at(last, self.changed[:end], np.arange(end))
+        codes = np.flatnonzero(last >= 0)
+        pos = last[codes]
+        changed = pd.DataFrame({"elo": self.elo[pos], "peak": self.peak[pos]},
+                               index=pd.Index(self.players[codes]))
+        base = self.base[~self.base.index.isin(changed.index)]
+        return pd.concat([base, changed]).sort_values("elo", ascending=False)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long format: one row per (snapshot, changed player); snapshot -1 is *base*."""
+        snapshot = np.repeat(np.arange(len(self.dates), dtype=np.int32), np.diff(self.offsets))
+        return pd.DataFrame({
+            "snapshot": np.r_[np.full(len(self.base), -1, dtype=np.int32), snapshot],
+            "player":   np.r_[self.base.index.to_numpy(object), self.players[self.changed]],
+            "elo":      np.r_[self.base["elo"].to_numpy(np.float64), self.elo],
+            "peak":     np.r_[self.base["peak"].to_numpy(np.float64), self.peak],
+        })
+
+    def extend(self, later: "RatingSnapshots") -> "RatingSnapshots":
+        """These snapshots followed by those of a simulation resumed after them.
+
+        *later* starts from the ratings at some point after ``dates[-1]``
+        (its *base*).  Players whose base differs from this last snapshot
+        are added to *later*'s first window, so :meth:`table` gives for
+        every date what one simulation over all of them would have.
+        """
+        if len(self.dates) and len(later.dates) and later.dates[0] <= self.dates[-1]:
+            raise ValueError("Later snapshots must start after the last one here")
+        if not len(later.dates):
+            return self
+        last = self.table(len(self.dates) - 1) if len(self.dates) else self.base
+        prev = last.reindex(later.base.index)
+        moved = later.base[(prev["elo"] != later.base["elo"]) | (prev["peak"] != later.base["peak"])]
+        in_first = later.players[later.changed[:later.offsets[1]]]
+        moved = moved[~moved.index.isin(in_first)]
+
+        n = len(self.dates)
+        tail = later.to_frame()
+        tail = tail[tail["snapshot"] >= 0].assign(snapshot=tail["snapshot"] + n)
+        frame = pd.concat([self.to_frame(),
+                           pd.DataFrame({"snapshot": np.full(len(moved), n, dtype=np.int32),
+                                         "player": moved.index.to_numpy(object),
+                                         "elo": moved["elo"].to_numpy(np.float64),
+                                         "peak": moved["peak"].to_numpy(np.float64)}),
+                           tail], ignore_index=True)
+        return RatingSnapshots.from_frame(frame, self.dates.append(later.dates))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, dates: Sequence) -> "RatingSnapshots":
+        """Inverse of :meth:`to_frame`."""
+        frame = frame.sort_values("snapshot", kind="stable")
+        is_base = frame["snapshot"].to_numpy() < 0
+        base = frame[is_base].set_index("player")[["elo", "peak"]]
+        rest = frame[~is_base]
+        codes, players = pd.factorize(rest["player"].to_numpy(object))
+        offsets = np.searchsorted(rest["snapshot"].to_numpy(),
+                                  np.arange(len(dates) + 1), side="left").astype(np.int64)
+        return cls(dates, base, offsets, codes.astype(np.int32), np.asarray(players, dtype=object),
+                   rest["elo"].to_numpy(np.float64), rest["peak"].to_numpy(np.float64))
+
+# ──────────────────────────────
+# Random hold-out (calibration) simulation
+# ──────────────────────────────
+
+def holdout_test_mask(matches: pd.DataFrame, frac: float,
+                      rng: np.random.Generator,
+                      min_cal_matches: int) -> np.ndarray:
+    """Boolean test flag per row of *matches* (in their original order).
+
+    A row is eligible iff both players already have *min_cal_matches*
+    prior matches in the simulation order of :func:`run_elo`; eligible rows
+    go to test with probability *frac*.  Prior counts come from one array
+    pass and the draws from one ``rng.random(n_eligible)`` call, which
+    consumes *rng* exactly like one ``rng.random()`` per eligible row.
+    """
+    order, _ = _elo_batches(matches)
+    n = len(order)
+    player_A, player_B, names = _match_players(matches)
+    seq = np.empty(2 * n, dtype=object if names is None else np.int32)
+    seq[0::2] = player_A[order]
+    seq[1::2] = player_B[order]
+    codes, _ = pd.factorize(seq)
+    prior = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    eligible = (prior[0::2] >= min_cal_matches) & (prior[1::2] >= min_cal_matches)
+
+    test = np.zeros(n, dtype=bool)
+    test[eligible] = rng.random(int(eligible.sum())) < frac
+    mask = np.empty(n, dtype=bool)
+    mask[order] = test
+    return mask
+
+
+def _elo_grid_kernel(idx_A, idx_B, starts, test, k, exp_tau, tau_slot,
+                     s_A, scale_slot, rating, probs, outcomes):
+    """Batch-update simulation for P parameter sets at once.
+
+    *rating* has shape (P, n_players).  Train rows update ratings as in
+    :func:`_elo_kernel`; test rows only record expected score and outcome
+    into the preallocated (P, n_test) *probs* / *outcomes*.
+    """
+    t = 0
+    for j in range(len(starts) - 1):
+        pA = idx_A[j]
+        RA0 = rating[:, pA].copy()
+        delta_A_sum = np.zeros_like(RA0)
+
+        for i in range(starts[j], starts[j + 1]):
+            pB = idx_B[i]
+            RB = rating[:, pB]
+            sA = s_A[scale_slot, i]
+            expA = 1.0 / (1.0 + 10.0 ** ((RB - RA0) / 400.0))
+
+            if test[i]:
+                probs[:, t] = expA
+                outcomes[:, t] = sA
+                t += 1
+            else:
+                sB = 1.0 - sA
+                k_eff = k * exp_tau[tau_slot, i]
+                delta_A_sum += k_eff * (sA - expA)
+                rating[:, pB] = RB + k_eff * (sB - (1.0 - expA))
+
+        rating[:, pA] = RA0 + delta_A_sum
+
+
+_elo_grid_kernel_jit = njit(cache=True, nogil=True)(_elo_grid_kernel) if njit else None
+
+
+@instrumented("run_elo_grid", rows_in=lambda matches, *a, **_: len(matches))
+def run_elo_grid(
+    matches: pd.DataFrame,
+    test_mask: np.ndarray,
+    *,
+    k:            np.ndarray,
+    tau_gap_days: np.ndarray,
+    alpha:        np.ndarray,
+    beta:         np.ndarray,
+    rating_init:  float = RATING_INIT,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Random hold-out simulation for many parameter sets in one pass.
+
+    Parameter set *p* is ``(k[p], tau_gap_days[p], alpha[p], beta[p])``
+    (alpha/beta as in :func:`outcome_dynamic`).  All sets share the
+    batch semantics of :func:`run_elo` and the test rows of *test_mask*
+    (see :func:`holdout_test_mask`); ratings are a (P, n_players) matrix.
+
+    Returns (probs, outcomes), each (P, n_test): A's expected score and
+    actual score for every test row in simulation order.  The compiled
+    kernel matches a scalar per-row loop exactly; the NumPy fallback may
+    differ in the last ulp because vectorized ``**`` is not libm ``pow``.
+    """
+    k = np.atleast_1d(np.asarray(k, dtype=np.float64))
+    tau_gap_days = np.broadcast_to(np.asarray(tau_gap_days, dtype=np.float64), k.shape)
+    scales = np.column_stack([
+        np.broadcast_to(np.asarray(alpha, dtype=np.float64), k.shape),
+        np.broadcast_to(np.asarray(beta, dtype=np.float64), k.shape),
+    ])
+
+    order, starts = _elo_batches(matches)
+    m = matches.take(order)
+    test = np.asarray(test_mask, dtype=bool)[order]
+    player_A, player_B, names = _match_players(m)
+    idx_A, idx_B, players = _encode_players(player_A, player_B, starts, names=names)
+
+    # per-row exp terms computed once per distinct tau / (alpha, beta)
+    gap = m["gap_days"].to_numpy() if "gap_days" in m else match_gap_days(m)
+    taus, tau_slot = np.unique(tau_gap_days, return_inverse=True)
+    exp_tau = np.stack([np.exp(-gap / tau) for tau in taus])
+    uniq_scales, scale_slot = np.unique(scales, axis=0, return_inverse=True)
+    s_A = np.stack([match_outcome(m, a, b) for a, b in uniq_scales])
+
+    n_params, n_test = len(k), int(test.sum())
+    rating = np.full((n_params, len(players)), rating_init, dtype=np.float64, order="F")
+    probs = np.empty((n_params, n_test), dtype=np.float64)
+    outcomes = np.empty((n_params, n_test), dtype=np.float64)
+
+    kernel = _elo_grid_kernel_jit if _elo_grid_kernel_jit is not None else _elo_grid_kernel
+    kernel(idx_A, idx_B, starts, test, k, exp_tau, tau_slot.ravel(),
+           s_A, scale_slot.ravel(), rating, probs, outcomes)
+    return probs, outcomes
+
+
+@instrumented("run_glicko_holdout", rows_in=lambda matches, *a, **_: len(matches))
+def run_glicko_holdout(
+    matches: pd.DataFrame,
+    test_mask: np.ndarray,
+    *,
+    tau_gap_days: float = TAU_GAP_DAYS,
+    alpha:        float = RATE_DIFF_SCALE,
+    beta:         float = WIFE_DIFF_SCALE,
+    rating_init:  float = RATING_INIT,
+    rd_init:      float = GLICKO_RD_INIT,
+    rd_min:       float = GLICKO_RD_MIN,
+    rd_per_day:   float = GLICKO_RD_PER_DAY,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """:func:`run_elo_grid` for ``run_elo(system="glicko")``, one parameter set.
+
+    Test rows of *test_mask* are predicted with both players' rating
+    deviations (expected score shrunk towards 0.5 by g(√(RD_A² + RD_B²)))
+    and update nothing.  Returns 1-D (probs, outcomes) for the test rows in
+    simulation order.
+    """
+    order, starts = _elo_batches(matches)
+    m = matches.take(order)
+    test = np.asarray(test_mask, dtype=bool)[order]
+    player_A, player_B, names = _match_players(m)
+    idx_A, idx_B, players = _encode_players(player_A, player_B, starts, names=names)
+    gap = m["gap_days"].to_numpy() if "gap_days" in m else match_gap_days(m)
+    weight = k_eff_from_gap(gap, 1.0, tau_gap_days)
+    s_A = match_outcome(m, alpha, beta)
+    day = _utc_ns(m["datetime_A"].array[starts[:-1]]) / _NS_PER_DAY
+
+    n_players, n_batches, n_test = len(players), len(starts) - 1, int(test.sum())
+    rating = np.full(n_players, rating_init, dtype=np.float64)
+    state = (rating, rating.copy(), np.full(n_players, rd_init), np.full(n_players, day[0]),
+             rd_min, rd_init, rd_per_day ** 2)
+    hist = [np.empty(n_batches) for _ in range(3)]
+    probs, outcomes = np.empty(n_test), np.empty(n_test)
+    if _glicko_kernel_jit is not None:
+        _glicko_kernel_jit(idx_A, idx_B, starts, weight, s_A, day, test, *state, *hist,
+                           probs, outcomes)
+    else:
+        _glicko_kernel(*(a.tolist() for a in (idx_A, idx_B, starts, weight, s_A, day, test)),
+                       *(a.tolist() for a in state[:4]), *state[4:], *hist, probs, outcomes)
+    return probs, outcomes
+
+
+@instrumented("evaluate_holdout", rows_in=lambda matches, *a, **_: len(matches),
+              rows_out=_rows)
+def evaluate_random_holdout(
+    matches: pd.DataFrame,
+    frac: float,
+    rng: np.random.Generator,
+    *,
+    min_cal_matches: int,
+    k:            float = K_FACTOR,
+    tau_gap_days: float = TAU_GAP_DAYS,
+    alpha:        float = RATE_DIFF_SCALE,
+    beta:         float = WIFE_DIFF_SCALE,
+    rating_init:  float = RATING_INIT,
+    system:       str   = "elo",
+    rd_init:      float = GLICKO_RD_INIT,
+    rd_min:       float = GLICKO_RD_MIN,
+    rd_per_day:   float = GLICKO_RD_PER_DAY,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Experience-gated random hold-out for one parameter set.
+
+    Draws the test rows with :func:`holdout_test_mask` and simulates them
+    with :func:`run_elo_grid` (``system="glicko"``: with
+    :func:`run_glicko_holdout`); returns 1-D (probs, outcomes) for the
+    test rows in simulation order.
+    """
+    if system not in RATING_SYSTEMS:
+        raise ValueError(f"Unknown rating system {system!r}; expected one of {RATING_SYSTEMS}")
+    test_mask = holdout_test_mask(matches, frac, rng, min_cal_matches)
+    if system == "glicko":
+        return run_glicko_holdout(matches, test_mask, tau_gap_days=tau_gap_days,
+                                  alpha=alpha, beta=beta, rating_init=rating_init,
+                                  rd_init=rd_init, rd_min=rd_min, rd_per_day=rd_per_day)
+    probs, outcomes = run_elo_grid(matches, test_mask, k=k, tau_gap_days=tau_gap_days,
+                                   alpha=alpha, beta=beta, rating_init=rating_init)
+    return probs[0], outcomes[0]
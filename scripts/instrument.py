@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+instrument.py — opt-in per-stage timing, row counts and peak memory.
+
+Pipeline functions are wrapped with :func:`instrumented` (or a ``with
+stage(...)`` block).  While disabled — the default — a wrapped call costs
+one flag check.  Enable it for any script through the environment:
+
+    ELO_METRICS=output/metrics.json uv run scripts/run_elo.py
+    ELO_METRICS=m.json ELO_CPROFILE=output/prof ELO_CPROFILE_STAGES=run_elo \\
+        uv run scripts/run_elo_eval_params.py
+
+or in code with :func:`enable` / :func:`write_json`.  Every stage records
+wall time, rows in / out, peak RSS while it ran (Linux: ``VmHWM``, reset
+per stage through ``/proc/self/clear_refs``; elsewhere the process peak so
+far) and tags such as the skill-set.  With ``ELO_CPROFILE`` the outermost
+matching stage runs under cProfile and its stats are dumped to that
+directory (``ELO_CPROFILE_STAGES``: comma-separated stage names, default
+all).
+
+Compare two metrics files stage by stage:
+
+    uv run scripts/instrument.py output/metrics_old.json output/metrics.json
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+import atexit
+import cProfile
+import datetime as dt
+import functools
+import json
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import time
+
+__all__ = ["enable", "disable", "enabled", "stage", "instrumented",
+           "records", "write_json", "submit", "result"]
+
+ENV_METRICS        = "ELO_METRICS"
+ENV_CPROFILE       = "ELO_CPROFILE"
+ENV_CPROFILE_STAGE = "ELO_CPROFILE_STAGES"
+
+
+class _State:
+    enabled = False
+    records: list[dict] = []
+    stack: list[dict] = []
+    profile_dir: Path | None = None
+    profile_stages: set[str] | None = None
+    profiling = False
+    started = ""
+
+
+# ──────────────────────────────
+# Peak memory
+# ──────────────────────────────
+_STATUS, _CLEAR_REFS = Path("/proc/self/status"), Path("/proc/self/clear_refs")
+_HWM = re.compile(r"VmHWM:\s+(\d+) kB")
+
+
+def _peak_mb() -> float:
+    """High-water RSS since the last :func:`_reset_peak` (or process start)."""
+    try:
+        return int(_HWM.search(_STATUS.read_text()).group(1)) / 1024
+    except (OSError, AttributeError):
+        scale = 1024 if sys.platform != "darwin" else 1024 ** 2    # KiB vs bytes
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _reset_peak() -> None:
+    try:
+        _CLEAR_REFS.write_text("5")
+    except OSError:
+        pass
+
+# ──────────────────────────────
+# Recording
+# ──────────────────────────────
+def enable(profile_dir: Path | str | None = None,
+           profile_stages: set[str] | None = None) -> None:
+    """Start recording (and cProfile-dumping *profile_stages* into *profile_dir*)."""
+    _State.enabled = True
+    _State.records, _State.stack = [], []
+    _State.profile_dir = Path(profile_dir) if profile_dir else None
+    _State.profile_stages = set(profile_stages) if profile_stages else None
+    _State.started = dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
+    if _State.profile_dir:
+        _State.profile_dir.mkdir(parents=True, exist_ok=True)
+
+
+def disable() -> None:
+    _State.enabled = False
+
+
+def enabled() -> bool:
+    return _State.enabled
+
+
+def records() -> list[dict]:
+    """Finished stages in completion order (inner stages before their parent)."""
+    return list(_State.records)
+
+
+class _NullStage:
+    """What :func:`stage` yields while disabled: accepts and drops any field."""
+
+    def __setitem__(self, key, value) -> None:
+        pass
+
+    def update(self, *args, **kwargs) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+@contextmanager
+def _null_stage():
+    yield _NULL_STAGE
+
+
+@contextmanager
+def _recorded_stage(name: str, tags: dict):
+    parent = _State.stack[-1] if _State.stack else None
+    if parent is not None:                       # keep the parent's peak so far
+        parent["_peak"] = max(parent["_peak"], _peak_mb())
+    _reset_peak()
+    rec = {"name": name, **tags, "depth": len(_State.stack),
+           "parent": parent["name"] if parent else None, "_peak": 0.0}
+    _State.stack.append(rec)
+
+    profiler = None
+    if (_State.profile_dir and not _State.profiling
+            and (_State.profile_stages is None or name in _State.profile_stages)):
+        profiler, _State.profiling = cProfile.Profile(), True
+        profiler.enable()
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec["seconds"] = time.perf_counter() - t0
+        if profiler is not None:
+            profiler.disable()
+            _State.profiling = False
+            label = "_".join(str(v) for v in (name, tags.get("skillset")) if v)
+            path = _State.profile_dir / f"{len(_State.records):03d}_{label}.prof"
+            profiler.dump_stats(path)
+            rec["cprofile"] = str(path)
+        _State.stack.pop()
+        rec["peak_rss_mb"] = round(max(rec.pop("_peak"), _peak_mb()), 1)
+        if parent is not None:
+            parent["_peak"] = max(parent["_peak"], rec["peak_rss_mb"])
+        _State.records.append(rec)
+
+
+def stage(name: str, **tags):
+    """Context manager timing a block; yields a dict for ``rows_in`` / ``rows_out`` / tags."""
+    if not _State.enabled:
+        return _null_stage()
+    return _recorded_stage(name, tags)
+
+
+def instrumented(name: str, *, rows_in=None, rows_out=None, tags=None):
+    """Decorator recording every call as stage *name*.
+
+    *rows_in* / *tags* are called with the function's arguments, *rows_out*
+    with its result; all only while enabled.
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _State.enabled:
+                return fn(*args, **kwargs)
+            with _recorded_stage(name, tags(*args, **kwargs) if tags else {}) as rec:
+                if rows_in is not None:
+                    rec["rows_in"] = int(rows_in(*args, **kwargs))
+                out = fn(*args, **kwargs)
+                if rows_out is not None:
+                    rec["rows_out"] = int(rows_out(out))
+            return out
+        return inner
+    return wrap
+
+
+def call_recorded(fn, *args, **kwargs):
+    """Run *fn* with recording on and return ``(result, records)`` — for
+    process-pool workers, whose records the parent adds with :func:`merge`."""
+    enable(_State.profile_dir, _State.profile_stages)
+    try:
+        return fn(*args, **kwargs), records()
+    finally:
+        disable()
+
+
+def merge(worker_records: list[dict]) -> None:
+    """Add a worker's records (see :func:`call_recorded`) under the current stage."""
+    parent = _State.stack[-1] if _State.stack else None
+    for rec in worker_records:
+        rec = {**rec, "worker": True, "depth": rec["depth"] + len(_State.stack)}
+        if rec["parent"] is None and parent is not None:
+            rec["parent"] = parent["name"]
+        _State.records.append(rec)
+
+
+def submit(pool, fn, *args, **kwargs):
+    """``pool.submit`` that also brings back the worker's records while
+    enabled; collect with :func:`result`."""
+    if not _State.enabled:
+        return pool.submit(fn, *args, **kwargs)
+    return pool.submit(call_recorded, fn, *args, **kwargs)
+
+
+def result(future):
+    """``future.result()`` of a :func:`submit`, merging the worker's records."""
+    if not _State.enabled:
+        return future.result()
+    out, worker_records = future.result()
+    merge(worker_records)
+    return out
+
+# ──────────────────────────────
+# Export
+# ──────────────────────────────
+def summary(recs: list[dict]) -> dict:
+    """Totals per stage name: calls, seconds, rows and the largest peak."""
+    out: dict[str, dict] = {}
+    for rec in recs:
+        tot = out.setdefault(rec["name"], {"calls": 0, "seconds": 0.0, "rows_in": 0,
+                                           "rows_out": 0, "peak_rss_mb": 0.0})
+        tot["calls"] += 1
+        tot["seconds"] += rec["seconds"]
+        tot["rows_in"] += rec.get("rows_in", 0)
+        tot["rows_out"] += rec.get("rows_out", 0)
+        tot["peak_rss_mb"] = max(tot["peak_rss_mb"], rec["peak_rss_mb"])
+    return out
+
+
+def write_json(path: Path | str) -> None:
+    recs = records()
+    payload = {
+        "run": {"started": _State.started, "argv": sys.argv, "python": sys.version.split()[0]},
+        "stages": [{k: (round(v, 6) if isinstance(v, float) else v) for k, v in r.items()}
+                   for r in recs],
+        "summary": summary(recs),
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(payload, indent=2))
+
+
+def compare(old_path: Path, new_path: Path) -> None:
+    """Print per-stage seconds and peak memory of two metrics files side by side."""
+    old = json.loads(Path(old_path).read_text())["summary"]
+    new = json.loads(Path(new_path).read_text())["summary"]
+    print(f"{'stage':<28}{'old s':>10}{'new s':>10}{'change':>9}{'old MiB':>10}{'new MiB':>10}")
+    for name in [*old, *(n for n in new if n not in old)]:
+        a, b = old.get(name), new.get(name)
+        sa = f"{a['seconds']:>10.2f}" if a else f"{'—':>10}"
+        sb = f"{b['seconds']:>10.2f}" if b else f"{'—':>10}"
+        change = (f"{(b['seconds'] / a['seconds'] - 1) * 100:>+8.0f}%"
+                  if a and b and a["seconds"] > 0 else f"{'':>9}")
+        ma = f"{a['peak_rss_mb']:>10.0f}" if a else f"{'—':>10}"
+        mb = f"{b['peak_rss_mb']:>10.0f}" if b else f"{'—':>10}"
+        print(f"{name:<28}{sa}{sb}{change}{ma}{mb}")
+
+
+def _enable_from_env() -> None:
+    metrics, profile_dir = os.environ.get(ENV_METRICS), os.environ.get(ENV_CPROFILE)
+    if not (metrics or profile_dir):
+        return
+    stages = os.environ.get(ENV_CPROFILE_STAGE)
+    enable(profile_dir, set(stages.split(",")) if stages else None)
+    if metrics and multiprocessing.parent_process() is None:
+        pid = os.getpid()
+        # only the main process writes, not pool workers (forked or spawned)
+        atexit.register(lambda: os.getpid() == pid and write_json(metrics))
+
+
+_enable_from_env()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        raise SystemExit(__doc__.split("\n\n")[-1])
+    compare(Path(sys.argv[1]), Path(sys.argv[2]))
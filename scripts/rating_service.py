@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+rating_service.py — answer rating queries from the latest run_elo checkpoint.
+
+Loads output/checkpoint/ (ratings, peaks, personal bests and per-score
+history of every skill-set) into in-memory indexes and serves
+
+    GET  /players/{name}                            ratings, peaks and ranks
+    GET  /players/{name}/history?skillset=S&limit=N newest rated scores
+    GET  /top?skillset=S&n=N                        leaderboard (S may be "overall")
+    GET  /winprob?a=A&b=B[&skillset=S]              head-to-head win probability
+    GET  /charts/{key}?skillset=S&n=N&player=P&rate=R&wife=W
+                                                    chart leaderboard of personal bests,
+                                                    P's rank, how many bests beat (R, W)
+    POST /scores   {"scores": [{...}, ...]}         add scores, update ratings
+
+over HTTP, or with ``--stdio`` as JSON lines: one request object per line
+on stdin (``{"op": "player", "name": ...}``, ops ``player``, ``history``,
+``top``, ``winprob``, ``chart``, ``scores`` with the parameters above as
+keys), one reply per line on stdout.
+
+New scores are handled like ``run_elo.py --incremental``: their matches are
+built against the saved personal bests and the simulation continues from
+the current ratings, so the service agrees with a later incremental run.
+Each score needs ``MATCH_COLUMNS`` (``skillset`` may be replaced by the five
+MSD values); scores that are not newer than every score already rated are
+rejected.  Updates are kept in memory only, the checkpoint is not changed.
+
+    uv run scripts/run_elo.py
+    uv run scripts/rating_service.py --port 8080 &
+    curl 'http://127.0.0.1:8080/top?skillset=stream&n=5'
+"""
+from __future__ import annotations
+from collections import defaultdict
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+import argparse
+import json
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+from elo_core import (
+    SKILLSETS, MATCH_COLUMNS, RATING_INIT, WIFE_RANGE, GLICKO_RD_INIT, GLICKO_RD_PER_DAY,
+    ChartBests, expected_score, glicko_expected_score,
+)
+from run_elo import CHECKPOINT_DIR, load_checkpoint, overall_rating, run_options, run_skillset
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+PORT          = 8080
+TOP_N         = 10
+HISTORY_LIMIT = 20
+
+# ──────────────────────────────
+# Indexes
+# ──────────────────────────────
+class Leaderboard:
+    """One rating table sorted by rating: dict lookup, rank = position, top-N = slice."""
+
+    def __init__(self, players: np.ndarray, rating: np.ndarray, peak: np.ndarray):
+        order = np.argsort(-rating, kind="stable")
+        self.players  = players[order]
+        self.rating   = rating[order]
+        self.peak     = peak[order]
+        self.position = {p: i for i, p in enumerate(self.players.tolist())}
+
+    @classmethod
+    def from_ratings(cls, ratings: pd.DataFrame) -> "Leaderboard":
+        """From a ``run_elo`` result (index = player, columns elo / peak)."""
+        return cls(ratings.index.to_numpy(object),
+                   ratings["elo"].to_numpy(np.float64), ratings["peak"].to_numpy(np.float64))
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def get(self, player: str) -> dict | None:
+        i = self.position.get(player)
+        if i is None:
+            return None
+        return {"rating": float(self.rating[i]), "peak": float(self.peak[i]), "rank": i + 1}
+
+    def top(self, n: int) -> list[dict]:
+        return [{"rank": i + 1, "player": p, "rating": r, "peak": pk}
+                for i, (p, r, pk) in enumerate(zip(self.players[:n].tolist(),
+                                                   self.rating[:n].tolist(),
+                                                   self.peak[:n].tolist()))]
+
+
+def overall_leaderboard(ratings: dict[str, pd.DataFrame]) -> Leaderboard:
+    """`run_elo.overall_rating` of the current and peak tables (0 if unrated)."""
+    tables = {col: pd.concat({sk: r[col] for sk, r in ratings.items()}, axis=1)
+                     .reindex(columns=SKILLSETS).fillna(0.0)
+              for col in ("elo", "peak")}
+    players = tables["elo"].index
+    return Leaderboard(players.to_numpy(object),
+                       overall_rating(tables["elo"]).to_numpy(),
+                       overall_rating(tables["peak"].reindex(players)).to_numpy())
+
+
+class PlayerHistory:
+    """Per-score history of one skill-set, contiguous per player in time order."""
+
+    def __init__(self, history: pd.DataFrame):
+        frame = (history.reset_index()
+                 .sort_values(["player", "datetime"], kind="stable")
+                 .reset_index(drop=True))
+        player = frame["player"].to_numpy(object)
+        bounds = np.flatnonzero(player[1:] != player[:-1]) + 1
+        lo = np.r_[0, bounds] if len(player) else np.empty(0, dtype=np.int64)
+        hi = np.r_[bounds, len(player)] if len(player) else lo
+        self.span = dict(zip(player[lo].tolist(), zip(lo.tolist(), hi.tolist())))
+        self.score_id = frame["score_id"].to_numpy()
+        self.elo      = frame["elo_after_score"].to_numpy(np.float64)
+        self.delta    = frame["delta_elo"].to_numpy(np.float64)
+        self.when     = pd.DatetimeIndex(frame["datetime"])
+        self.recent: dict[str, list[dict]] = defaultdict(list)    # added by the service
+
+    def append(self, history: pd.DataFrame) -> None:
+        for row in history.reset_index().itertuples(index=False):
+            self.recent[row.player].append(
+                {"score_id": int(row.score_id), "datetime": pd.Timestamp(row.datetime).isoformat(),
+                 "elo_after_score": float(row.elo_after_score), "delta_elo": float(row.delta_elo)})
+
+    def count(self, player: str) -> int:
+        lo, hi = self.span.get(player, (0, 0))
+        return hi - lo + len(self.recent.get(player, ()))
+
+    def last(self, player: str, limit: int) -> list[dict]:
+        recent = self.recent.get(player, [])[-limit:] if limit > 0 else []
+        lo, hi = self.span.get(player, (0, 0))
+        lo = max(lo, hi - (limit - len(recent)))
+        rows = [{"score_id": int(self.score_id[i]), "datetime": self.when[i].isoformat(),
+                 "elo_after_score": float(self.elo[i]), "delta_elo": float(self.delta[i])}
+                for i in range(lo, hi)]
+        return rows + recent
+
+class ChartIndex:
+    """Personal bests of one skill-set: an `elo_core.ChartBests` per chart.
+
+    Charts are indexed from the checkpoint's ``pb_state`` on first use;
+    :meth:`update` applies new scores to copies of the indexed charts and
+    swaps them in together with the newer ``pb_state`` the others are read
+    from.  Both happen under *lock* (shared by all skill-sets, as is
+    *player_ids*), so a `ChartBests` handed out is never changed and every
+    chart reflects the same scores.
+    """
+
+    def __init__(self, pb_state: pd.DataFrame, player_ids: dict[str, int],
+                 lock: threading.Lock):
+        self.player_ids = player_ids
+        self.lock = lock
+        self.charts: dict[str, ChartBests] = {}
+        self.state = pb_state
+        self.rows = None                             # chart → rows, rebuilt on a miss
+
+    def encode(self, players) -> np.ndarray:
+        """Player ids of *players*, interning new names (call with the lock held)."""
+        ids = self.player_ids
+        return np.fromiter((ids.setdefault(p, len(ids)) for p in players), np.int64)
+
+    def get(self, chart_key: str) -> ChartBests | None:
+        with self.lock:
+            chart = self.charts.get(chart_key)
+            if chart is None:
+                if self.rows is None:
+                    self.rows = self.state.groupby("chart_key", sort=False, observed=True).indices
+                rows = self.rows.get(chart_key)
+                if rows is None:
+                    return None
+                part = self.state.iloc[rows]         # pb_state keeps insertion order
+                chart = ChartBests.from_bests(self.encode(part["player"]), part["id"],
+                                              part["rate"], part["wife"])
+                self.charts[chart_key] = chart
+            return chart
+
+    def update(self, scores: pd.DataFrame, pb_state: pd.DataFrame) -> None:
+        """Apply chronological *scores*, after which *pb_state* is current."""
+        with self.lock:
+            hit = scores[scores["chart_key"].isin(self.charts.keys())]
+            fresh: dict[str, ChartBests] = {}
+            for key, player, sid, rate, wife in zip(hit["chart_key"], self.encode(hit["player"]),
+                                                    hit["id"], hit["rate"], hit["wife"]):
+                if key not in fresh:
+                    fresh[key] = self.charts[key].copy()
+                fresh[key].update(player, sid, rate, wife)
+            self.charts.update(fresh)
+            self.state = pb_state
+            self.rows = None
+
+# ──────────────────────────────
+# Service
+# ──────────────────────────────
+class RatingService:
+    """In-memory ratings of a checkpoint; :meth:`handle` answers one request.
+
+    Readers never wait for a simulation: an update builds new leaderboards
+    and swaps them in.  Updates are serialised by a lock; chart indexes and
+    player ids have their own, held only to index a chart or swap in
+    updated ones.
+    """
+
+    def __init__(self, checkpoint: dict):
+        self.state = {key: dict(checkpoint[key]) for key in ("ratings", "pb_state")}
+        self.latest = checkpoint["latest"]
+        self.run_opts = run_options(checkpoint["params"])         # as the checkpoint was built
+        self.rd_init = checkpoint["params"].get("rd_init", GLICKO_RD_INIT)
+        self.rd_per_day = checkpoint["params"].get("rd_per_day", GLICKO_RD_PER_DAY)
+        self.seen_ids = np.sort(checkpoint["score_ids"])
+        self.new_ids: set[int] = set()
+        self.lock = threading.Lock()
+
+        self.boards = {sk: Leaderboard.from_ratings(r) for sk, r in self.state["ratings"].items()}
+        self.boards["overall"] = overall_leaderboard(self.state["ratings"])
+        empty = pd.DataFrame({"score_id": [], "player": [], "elo_after_score": [],
+                              "delta_elo": [], "datetime": pd.to_datetime([])})
+        self.history = {sk: PlayerHistory(checkpoint["history"].get(sk, empty))
+                        for sk in SKILLSETS}
+        self.player_ids: dict[str, int] = {}
+        self.player_names: list[str] = []
+        self.index_lock = threading.Lock()
+        no_bests = pd.DataFrame({"chart_key": [], "player": [], "id": [], "rate": [], "wife": []})
+        self.charts = {sk: ChartIndex(self.state["pb_state"].get(sk, no_bests), self.player_ids,
+                                      self.index_lock)
+                       for sk in SKILLSETS}
+
+    @classmethod
+    def from_checkpoint(cls, path: Path) -> "RatingService":
+        checkpoint = load_checkpoint(path)
+        if checkpoint is None:
+            raise FileNotFoundError(f"No checkpoint in {path}; run run_elo.py first")
+        return cls(checkpoint)
+
+    # ── queries ──
+    def player(self, name: str) -> dict:
+        overall = self.boards["overall"].get(name)
+        if overall is None:
+            raise LookupError(f"Unknown player {name!r}")
+        skillsets = {}
+        for sk in SKILLSETS:
+            entry = self.boards[sk].get(name) if sk in self.boards else None
+            if entry is not None:
+                skillsets[sk] = {**entry, "scores": self.history[sk].count(name)}
+        return {"player": name, "overall": overall, "skillsets": skillsets}
+
+    def player_history(self, name: str, skillset: str, limit: int = HISTORY_LIMIT) -> dict:
+        if skillset not in SKILLSETS:
+            raise ValueError(f"Unknown skill-set {skillset!r}; expected one of {SKILLSETS}")
+        if name not in self.boards["overall"].position:
+            raise LookupError(f"Unknown player {name!r}")
+        return {"player": name, "skillset": skillset,
+                "history": self.history[skillset].last(name, limit)}
+
+    def top(self, skillset: str = "overall", n: int = TOP_N) -> dict:
+        board = self.boards.get(skillset)
+        if board is None:
+            raise ValueError(f"Unknown skill-set {skillset!r}; expected 'overall' or one of {SKILLSETS}")
+        return {"skillset": skillset, "players": len(board), "top": board.top(n)}
+
+    def win_probability(self, a: str, b: str, skillset: str | None = None) -> dict:
+        """P(*a* beats *b*) per skill-set; unrated players count as ``RATING_INIT``.
+
+        With Glicko ratings the prediction also weighs both players' RD
+        (grown to the newest rated score, ``rd_init`` when unrated).
+        """
+        for name in (a, b):
+            if name not in self.boards["overall"].position:
+                raise LookupError(f"Unknown player {name!r}")
+        if skillset is not None and skillset not in SKILLSETS:
+            raise ValueError(f"Unknown skill-set {skillset!r}; expected one of {SKILLSETS}")
+        out = {}
+        for sk in [skillset] if skillset else SKILLSETS:
+            ra, rb = self.rating(sk, a), self.rating(sk, b)
+            if self.run_opts["system"] == "glicko":
+                rda, rdb = self.rd(sk, a), self.rd(sk, b)
+                out[sk] = {"rating_a": ra, "rating_b": rb, "rd_a": rda, "rd_b": rdb,
+                           "p_a_wins": float(glicko_expected_score(ra, rb, rda, rdb))}
+            else:
+                out[sk] = {"rating_a": ra, "rating_b": rb, "p_a_wins": expected_score(ra, rb)}
+        return {"a": a, "b": b, "skillsets": out}
+
+    def chart(self, chart_key: str, skillset: str | None = None, n: int = TOP_N,
+              player: str | None = None, rate: float | None = None,
+              wife: float | None = None) -> dict:
+        """Leaderboard of personal bests on a chart (of the skill-set with most of them)."""
+        if skillset is not None and skillset not in SKILLSETS:
+            raise ValueError(f"Unknown skill-set {skillset!r}; expected one of {SKILLSETS}")
+        found = {sk: c for sk in ([skillset] if skillset else SKILLSETS)
+                 if (c := self.charts[sk].get(chart_key)) is not None}
+        if not found:
+            raise LookupError(f"No personal bests on chart {chart_key!r}")
+        sk = max(found, key=lambda k: len(found[k]))
+        bests = found[sk]
+        top = bests.bests()
+        names = self.names(top["player"][:n])
+        out = {"chart_key": chart_key, "skillset": sk, "players": len(bests),
+               "top": [{"rank": i + 1, "player": p, "score_id": int(sid), "rate": r, "wife": w}
+                       for i, (p, sid, r, w) in enumerate(zip(
+                           names, top["score"][:n].tolist(), top["rate"][:n].tolist(),
+                           top["wife"][:n].tolist()))]}
+        if player is not None:
+            with self.index_lock:
+                pid = self.player_ids.get(player)
+            best = bests.best(pid) if pid is not None else None
+            if best is None:
+                raise LookupError(f"{player!r} has no personal best on chart {chart_key!r}")
+            out["player"] = {"player": player, "score_id": best[0], "rate": best[1],
+                             "wife": best[2], "rank": bests.rank(pid)}
+        if rate is not None:        # without a wife: players with a higher rate
+            beaten = bests.better_than(rate, np.inf if wife is None else wife)
+            out["better_than"] = {"rate": rate, "wife": wife, "players": beaten}
+        return out
+
+    def names(self, ids: np.ndarray) -> list[str]:
+        with self.index_lock:
+            if len(self.player_names) < len(self.player_ids):
+                names = [None] * len(self.player_ids)
+                for name, i in self.player_ids.items():
+                    names[i] = name
+                self.player_names = names
+            names = self.player_names
+        return [names[i] for i in ids.tolist()]
+
+    def rating(self, skillset: str, name: str) -> float:
+        board = self.boards.get(skillset)
+        i = board.position.get(name) if board is not None else None
+        return RATING_INIT if i is None else float(board.rating[i])
+
+    def rd(self, skillset: str, name: str) -> float:
+        """Glicko RD of *name*, grown with the days idle up to the newest score."""
+        ratings = self.state["ratings"].get(skillset)
+        if ratings is None or name not in ratings.index:
+            return self.rd_init
+        rd, last = ratings.loc[name, ["rd", "last_day"]]
+        idle = self.latest.value / pd.Timedelta(days=1).value - last
+        return float(min(np.sqrt(rd * rd + self.rd_per_day ** 2 * idle), self.rd_init))
+
+    # ── updates ──
+    def is_known(self, ids: np.ndarray) -> np.ndarray:
+        """Which *ids* were already rated (binary search + the ids added since)."""
+        pos = np.searchsorted(self.seen_ids, ids)
+        inside = pos < len(self.seen_ids)
+        known = np.zeros(len(ids), dtype=bool)
+        known[inside] = self.seen_ids[pos[inside]] == ids[inside]
+        return known | np.fromiter((i in self.new_ids for i in ids.tolist()), bool, len(ids))
+
+    def add_scores(self, records: list[dict]) -> dict:
+        """Rate new scores; see the module docstring for what a score needs."""
+        frame = scores_frame(records, self.latest)
+        with self.lock:
+            dup = self.is_known(frame["id"].to_numpy(np.int64)) | frame["id"].duplicated().to_numpy()
+            frame = frame[~dup]
+            if (frame["datetime"] <= self.latest).any():
+                raise ValueError(f"Scores must be newer than {self.latest.isoformat()}")
+            in_range = (frame["wife"] > WIFE_RANGE[0]) & (frame["wife"] < WIFE_RANGE[1])
+            rated = frame[in_range]
+
+            updated = sorted(rated["skillset"].unique())
+            with redirect_stdout(sys.stderr):        # run_skillset reports match counts
+                for sk in updated:
+                    final_df, hist_df, pb_state = run_skillset(
+                        rated, sk, self.state, **self.run_opts)
+                    self.state["ratings"][sk] = final_df
+                    self.state["pb_state"][sk] = pb_state
+                    self.charts[sk].update(rated[rated["skillset"] == sk], pb_state)
+                    self.boards[sk] = Leaderboard.from_ratings(final_df)
+                    self.history[sk].append(hist_df)
+            if updated:
+                self.boards["overall"] = overall_leaderboard(self.state["ratings"])
+            if len(frame):
+                self.latest = frame["datetime"].max()
+                self.new_ids.update(frame["id"].tolist())
+
+        players = sorted(set(rated["player"]))
+        return {"accepted": len(rated), "duplicates": int(dup.sum()),
+                "outside_wife_range": int((~in_range).sum()),
+                "latest": self.latest.isoformat(),
+                "players": {p: self.player(p) for p in players}}
+
+    # ── dispatch ──
+    def handle(self, request: dict) -> tuple[int, dict]:
+        """Answer one request dict (``op`` + parameters) → (HTTP status, body)."""
+        try:
+            op = request.get("op")
+            if op == "player":
+                return 200, self.player(str(request["name"]))
+            if op == "history":
+                return 200, self.player_history(str(request["name"]), str(request["skillset"]),
+                                                int(request.get("limit", HISTORY_LIMIT)))
+            if op == "top":
+                return 200, self.top(str(request.get("skillset", "overall")),
+                                     int(request.get("n", TOP_N)))
+            if op == "winprob":
+                return 200, self.win_probability(str(request["a"]), str(request["b"]),
+                                                 request.get("skillset"))
+            if op == "chart":
+                rate, wife = request.get("rate"), request.get("wife")
+                return 200, self.chart(str(request["chart_key"]), request.get("skillset"),
+                                       int(request.get("n", TOP_N)), request.get("player"),
+                                       None if rate is None else float(rate),
+                                       None if wife is None else float(wife))
+            if op == "scores":
+                return 200, self.add_scores(request["scores"])
+            return 404, {"error": f"Unknown op {op!r}"}
+        except KeyError as exc:
+            return 400, {"error": f"Missing parameter {exc}"}
+        except LookupError as exc:
+            return 404, {"error": str(exc)}
+        except (TypeError, ValueError) as exc:
+            return 400, {"error": str(exc)}
+
+
+def scores_frame(records: list[dict], latest: pd.Timestamp) -> pd.DataFrame:
+    """Validate posted scores into a ``MATCH_COLUMNS`` frame."""
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError("'scores' must be a list of objects")
+    frame = pd.DataFrame.from_records(records)
+    if len(frame) and "skillset" not in frame and set(SKILLSETS) <= set(frame):
+        frame["skillset"] = frame[SKILLSETS].astype(np.float64).idxmax(axis=1)
+    missing = [c for c in MATCH_COLUMNS if c not in frame]
+    if len(frame) and missing:
+        raise ValueError(f"Scores need {MATCH_COLUMNS}; missing {missing}")
+    if not len(frame):
+        return pd.DataFrame({c: [] for c in MATCH_COLUMNS})
+    frame = frame[MATCH_COLUMNS].astype({"id": np.int64, "player": object, "chart_key": object,
+                                         "wife": np.float64, "rate": np.float64})
+    bad = sorted(set(frame["skillset"]) - set(SKILLSETS))
+    if bad:
+        raise ValueError(f"Unknown skill-set(s) {bad}; expected one of {SKILLSETS}")
+
+    when = pd.to_datetime(frame["datetime"], utc=latest.tzinfo is not None)
+    if latest.tzinfo is None and when.dt.tz is not None:
+        when = when.dt.tz_convert(None)
+    return frame.assign(datetime=when).sort_values("datetime", kind="stable")
+
+# ──────────────────────────────
+# Front ends
+# ──────────────────────────────
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive, clients reuse their connection
+    disable_nagle_algorithm = True      # headers and body are separate writes
+    service: RatingService
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+
+        if len(parts) == 2 and parts[0] == "players":
+            request = {"op": "player", "name": parts[1]}
+        elif len(parts) == 3 and parts[0] == "players" and parts[2] == "history":
+            request = {"op": "history", "name": parts[1], **query}
+        elif len(parts) == 2 and parts[0] == "charts":
+            request = {"op": "chart", "chart_key": parts[1], **query}
+        elif parts in (["top"], ["winprob"]):
+            request = {"op": parts[0], **query}
+        else:
+            return self.reply(404, {"error": "Not found"})
+        self.reply(*self.service.handle(request))
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if urlparse(self.path).path.rstrip("/") != "/scores":
+            return self.reply(404, {"error": "Not found"})
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError as exc:
+            return self.reply(400, {"error": f"Invalid JSON: {exc}"})
+        self.reply(*self.service.handle({"op": "scores", "scores": payload.get("scores")}))
+
+    def reply(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def make_server(service: RatingService, host: str = "127.0.0.1",
+                port: int = PORT) -> ThreadingHTTPServer:
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_stdio(service: RatingService, lines=sys.stdin, out=sys.stdout) -> None:
+    """JSON-lines loop: one request object per input line, one reply per output line."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            status, body = service.handle(json.loads(line))
+        except json.JSONDecodeError as exc:
+            status, body = 400, {"error": f"Invalid JSON: {exc}"}
+        out.write(json.dumps({"status": status, **body}) + "\n")
+        out.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--checkpoint", type=Path, default=CHECKPOINT_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--stdio", action="store_true",
+                        help="serve JSON lines on stdin/stdout instead of HTTP")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    service = RatingService.from_checkpoint(args.checkpoint)
+    print(f"Loaded {len(service.boards['overall']):,} players from {args.checkpoint} "
+          f"in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    if args.stdio:
+        serve_stdio(service)
+        return
+    server = make_server(service, args.host, args.port)
+    print(f"Rating service on http://{args.host}:{args.port}", file=sys.stderr)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
-"""Compute chart's Elo difficulty."""
+"""Compute chart's Elo difficulty.
+
+`chart_difficulty` turns the scores and the per-score Elo history into the
+chart table; import it to build the table from an in-memory history
+(e.g. `run_elo.compute_tables_and_history`) instead of the saved file.
+"""
 
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-from elo_core import load_scores, RATE_DIFF_SCALE, WIFE_DIFF_SCALE
+import pyarrow.parquet as pq
+from elo_core import SKILLSETS, load_scores, RATE_DIFF_SCALE, WIFE_DIFF_SCALE
+from instrument import instrumented, stage
 
 
 # ──────────────────────────────
@@ -14,130 +20,129 @@ from elo_core import load_scores, RATE_DIFF_SCALE, WIFE_DIFF_SCALE
 # ──────────────────────────────
 CHART_PLAYCOUNT_THRESHOLD = 15
 PLAYER_PLAYCOUNT_THRESHOLD = 15
+PLAYER_RD_THRESHOLD = 50.0      # glicko history: max rating deviation after the score
 
 SCORES_DIR = Path("output/scores")
-HISTORY_CSV = Path("output/elo_by_score.csv")
+HISTORY = Path("output/elo_by_score.parquet")
+HISTORY_COLUMNS = ["score_id", "player", "skillset", "datetime", "elo_after_score"]
+RD_COLUMN = "rd_after_score"     # only in the history of a glicko run
 OUT_CSV = Path("output/chart_elo_diff.csv")
 OUT_MD = Path("output/chart_elo_diff.md")
 
 # ──────────────────────────────
-# LOAD & PREPARE SCORE DATA
+# HELPERS
 # ──────────────────────────────
-scores_full = load_scores(SCORES_DIR)
-scores_full = scores_full[~scores_full["id"].duplicated()]
-
-scores_full["pseudo_rate"] = (
-    scores_full["rate"]
-    * np.exp((WIFE_DIFF_SCALE / RATE_DIFF_SCALE) * (scores_full["wife"] - 93)) #Based on the outcome formula
-)
-
-scores = scores_full[["id", "chart_id", "rate", "wife", "pseudo_rate"]].copy()
-
-history = pd.read_csv(HISTORY_CSV)         
-
-history['score_number'] = (history
-    .sort_values(['player', 'skillset', 'datetime'])  
-    .groupby(['player', 'skillset'])
-    .cumcount()                                       
-    .add(1)                                            
-    .sort_index()                                      
-)
-scores_with_rating = scores.merge(
-    history,
-    left_on="id",
-    right_on="score_id",
-    how="inner"       
-)
-
-valid_scores = scores_with_rating[scores_with_rating["score_number"]>PLAYER_PLAYCOUNT_THRESHOLD].id.to_numpy()
-scores = scores[scores.id.isin(valid_scores)]
-scores_full = scores_full[scores_full.id.isin(valid_scores)]
-
-
-# keep only charts with enough plays
-play_counts = scores.groupby("chart_id")["id"].count()
-valid_chart_ids = play_counts[play_counts > CHART_PLAYCOUNT_THRESHOLD].index
-
-
-scores = scores[scores["chart_id"].isin(valid_chart_ids)]
-scores_full = scores_full[scores_full["chart_id"].isin(valid_chart_ids)]
-
-scores_with_rating = scores_with_rating[scores_with_rating.id.isin(scores.id)]
-
-# adjust Elo by pseudo-rate
-rating_df = (
-    scores_with_rating[["id","chart_id", "rate", "pseudo_rate", "elo_after_score"]]
-    .sort_values("chart_id")
-    .copy()
-)
-rating_df["adj_elo_after_score"] = (
-    rating_df["elo_after_score"] / rating_df["pseudo_rate"]
-)
+def dominant_skillset(scores: pd.DataFrame) -> pd.Series:
+    """Most frequent score skill-set per chart_id (ties → alphabetically first)."""
+    counts = (scores.groupby(["chart_id", "skillset"], observed=True).size()
+              .rename("n").reset_index()
+              .sort_values(["chart_id", "n", "skillset"], ascending=[True, False, True]))
+    return counts.drop_duplicates("chart_id").set_index("chart_id")["skillset"]
+
+
+def chart_names(scores: pd.DataFrame) -> pd.Series:
+    """Readable chart name per chart_id: (song, first pack) of its first score."""
+    song = scores.groupby("chart_id")["song"].first()
+    return pd.Series([(s["name"], s["packs"][0]["name"]) for s in song],
+                     index=song.index, name="chart_name")
+
+
+def fit_expected(x: pd.Series, y: pd.Series, groups: pd.Series) -> pd.Series:
+    """Per-group least-squares line of *y* on *x*, evaluated at *x*."""
+    dx = x - x.groupby(groups).transform("mean")
+    y_mean = y.groupby(groups).transform("mean")
+    dy = y - y_mean
+    slope = ((dx * dy).groupby(groups).transform("sum")
+             / (dx * dx).groupby(groups).transform("sum")).fillna(0.0)
+    return y_mean + slope * dx
+
+
+def score_numbers(history: pd.DataFrame) -> pd.Series:
+    """1-based index of each history row within its (player, skillset), by time."""
+    return (history
+            .sort_values(["player", "skillset", "datetime"])
+            .groupby(["player", "skillset"], observed=True)
+            .cumcount()
+            .add(1)
+            .sort_index())
 
 # ──────────────────────────────
-# CHART AGGREGATES
+# CHART TABLE
 # ──────────────────────────────
-# dominant skillset per chart
-chart_skillset = scores_full.groupby("chart_id")["skillset"].apply(
-    lambda s: np.unique(s, return_counts=True)[0][
-        np.unique(s, return_counts=True)[1].argmax()
-    ]
-)
-
-skill_cols = ["stream", "jumpstream", "handstream", "chordjacks", "technical"]
-
-scores_full["msd"] = scores_full[skill_cols].max(axis=1)
-
-score_msd = scores_full.set_index("id").loc[rating_df["id"]]["msd"]
-
-score_skillset = scores_full.set_index("id")["skillset"][rating_df["id"]]
-
-rating_df = rating_df.set_index("id")
-
-rating_df["expected_msd"] = np.nan
-
-for i in skill_cols:
-    reg = LinearRegression().fit(rating_df["elo_after_score"][score_skillset == i].to_numpy()[:,None], 
-                                score_msd[score_skillset == i].to_numpy()[:,None])
-    score_msd_pred = reg.predict(rating_df["elo_after_score"][score_skillset == i].to_numpy()[:,None])
-    
-    rating_df.loc[score_skillset == i,"expected_msd"] = score_msd_pred
-
-overrated = np.log(score_msd/rating_df["expected_msd"])
-
-
-rating_df["overrated"] = overrated
-
-
-# readable chart name: (song, first-pack)
-chart_name = {
-    cid: (
-        scores_full.loc[scores_full["chart_id"] == cid, "song"].iloc[0]["name"],
-        scores_full.loc[scores_full["chart_id"] == cid, "song"].iloc[0]["packs"][0]["name"],
+@instrumented("chart_difficulty", rows_in=lambda scores_full, history, *a, **_: len(history),
+              rows_out=len)
+def chart_difficulty(scores_full: pd.DataFrame, history: pd.DataFrame,
+                     chart_playcount_threshold: int = CHART_PLAYCOUNT_THRESHOLD,
+                     player_playcount_threshold: int = PLAYER_PLAYCOUNT_THRESHOLD,
+                     player_rd_threshold: float = PLAYER_RD_THRESHOLD,
+                     ) -> pd.DataFrame:
+    """Elo difficulty, MSD-overrated metric, skill-set and name per chart.
+
+    *scores_full* is `load_scores` output (needs id, chart_id, rate, wife,
+    skillset, the MSD columns and song); *history* has the columns of
+    run_elo's per-score history (score_id, player, skillset, datetime,
+    elo_after_score).  Only scores after a player's first
+    *player_playcount_threshold* in a skill-set count, and only charts with
+    more than *chart_playcount_threshold* of them.  A glicko history
+    (``run_elo.py --system glicko``, with ``RD_COLUMN``) instead keeps the
+    scores whose rating deviation after the score is at most
+    *player_rd_threshold*.  Only ``HISTORY_COLUMNS`` and ``RD_COLUMN`` of
+    *history* are used.
+    """
+    scores = scores_full[~scores_full["id"].duplicated()]
+    scores = scores.assign(
+        # based on the outcome formula
+        pseudo_rate=scores["rate"] * np.exp((WIFE_DIFF_SCALE / RATE_DIFF_SCALE) * (scores["wife"] - 93)),
+        msd=scores[SKILLSETS].max(axis=1),
     )
-    for cid in valid_chart_ids.astype(int)
-}
-
-# Elo diff
-chart_diff = (
-    rating_df.groupby("chart_id")["adj_elo_after_score"]
-    .mean()
-    .round(2)
-    .rename("elo_diff")
-    .to_frame()
-)
-
-# MSD-overrated metric
-chart_diff["msd_overrated"] = np.exp(rating_df.groupby("chart_id")["overrated"].mean()).round(4)
 
-chart_diff["skillset"] = chart_diff.index.map(chart_skillset)
-chart_diff["chart_name"] = chart_diff.index.map(chart_name)
+    if RD_COLUMN in history:
+        history = history[history[RD_COLUMN] <= player_rd_threshold]
+    else:
+        history = history.assign(score_number=score_numbers(history))
+        history = history[history["score_number"] > player_playcount_threshold]
+
+    # one join: scores × their post-score rating
+    rated = scores[["id", "chart_id", "pseudo_rate", "msd", "skillset"]].merge(
+        history[["score_id", "elo_after_score"]], left_on="id", right_on="score_id",
+        how="inner")
+    scores = scores[scores["id"].isin(rated["id"])]
+
+    # keep only charts with enough plays
+    play_counts = rated.groupby("chart_id")["id"].transform("count")
+    rated = rated[play_counts > chart_playcount_threshold].sort_values("chart_id")
+    scores = scores[scores["chart_id"].isin(rated["chart_id"])]
+
+    # adjust Elo by pseudo-rate; MSD against the Elo-expected MSD per skill-set
+    rated["adj_elo_after_score"] = rated["elo_after_score"] / rated["pseudo_rate"]
+    expected_msd = fit_expected(rated["elo_after_score"], rated["msd"], rated["skillset"])
+    rated["overrated"] = np.log(rated["msd"] / expected_msd)
+
+    by_chart = rated.groupby("chart_id")
+    chart_diff = pd.DataFrame({
+        "elo_diff":      by_chart["adj_elo_after_score"].mean().round(2),
+        "msd_overrated": np.exp(by_chart["overrated"].mean()).round(4),
+    })
+    chart_diff = chart_diff.join(dominant_skillset(scores)).join(chart_names(scores))
+    return chart_diff.sort_values(["skillset", "msd_overrated"], ascending=False)
 
 # ──────────────────────────────
 # OUTPUT
 # ──────────────────────────────
-chart_diff = chart_diff.sort_values(["skillset","msd_overrated"],ascending=False)
-chart_diff.to_csv(OUT_CSV)
-chart_diff.to_markdown(OUT_MD)
+def main() -> None:
+    scores_full = load_scores(SCORES_DIR)
+    with stage("read_history") as st:
+        names = pq.read_schema(HISTORY).names
+        columns = HISTORY_COLUMNS + ([RD_COLUMN] if RD_COLUMN in names else [])
+        history = pd.read_parquet(HISTORY, columns=columns)
+        st["rows_out"] = len(history)
+
+    chart_diff = chart_difficulty(scores_full, history)
+    chart_diff.to_csv(OUT_CSV)
+    chart_diff.to_markdown(OUT_MD)
+
+    print(f"Wrote {OUT_CSV} / {OUT_MD}")
+
 
-print(f"Wrote {OUT_CSV} / {OUT_MD}")
+if __name__ == "__main__":
+    main()
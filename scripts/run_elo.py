@@ -5,15 +5,43 @@ run_elo.py — builds two tables:
 1.  Current Elo per skill-set  →  output/elo_dtw_ord_skillsets.{csv,md}
 2.  Peak   Elo per skill-set  →  output/elo_dtw_ord_peak_skillsets.{csv,md}
 
+Every run also saves a checkpoint (ratings, peaks, per-chart personal
+bests, history and the newest processed score time) under
+output/checkpoint/.  With ``--incremental`` only the scores newer than
+that checkpoint are turned into matches and the simulation continues from
+it; back-dated scores or changed parameters fall back to a full replay.
+
+With ``--snapshots monthly|weekly|DATE,DATE,…`` the same pass also records
+the leaderboard as of each date into output/snapshots.parquet, stored as
+the players that changed per window; :func:`load_snapshots` +
+:func:`snapshot_tables` rebuild the tables for any of those dates.  A
+resumed pass appends the dates after the checkpoint to the saved ones.
+
 """
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import instrument
+from instrument import instrumented
 
 from elo_core import (
     SKILLSETS,
+    RATING_INIT, K_FACTOR, TAU_GAP_DAYS,
+    RATE_DIFF_SCALE, WIFE_DIFF_SCALE, WIFE_RANGE,
+    PB_STATE_COLUMNS, MATCH_COLUMNS, OPPONENT_STRATEGIES, MAX_OPPONENTS,
+    RATING_SYSTEMS, GLICKO_RD_INIT, GLICKO_RD_MIN, GLICKO_RD_PER_DAY,
     load_scores,
     build_matches_for_skillset,
-    run_elo,                
+    stored_matches_for_skillset,
+    run_elo,
+    RatingSnapshots,
 )
 
 # ──────────────────────────────
@@ -24,56 +52,456 @@ OUT_CURR_CSV        = Path("output/elo_dtw_ord_skillsets.csv")
 OUT_CURR_MD         = Path("output/elo_dtw_ord_skillsets.md")
 OUT_PEAK_CSV        = Path("output/elo_dtw_ord_peak_skillsets.csv")
 OUT_PEAK_MD         = Path("output/elo_dtw_ord_peak_skillsets.md")
-OUT_HISTORY         = Path("output/elo_by_score.csv")
+OUT_HISTORY         = Path("output/elo_by_score.parquet")
+OUT_HISTORY_CSV     = Path("output/elo_by_score.csv")     # only with --history-csv
+CHECKPOINT_DIR      = Path("output/checkpoint")
+MATCH_STORE_DIR     = Path("output/matches")
+OUT_SNAPSHOTS       = Path("output/snapshots.parquet")   # only with --snapshots
+
+# overall = mean of a player's best OVERALL_TOP_K skill-set ratings, or a
+# weighted mean with one OVERALL_WEIGHTS entry per rank (best first)
+OVERALL_TOP_K   = 3
+OVERALL_WEIGHTS = None
+
+# opponents of each new personal best (elo_core.OPPONENT_STRATEGIES):
+# "all" other bests on the chart, or MAX_OPPONENTS "nearest" / "stratified"
+MATCH_OPPONENTS = "all"
+
+# rating system (elo_core.RATING_SYSTEMS): plain "elo", or "glicko" with a
+# rating deviation per player (ratings gain rd / last_day, history rd_after_score)
+RATING_SYSTEM = "elo"
+
+# parameters a checkpoint is only valid for
+CHECKPOINT_PARAMS = {
+    "rating_init": RATING_INIT, "k": K_FACTOR, "tau_gap_days": TAU_GAP_DAYS,
+    "rate_diff_scale": RATE_DIFF_SCALE, "wife_diff_scale": WIFE_DIFF_SCALE,
+    "wife_range": list(WIFE_RANGE),
+}
+
+
+def checkpoint_params(opponents: str = MATCH_OPPONENTS,
+                      max_opponents: int = MAX_OPPONENTS,
+                      system: str = RATING_SYSTEM) -> dict:
+    """``CHECKPOINT_PARAMS`` plus the opponent strategy when it is bounded
+    and the rating system (with its parameters) when it is not Elo."""
+    params = dict(CHECKPOINT_PARAMS)
+    if opponents != "all":
+        params.update(opponents=opponents, max_opponents=max_opponents)
+    if system != "elo":
+        params.update(system=system, rd_init=GLICKO_RD_INIT, rd_min=GLICKO_RD_MIN,
+                      rd_per_day=GLICKO_RD_PER_DAY)
+    return params
+
+
+def match_options(params: dict) -> dict:
+    """The ``opponents`` / ``max_opponents`` a checkpoint's *params* were built with."""
+    return {"opponents": params.get("opponents", "all"),
+            "max_opponents": params.get("max_opponents", MAX_OPPONENTS)}
+
+
+def run_options(params: dict) -> dict:
+    """:func:`match_options` plus the rating ``system`` — the :func:`run_skillset`
+    options of a checkpoint's *params*."""
+    return {**match_options(params), "system": params.get("system", "elo")}
 
 # ──────────────────────────────
-def compute_tables_and_history(data: pd.DataFrame):
-    curr_cols, peak_cols, hist_frames = [], [], []
+# Checkpoint
+# ──────────────────────────────
+def save_checkpoint(path: Path, data: pd.DataFrame, results: dict,
+                    params: dict = CHECKPOINT_PARAMS) -> None:
+    """Write the state needed to resume after the scores in *data*.
 
-    for sk in SKILLSETS:
-        matches = build_matches_for_skillset(data, sk)
+    *results* maps skill-set → (final_df, hist_df, pb_state) as returned
+    by :func:`run_skillset`; *params* is what they were computed with
+    (see :func:`checkpoint_params`).
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    ratings = pd.concat(
+        {sk: final_df for sk, (final_df, _, _) in results.items()},
+        names=["skillset", "player"]).reset_index()
+    pb_state = pd.concat(
+        {sk: state for sk, (_, _, state) in results.items()},
+        names=["skillset", None]).reset_index(level=0)
+    history = pd.concat(
+        [hist_df.assign(skillset=sk) for sk, (_, hist_df, _) in results.items()]
+    ).reset_index()
+
+    ratings.to_parquet(path / "ratings.parquet", index=False)
+    pb_state.to_parquet(path / "pb_state.parquet", index=False)
+    history.to_parquet(path / "history.parquet", index=False)
+    data[["id"]].to_parquet(path / "score_ids.parquet", index=False)
+    meta = {"latest": data["datetime"].max().isoformat(), "params": params}
+    (path / "meta.json").write_text(json.dumps(meta, indent=2))
+
+
+def load_checkpoint(path: Path) -> dict | None:
+    """Return the checkpoint saved under *path*, or None if there is none."""
+    if not (path / "meta.json").exists():
+        return None
+    meta = json.loads((path / "meta.json").read_text())
+    ratings  = pd.read_parquet(path / "ratings.parquet")
+    pb_state = pd.read_parquet(path / "pb_state.parquet")
+    history  = pd.read_parquet(path / "history.parquet")
+    return {
+        "latest":    pd.Timestamp(meta["latest"]),
+        "params":    meta["params"],
+        "score_ids": pd.read_parquet(path / "score_ids.parquet")["id"].to_numpy(),
+        # unnamed index, as run_elo returns it: it ends up in the table headers
+        "ratings":   {sk: g.drop(columns="skillset").set_index("player").rename_axis(None)
+                      for sk, g in ratings.groupby("skillset", sort=False)},
+        "pb_state":  {sk: g[PB_STATE_COLUMNS].reset_index(drop=True)
+                      for sk, g in pb_state.groupby("skillset", sort=False)},
+        "history":   {sk: g.drop(columns="skillset").set_index("score_id")
+                      for sk, g in history.groupby("skillset", sort=False)},
+    }
+
+
+def new_scores_since(checkpoint: dict, data: pd.DataFrame,
+                     params: dict = CHECKPOINT_PARAMS) -> pd.DataFrame | None:
+    """Scores of *data* the checkpoint has not seen, or None if it can't resume.
+
+    Resuming is exact only when every unseen score is strictly newer than
+    the checkpoint, every checkpointed score is still present and the
+    checkpoint was computed with *params*.
+    """
+    if checkpoint["params"] != json.loads(json.dumps(params)):
+        print("Checkpoint parameters differ → full replay")
+        return None
+    seen = data["id"].isin(checkpoint["score_ids"])
+    if seen.sum() != len(checkpoint["score_ids"]):
+        print("Checkpointed scores are missing → full replay")
+        return None
+    new = data[~seen]
+    if (new["datetime"] <= checkpoint["latest"]).any():
+        print("Back-dated scores found → full replay")
+        return None
+    return new
+
+# ──────────────────────────────
+@instrumented("run_skillset", rows_in=lambda data, *a, **_: len(data),
+              tags=lambda data, sk, *a, **_: {"skillset": sk})
+def run_skillset(data: pd.DataFrame, sk: str, checkpoint: dict | None = None,
+                 store_dir: Path | None = None, snapshot_dates=None,
+                 opponents: str = MATCH_OPPONENTS, max_opponents: int = MAX_OPPONENTS,
+                 system: str = RATING_SYSTEM):
+    """Build matches and run Elo for *sk*; return (final_df, hist_df, pb_state).
+
+    With *snapshot_dates* the tuple also holds the
+    :class:`elo_core.RatingSnapshots` of the same simulation.  *opponents*
+    / *max_opponents* select the match construction (see
+    :func:`elo_core.build_matches_for_skillset`), *system* the rating
+    system of :func:`elo_core.run_elo`.
+
+    A full replay with *store_dir* reuses the matches stored there by
+    :func:`elo_core.stored_matches_for_skillset` when the scores are unchanged.
+
+    With a *checkpoint*, *data* holds only the new scores: their matches are
+    built against the saved personal bests and the simulation continues
+    from the saved ratings.  *hist_df* then covers the new scores only.
+    """
+    match_opts = {"opponents": opponents, "max_opponents": max_opponents, "compact": True}
+    if checkpoint is None:
+        if store_dir is None:
+            matches, pb_state = build_matches_for_skillset(data, sk, return_state=True,
+                                                           **match_opts)
+        else:
+            matches, pb_state = stored_matches_for_skillset(data, sk, store_dir,
+                                                            return_state=True, **match_opts)
         print(f"Found {len(matches)} matches for skillset '{sk}'")
+        final_df, hist_df, *snaps = run_elo(matches, return_history=True,
+                                            snapshots=snapshot_dates, system=system)
+        return final_df, hist_df, pb_state, *snaps
 
-        final_df, hist_df = run_elo(matches, return_history=True)
-        hist_df["skillset"] = sk        # tag for later merging
-        hist_frames.append(hist_df)
+    # only charts with new scores need their personal bests re-walked
+    old_state = checkpoint["pb_state"].get(sk, pd.DataFrame(columns=PB_STATE_COLUMNS))
+    touched = old_state["chart_key"].isin(data.loc[data["skillset"] == sk, "chart_key"])
+    matches, pb_state = build_matches_for_skillset(
+        data, sk, pb_state=old_state[touched], return_state=True, **match_opts)
+    print(f"Found {len(matches)} new matches for skillset '{sk}'")
 
-        curr_cols.append(final_df["elo"].rename(sk))
-        peak_cols.append(final_df["peak"].rename(sk))
+    final_df, hist_df, *snaps = run_elo(matches, return_history=True,
+                                        initial=checkpoint["ratings"].get(sk),
+                                        snapshots=snapshot_dates, system=system)
+    pb_state = pd.concat([old_state[~touched], pb_state], ignore_index=True)
+    return final_df, hist_df, pb_state, *snaps
 
-    # rating tables (unchanged)
-    curr_df = pd.concat(curr_cols, axis=1).fillna(0)
-    peak_df = pd.concat(peak_cols, axis=1).fillna(0)
-    curr_df["overall"] = curr_df[SKILLSETS].apply(lambda r: r.nlargest(3).mean(), axis=1)
-    peak_df["overall"] = peak_df[SKILLSETS].apply(lambda r: r.nlargest(3).mean(), axis=1)
 
-    # NEW: per-score ratings across all skill-sets
-    history_df = pd.concat(hist_frames).reset_index()  # index == score_id
+def _checkpoint_part(checkpoint: dict | None, sk: str) -> dict | None:
+    """The ratings / personal bests of *sk* — all a worker needs to resume."""
+    if checkpoint is None:
+        return None
+    return {key: {sk: checkpoint[key][sk]} if sk in checkpoint[key] else {}
+            for key in ("ratings", "pb_state")}
+
+
+def default_workers() -> int:
+    return min(os.cpu_count() or 1, len(SKILLSETS))
+
+
+@instrumented("run_all_skillsets", rows_in=lambda data, *a, **_: len(data))
+def run_all_skillsets(data: pd.DataFrame, checkpoint: dict | None = None,
+                      workers: int | None = None,
+                      store_dir: Path | None = None,
+                      snapshot_dates=None,
+                      opponents: str = MATCH_OPPONENTS,
+                      max_opponents: int = MAX_OPPONENTS,
+                      system: str = RATING_SYSTEM):
+    """:func:`run_skillset` for every skill-set; results keyed in SKILLSETS order.
+
+    With ``workers > 1`` the skill-sets run in a process pool.  Each worker
+    only receives its own skill-set's rows (``MATCH_COLUMNS``) and
+    checkpoint part; the biggest slices are submitted first.  A checkpoint's
+    history is prepended here so it never travels to the workers.
+
+    With *snapshot_dates* returns ``(results, snapshots)``, *snapshots*
+    mapping skill-set → :class:`elo_core.RatingSnapshots`.
+    """
+    workers = default_workers() if workers is None else workers
+    slices = {sk: data.loc[data["skillset"] == sk, MATCH_COLUMNS] for sk in SKILLSETS}
+    parts = {sk: _checkpoint_part(checkpoint, sk) for sk in SKILLSETS}
+
+    if workers <= 1:
+        results = {sk: run_skillset(slices[sk], sk, parts[sk], store_dir, snapshot_dates,
+                                    opponents, max_opponents, system)
+                   for sk in SKILLSETS}
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            by_size = sorted(SKILLSETS, key=lambda sk: len(slices[sk]), reverse=True)
+            futures = {sk: instrument.submit(pool, run_skillset, slices[sk], sk, parts[sk],
+                                             store_dir, snapshot_dates,
+                                             opponents, max_opponents, system)
+                       for sk in by_size}
+            results = {sk: instrument.result(futures[sk]) for sk in SKILLSETS}
+
+    snapshots = {sk: r[3] for sk, r in results.items() if len(r) > 3}
+    results = {sk: r[:3] for sk, r in results.items()}
+
+    if checkpoint is not None:
+        for sk, (final_df, hist_df, pb_state) in results.items():
+            old_hist = checkpoint["history"].get(sk)
+            if old_hist is not None and len(old_hist):
+                hist_df = pd.concat([old_hist, hist_df]) if len(hist_df) else old_hist
+            results[sk] = (final_df, hist_df, pb_state)
+    return results if snapshot_dates is None else (results, snapshots)
+
+
+def overall_rating(table: pd.DataFrame, top_k: int = OVERALL_TOP_K,
+                   weights=OVERALL_WEIGHTS) -> pd.Series:
+    """Mean of each row's *top_k* best ``SKILLSETS`` ratings.
+
+    One sort of the (players × skill-sets) matrix instead of a per-row
+    ``nlargest``; *weights* (best rank first, *top_k* of them) turn the
+    mean into a weighted mean.
+    """
+    if not 1 <= top_k <= len(SKILLSETS):
+        raise ValueError(f"top_k must be in 1..{len(SKILLSETS)}, got {top_k}")
+    top = -np.sort(-table[SKILLSETS].to_numpy(np.float64), axis=1)[:, :top_k]
+    if weights is None:
+        values = top.mean(axis=1)
+    else:
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (top_k,):
+            raise ValueError(f"Expected {top_k} weights, got {weights.tolist()}")
+        values = top @ weights / weights.sum()
+    return pd.Series(values, index=table.index, name="overall")
+
+
+def rating_tables(finals: dict, top_k: int = OVERALL_TOP_K, weights=OVERALL_WEIGHTS):
+    """Current / peak tables (overall + one column per skill-set, by overall).
+
+    *finals* maps skill-set → ``run_elo`` ratings (index player; elo, peak).
+    """
+    curr_df = pd.concat([finals[sk]["elo"].rename(sk) for sk in SKILLSETS], axis=1).fillna(0)
+    peak_df = pd.concat([finals[sk]["peak"].rename(sk) for sk in SKILLSETS], axis=1).fillna(0)
+    curr_df["overall"] = overall_rating(curr_df, top_k, weights)
+    peak_df["overall"] = overall_rating(peak_df, top_k, weights)
     return (
         curr_df[["overall"] + SKILLSETS].sort_values("overall", ascending=False),
         peak_df[["overall"] + SKILLSETS].sort_values("overall", ascending=False),
-        history_df,
     )
+
+
+@instrumented("build_tables")
+def build_tables(results: dict, top_k: int = OVERALL_TOP_K, weights=OVERALL_WEIGHTS):
+    """Merge per-skill-set results into the current / peak tables and history.
+
+    ``overall`` is :func:`overall_rating` with *top_k* / *weights*.
+    """
+    hist_frames = []
+    for sk in SKILLSETS:
+        _, hist_df, _ = results[sk]
+        hist_df = hist_df.copy()
+        hist_df["skillset"] = sk        # tag for later merging
+        hist_frames.append(hist_df)
+
+    curr_df, peak_df = rating_tables({sk: results[sk][0] for sk in SKILLSETS}, top_k, weights)
+
+    # NEW: per-score ratings across all skill-sets
+    history_df = pd.concat(hist_frames).reset_index()  # index == score_id
+    return curr_df, peak_df, history_df
+
+# ──────────────────────────────
+# Snapshots
+# ──────────────────────────────
+SNAPSHOT_FREQ = {"monthly": "MS", "weekly": "W-MON"}
+
+
+def snapshot_dates(spec: str, data: pd.DataFrame) -> pd.DatetimeIndex:
+    """Dates for ``--snapshots``: "monthly" / "weekly" over the span of
+    *data*, or comma-separated dates, in the time zone of its datetimes."""
+    tz = data["datetime"].dt.tz
+    if spec in SNAPSHOT_FREQ:
+        first, last = data["datetime"].min(), data["datetime"].max()
+        dates = pd.date_range(first.floor("D"), last, freq=SNAPSHOT_FREQ[spec])
+        return dates[dates > first]
+    dates = pd.DatetimeIndex(sorted(pd.Timestamp(d) for d in spec.split(",")))
+    if tz is not None and dates.tz is None:
+        dates = dates.tz_localize(tz)
+    return dates
+
+
+def save_snapshots(path: Path, snapshots: dict) -> None:
+    """Write skill-set → :class:`RatingSnapshots` as one parquet (dates in its metadata)."""
+    dates = next(iter(snapshots.values())).dates
+    frame = pd.concat({sk: s.to_frame() for sk, s in snapshots.items()},
+                      names=["skillset", None]).reset_index(level=0)
+    frame["skillset"] = pd.Categorical(frame["skillset"], categories=SKILLSETS)
+    frame["player"] = frame["player"].astype("category")
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    meta = json.dumps([d.isoformat() for d in dates]).encode()
+    pq.write_table(table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), b"run_elo.snapshot_dates": meta}), path)
+
+
+def load_snapshots(path: Path) -> dict:
+    """Inverse of :func:`save_snapshots`."""
+    table = pq.read_table(path)
+    dates = pd.DatetimeIndex(json.loads(table.schema.metadata[b"run_elo.snapshot_dates"]))
+    frame = table.to_pandas()
+    frame["player"] = frame["player"].astype(object)
+    return {sk: RatingSnapshots.from_frame(g.drop(columns="skillset"), dates)
+            for sk, g in frame.groupby("skillset", observed=True, sort=False)}
+
+
+def extend_snapshots(saved: dict, snapshots: dict, since: pd.Timestamp) -> dict:
+    """*saved* snapshots (:func:`load_snapshots`) followed by those of a pass
+    resumed from a checkpoint at *since*.
+
+    Snapshots saved past *since* come from some other history; they are
+    replaced by the new ones.
+    """
+    dates = next(iter(saved.values())).dates
+    if len(dates) and dates[-1] > since:
+        print("Saved snapshots go past the checkpoint → replaced")
+        return snapshots
+    empty = pd.DataFrame({"snapshot": [], "player": [], "elo": [], "peak": []})
+    return {sk: saved.get(sk, RatingSnapshots.from_frame(empty, dates)).extend(s)
+            for sk, s in snapshots.items()}
+
+
+def snapshot_tables(snapshots: dict, when, top_k: int = OVERALL_TOP_K,
+                    weights=OVERALL_WEIGHTS):
+    """:func:`rating_tables` as of a snapshot (position or date, see
+    :meth:`RatingSnapshots.table`)."""
+    return rating_tables({sk: snapshots[sk].table(when) for sk in SKILLSETS}, top_k, weights)
+
+
+def save_history(history_df: pd.DataFrame, path: Path) -> None:
+    """Write the per-score history as typed parquet (categorical skill-set)."""
+    history_df.astype({"skillset": pd.CategoricalDtype(SKILLSETS)}).to_parquet(
+        path, index=False)
+
+
+def compute_tables_and_history(data: pd.DataFrame, workers: int | None = None,
+                               store_dir: Path | None = None,
+                               top_k: int = OVERALL_TOP_K, weights=OVERALL_WEIGHTS):
+    return build_tables(run_all_skillsets(data, workers=workers, store_dir=store_dir),
+                        top_k, weights)
 # ──────────────────────────────
 def main() -> None:
-    data = load_scores(SCORES_DIR)
-    curr_df, peak_df, history_df = compute_tables_and_history(data)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--incremental", action="store_true",
+                        help="resume from the checkpoint instead of replaying all scores")
+    parser.add_argument("--checkpoint", type=Path, default=CHECKPOINT_DIR,
+                        help=f"checkpoint directory (default: {CHECKPOINT_DIR})")
+    parser.add_argument("--history-csv", action="store_true",
+                        help=f"also export the per-score history as {OUT_HISTORY_CSV}")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="skill-sets simulated in parallel, 1 = in-process "
+                             "(default: min(cores, 5) = %(default)s)")
+    parser.add_argument("--overall-top-k", type=int, default=OVERALL_TOP_K,
+                        help="skill-sets averaged into overall (default: %(default)s)")
+    parser.add_argument("--overall-weights", type=float, nargs="+", default=OVERALL_WEIGHTS,
+                        help="one weight per rank, best first (default: equal)")
+    parser.add_argument("--opponents", choices=OPPONENT_STRATEGIES, default=MATCH_OPPONENTS,
+                        help="opponents of each new personal best (default: %(default)s)")
+    parser.add_argument("--max-opponents", type=int, default=MAX_OPPONENTS,
+                        help="opponents per new best for 'nearest' / 'stratified' "
+                             "(default: %(default)s)")
+    parser.add_argument("--system", choices=RATING_SYSTEMS, default=RATING_SYSTEM,
+                        help="rating system; 'glicko' also tracks a rating deviation "
+                             "per player (default: %(default)s)")
+    parser.add_argument("--snapshots", metavar="SPEC",
+                        help="also save leaderboards as of each date: 'monthly', 'weekly' "
+                             f"or comma-separated dates → {OUT_SNAPSHOTS}")
+    args = parser.parse_args()
+
+    data = load_scores(SCORES_DIR, MATCH_COLUMNS)
+    params = checkpoint_params(args.opponents, args.max_opponents, args.system)
+
+    checkpoint = load_checkpoint(args.checkpoint) if args.incremental else None
+    scores = data
+    if checkpoint is not None:
+        scores = new_scores_since(checkpoint, data, params)
+        if scores is None:
+            checkpoint, scores = None, data
+        else:
+            print(f"Resuming from checkpoint: {len(scores)} new scores")
+
+    dates = None
+    if args.snapshots:
+        dates = snapshot_dates(args.snapshots, data)
+        if checkpoint is not None:
+            # a resumed pass records the dates after the checkpoint and
+            # appends them to the snapshots saved by earlier runs
+            dates = dates[dates > checkpoint["latest"]]
+            print(f"Snapshots after the checkpoint: {len(dates)} dates")
+
+    results = run_all_skillsets(scores, checkpoint, workers=args.workers,
+                                store_dir=MATCH_STORE_DIR, snapshot_dates=dates,
+                                **run_options(params))
+    if dates is not None:
+        results, snapshots = results
+        if checkpoint is not None and OUT_SNAPSHOTS.exists():
+            snapshots = extend_snapshots(load_snapshots(OUT_SNAPSHOTS), snapshots,
+                                         checkpoint["latest"])
+        save_snapshots(OUT_SNAPSHOTS, snapshots)
+    curr_df, peak_df, history_df = build_tables(results, args.overall_top_k,
+                                                args.overall_weights)
+    with instrument.stage("save_checkpoint"):
+        save_checkpoint(args.checkpoint, data, results, params)
 
-    # ensure target folder exists
-    OUT_CURR_CSV.parent.mkdir(parents=True, exist_ok=True)
+    with instrument.stage("write_outputs", rows_in=len(history_df)):
+        # ensure target folder exists
+        OUT_CURR_CSV.parent.mkdir(parents=True, exist_ok=True)
 
-    # save current ratings
-    curr_df.round(0).astype(int).to_csv(OUT_CURR_CSV)
-    curr_df.round(0).astype(int).to_markdown(OUT_CURR_MD)
+        # save current ratings
+        curr_df.round(0).astype(int).to_csv(OUT_CURR_CSV)
+        curr_df.round(0).astype(int).to_markdown(OUT_CURR_MD)
 
-    # save peak ratings
-    peak_df.round(0).astype(int).to_csv(OUT_PEAK_CSV)
-    peak_df.round(0).astype(int).to_markdown(OUT_PEAK_MD)
+        # save peak ratings
+        peak_df.round(0).astype(int).to_csv(OUT_PEAK_CSV)
+        peak_df.round(0).astype(int).to_markdown(OUT_PEAK_MD)
 
-    history_df.to_csv(OUT_HISTORY)
+        save_history(history_df, OUT_HISTORY)
+        if args.history_csv:
+            history_df.to_csv(OUT_HISTORY_CSV)
 
     print(f"Current ratings  → {OUT_CURR_CSV} / {OUT_CURR_MD}")
     print(f"Peak    ratings  → {OUT_PEAK_CSV} / {OUT_PEAK_MD}")
+    print(f"Score   history  → {OUT_HISTORY}")
+    if dates is not None:
+        print(f"Snapshots ({len(next(iter(snapshots.values())))}) → {OUT_SNAPSHOTS}")
 
 # ──────────────────────────────
 if __name__ == "__main__":
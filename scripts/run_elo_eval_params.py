@@ -5,7 +5,7 @@ that is consistent with the new batch-update Elo logic.
 
 Workflow
 --------
-1. Build matches per skill-set (`elo_core.build_matches_for_skillset`).
+1. Build matches per skill-set (`elo_core.stored_matches_for_skillset`).
 2. Mark rows as *eligible* for test iff BOTH players already have at least
    `MIN_CAL_MATCHES` prior matches in that skill-set.
 3. From eligible rows, draw `FRAC` at random as **test**.
@@ -14,27 +14,34 @@ Workflow
        update each B immediately, apply ΔR_A once after batch.
      – Skip rating updates on test rows; just record p and outcome.
 5. Report Brier, log-loss (decisive only) and accuracy (decisive only).
+
+Steps 2–4 are `elo_core.evaluate_random_holdout`, the same hold-out engine
+`run_elo_tune_params.py` uses.
+
+``--opponents nearest stratified all`` reports the metrics once per match
+construction strategy (see `elo_core.OPPONENT_STRATEGIES`), with the
+number of matches each one builds.  ``--system elo glicko`` does the same
+per rating system (`elo_core.RATING_SYSTEMS`); Glicko predicts with both
+players' rating deviations.
 """
 from pathlib import Path
-from collections import defaultdict
+import argparse
 import numpy as np
 import pandas as pd
 from sklearn.metrics import log_loss, accuracy_score
 
 from elo_core import (
-    SKILLSETS,
+    SKILLSETS, MATCH_COLUMNS, OPPONENT_STRATEGIES, MAX_OPPONENTS, RATING_SYSTEMS,
     load_scores,
-    build_matches_for_skillset,
-    outcome_from_scores,
-    outcome_dynamic,
-    RATING_INIT,
-    TOLERANCE,
+    stored_matches_for_skillset,
+    evaluate_random_holdout,
 )
 
 # ──────────────────────────────
 # USER-ADJUSTABLE CONSTANTS
 # ──────────────────────────────
 SCORES_DIR = Path("output/scores")
+MATCH_STORE_DIR = Path("output/matches")
 
 FRAC              = 0.1     # fraction of eligible rows → test
 RNG_SEED          = 1
@@ -61,70 +68,23 @@ def cross_entropy(y: np.ndarray, p: np.ndarray) -> float:
 
 
 
-def evaluate_random_holdout(matches: pd.DataFrame,
-                            frac: float,
-                            rng:  np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
-    """
-    Chronological Elo simulation with batch update + experience-gated hold-out.
-    """
-    ratings: dict[str, float] = defaultdict(lambda: RATING_INIT)
-    played:  dict[str, int]   = defaultdict(int)           # matches seen so far
-    tau = np.float64(TAU_FOR_EVAL)
-
-    probs, outcomes = [], []
-
-    # rows already chronological → group by id_A
-    for id_A, grp in matches.groupby("id_A", sort=False):
-        row0 = grp.iloc[0]
-        pA   = row0.player_A
-        RA0  = ratings[pA]           # freeze A for this batch
-        delta_A_sum = 0.0            # accumulate ΔR_A
-
-        for row in grp.itertuples(index=False):
-            pB, rA, rB = row.player_B, row.rate_A, row.rate_B
-            wA, wB     = row.wife_A,  row.wife_B
-            tA, tB     = row.datetime_A, row.datetime_B
-
-            # playcount gate + random test draw
-            eligible = (played[pA] >= MIN_CAL_MATCHES and
-                        played[pB] >= MIN_CAL_MATCHES)
-            is_test  = eligible and (rng.random() < frac)
-
-            RB   = ratings[pB]
-            expA = 1.0 / (1.0 + 10.0 ** ((RB - RA0) / 400.0))
-            sA = outcome_dynamic(rA, rB, wA, wB, RATE_DIFF_SCALE_FOR_EVAL, WIFE_DIFF_SCALE_FOR_EVAL)
-            sB   = 1.0 - sA
-
-            if is_test:
-                probs.append(expA)
-                #outcomes.append(1.0 if sA > 0.5 else 0.0)
-                outcomes.append(sA)
-            else:
-                gap = abs((tA - tB).days)
-                k_eff = K_FOR_EVAL if np.isinf(tau) else K_FOR_EVAL * np.exp(-gap / tau)
-                delta_A_sum += k_eff * (sA - expA)
-                ratings[pB] = RB + k_eff * (sB - (1.0 - expA))
-
-            # update counters
-            played[pA] += 1
-            played[pB] += 1
-
-        # apply A's combined update once (train rows only)
-        ratings[pA] = RA0 + delta_A_sum
-
-    return np.asarray(probs), np.asarray(outcomes)
-
-
-def compute_metrics(all_data: pd.DataFrame) -> pd.DataFrame:
+def compute_metrics(all_data: pd.DataFrame, opponents: str = "all",
+                    max_opponents: int = MAX_OPPONENTS, system: str = "elo") -> pd.DataFrame:
     rng = np.random.default_rng(RNG_SEED)
     rows = []
 
     for sk in SKILLSETS:
-        matches = build_matches_for_skillset(all_data, sk)
+        matches = stored_matches_for_skillset(all_data, sk, MATCH_STORE_DIR,
+                                              opponents=opponents,
+                                              max_opponents=max_opponents, compact=True)
         if matches.empty:
             continue
 
-        p, y = evaluate_random_holdout(matches, FRAC, rng)
+        p, y = evaluate_random_holdout(matches, FRAC, rng,
+                                       min_cal_matches=MIN_CAL_MATCHES,
+                                       k=K_FOR_EVAL, tau_gap_days=TAU_FOR_EVAL,
+                                       alpha=RATE_DIFF_SCALE_FOR_EVAL,
+                                       beta=WIFE_DIFF_SCALE_FOR_EVAL, system=system)
         if len(y) == 0:
             continue
 
@@ -138,6 +98,7 @@ def compute_metrics(all_data: pd.DataFrame) -> pd.DataFrame:
 
         rows.append({
             "skillset": sk,
+            "n_matches": len(matches),
             "n_test": len(y),
             "log_loss": ll,
             "brier": brier,
@@ -156,6 +117,7 @@ def compute_metrics(all_data: pd.DataFrame) -> pd.DataFrame:
 
     overall = {
         "skillset": "overall",
+        "n_matches": df["n_matches"].sum(),
         "n_test": weights.sum(),
         "log_loss": wavg(df["log_loss"]),
         "brier":    np.average(df["brier"], weights=weights),
@@ -170,10 +132,28 @@ def compute_metrics(all_data: pd.DataFrame) -> pd.DataFrame:
 # Main
 # ──────────────────────────────
 def main():
-    data = load_scores(SCORES_DIR)
-    metrics = compute_metrics(data)
-    print("Random hold-out fairness metrics (rounded):\n")
-    print(metrics.round(3))
+    parser = argparse.ArgumentParser(description="Random hold-out calibration metrics.")
+    parser.add_argument("--opponents", nargs="+", choices=OPPONENT_STRATEGIES, default=["all"],
+                        help="match construction strategies to evaluate (default: all)")
+    parser.add_argument("--max-opponents", type=int, default=MAX_OPPONENTS)
+    parser.add_argument("--system", nargs="+", choices=RATING_SYSTEMS, default=["elo"],
+                        help="rating systems to evaluate (default: elo)")
+    args = parser.parse_args()
+
+    data = load_scores(SCORES_DIR, MATCH_COLUMNS)
+    overall = {}
+    for opponents in args.opponents:
+        for system in args.system:
+            metrics = compute_metrics(data, opponents, args.max_opponents, system)
+            label = opponents if opponents == "all" else f"{opponents} ({args.max_opponents})"
+            if len(args.system) > 1:
+                label += f", {system}"
+            print(f"Random hold-out fairness metrics, opponents: {label} (rounded):\n")
+            print(metrics.round(3), end="\n\n")
+            overall[label] = metrics.loc["overall"]
+    if len(overall) > 1:
+        print("Overall by strategy:\n")
+        print(pd.DataFrame(overall).T.round(4))
 
 
 if __name__ == "__main__":
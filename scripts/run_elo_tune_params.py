@@ -2,23 +2,41 @@
 """
 elo_tune_params.py — grid-search tuner for K-factor and time-decay τ
 using the order-insensitive batch update and an experience-gated test split.
+
+All grid points are simulated in one chronological pass per skill-set
+(`elo_core.run_elo_grid`), chunks of the grid × skill-sets run in a
+process pool, and every grid point uses the same seeded test split.
+
+``--mode search`` instead minimizes log-loss over the continuous box
+`SEARCH_BOUNDS` with bounded Nelder-Mead, one `score_params` call per
+step.  Every evaluated point is appended to `SEARCH_CACHE`, so an
+interrupted search replays its steps from disk and resumes where it
+stopped.
 """
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import hashlib
 import itertools
-from collections import defaultdict
+import json
+import os
+import time
 import numpy as np
 import pandas as pd
+from scipy.optimize import minimize
 from sklearn.metrics import log_loss
 
+import instrument
 from elo_core import (
-    SKILLSETS, load_scores, build_matches_for_skillset,
-    outcome_from_scores,outcome_dynamic, RATING_INIT, TOLERANCE,
+    SKILLSETS, MATCH_COLUMNS, load_scores, stored_matches_for_skillset,
+    holdout_test_mask, run_elo_grid,
 )
 
 # ──────────────────────────────
 # SETTINGS
 # ──────────────────────────────
 SCORES_DIR = Path("output/scores")
+MATCH_STORE_DIR = Path("output/matches")
 
 K_GRID   = [7,8,9,10]
 TAU_GRID = [365*4]
@@ -30,6 +48,20 @@ FRAC            = 0.05
 RNG_SEED        = 1
 MIN_CAL_MATCHES = 200
 
+WORKERS    = min(os.cpu_count() or 1, len(SKILLSETS))
+GRID_CHUNK = 32      # grid points per simulation pass (bounds probs memory)
+
+# bounded search (--mode search); τ is searched on a log scale
+SEARCH_BOUNDS = {
+    "K":          (2.0, 30.0),
+    "tau":        (30.0, 365.0 * 10),
+    "wife_scale": (0.25, 5.0),
+    "rate_scale": (20.0, 300.0),
+}
+SEARCH_START     = {"K": 8.0, "tau": 365.0 * 4, "wife_scale": 1.5, "rate_scale": 100.0}
+SEARCH_MAX_EVALS = 60
+SEARCH_CACHE     = Path("output/tune_cache.jsonl")
+
 # ──────────────────────────────
 def brier_score(y, p):
     return float(np.mean((p - y) ** 2))
@@ -41,116 +73,185 @@ def cross_entropy(y: np.ndarray, p: np.ndarray) -> float:
 # -------------------------------------------------------------------
 
 
-def evaluate_random_holdout(    matches:  pd.DataFrame,
-    frac:     float,
-    rng:      np.random.Generator,
-    k:        float,
-    tau_days: float,
-    w_scale:  float,
-    r_scale:  float
-) -> tuple[np.ndarray, np.ndarray]:
-    """
-    Chronological simulation with batch update for id_A.
-
-    • All rows having the same id_A are processed as one batch:
-        – Player A's rating is frozen for the batch.
-        – ΔR_A from train rows is accumulated and applied once after batch.
-        – Each opponent B is updated immediately (train rows only).
+def holdout_masks(match_cache: dict) -> dict:
+    """Test mask per skill-set, drawn from one RNG in skill-set order.
 
-    • A row is eligible for the random test split iff BOTH players have at least
-      MIN_CAL_MATCHES prior matches in this skill-set.  Eligible rows are
-      sent to test with probability frac; train rows update ratings.
+    Eligibility does not depend on the parameters, so this is the split
+    every grid point sees.
     """
-    ratings = defaultdict(lambda: RATING_INIT)
-    played  = defaultdict(int)  # prior match counts
-    tau = np.float64(tau_days)
-
-    probs, outcomes = [], []
-
-    # rows already chronological → group by id_A in appearance order
-    for id_A, grp in matches.groupby("id_A", sort=False):
-        pA      = grp.iloc[0].player_A
-        RA0     = ratings[pA]  # freeze A for this batch
-        delta_A = 0.0 # accumulated update for A
-
-        
-        for row in grp.itertuples(index=False):
-            pB, rA, rB = row.player_B, row.rate_A, row.rate_B
-            wA, wB     = row.wife_A,   row.wife_B
-            tA, tB     = row.datetime_A, row.datetime_B
-
-            # eligibility & random test flag
-            eligible = (played[pA] >= MIN_CAL_MATCHES and
-                        played[pB] >= MIN_CAL_MATCHES)
-            is_test  = eligible and (rng.random() < frac)
-
-            RB   = ratings[pB]
-            expA = 1 / (1 + 10 ** ((RB - RA0) / 400))
-            #sA   = outcome_from_scores(rA, rB, wA, wB, TOLERANCE)
-            sA   = outcome_dynamic(rA, rB, wA, wB, r_scale, w_scale)
-            sB   = 1 - sA
-
-            if is_test:
-                probs.append(expA)
-                outcomes.append(sA)
-                #outcomes.append(1.0 if sA > 0.5 else 0.0)
-            else:
-                gap   = abs((tA - tB).days)
-                k_eff = k if np.isinf(tau) else k * np.exp(-gap / tau)
-                delta_A        += k_eff * (sA - expA)
-                ratings[pB]     = RB + k_eff * (sB - (1 - expA))
-            
-            # count this match for future eligibility
-            played[pA] += 1
-            played[pB] += 1
-
-        ratings[pA] = RA0 + delta_A
-
-    return np.asarray(probs), np.asarray(outcomes)
-
-
-def score_params(match_cache, k, tau,w_scale, r_scale):
     rng = np.random.default_rng(RNG_SEED)
-    tot_ll = tot_brier = tot_n = 0
-
-    for sk, matches in match_cache.items():
-        if matches.empty:
-            continue
-        p, y = evaluate_random_holdout(matches, FRAC, rng, k, tau, w_scale, r_scale)
-        if y.size == 0:
-            continue
+    return {sk: holdout_test_mask(m, FRAC, rng, MIN_CAL_MATCHES)
+            for sk, m in match_cache.items() if not m.empty}
+
+
+def holdout_metrics(y: np.ndarray, p: np.ndarray):
+    """(log_loss, brier, n) for one skill-set, or None without test rows."""
+    if y.size == 0:
+        return None
+    draws  = (y == 0.5)
+    brier  = brier_score(y, p)
+    ll     = log_loss(np.round(y[~draws]), p[~draws]) if (~draws).any() else np.nan
+    return ll, brier, y.size
+
+
+def score_chunk(matches: pd.DataFrame, mask: np.ndarray, grid: np.ndarray) -> list:
+    """holdout_metrics for each (K, τ, w_scale, r_scale) row of *grid*."""
+    probs, outcomes = run_elo_grid(matches, mask, k=grid[:, 0], tau_gap_days=grid[:, 1],
+                                   beta=grid[:, 2], alpha=grid[:, 3])
+    return [holdout_metrics(y, p) for p, y in zip(probs, outcomes)]
+
+
+def score_grid(match_cache: dict, grid, masks: dict | None = None,
+               workers: int = 1) -> list[tuple[float, float]]:
+    """(log_loss, brier) per grid row, pooled over skill-sets by test size."""
+    grid = np.atleast_2d(np.asarray(grid, dtype=np.float64))
+    masks = holdout_masks(match_cache) if masks is None else masks
+    chunks = [slice(i, i + GRID_CHUNK) for i in range(0, len(grid), GRID_CHUNK)]
+    jobs = [(sk, c) for sk in masks for c in chunks]
+
+    if workers <= 1:
+        done = [score_chunk(match_cache[sk], masks[sk], grid[c]) for sk, c in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # compact matches: 8 bytes a row plus one side-table row per score
+            futures = [instrument.submit(pool, score_chunk, match_cache[sk],
+                                         masks[sk], grid[c]) for sk, c in jobs]
+            done = [instrument.result(f) for f in futures]
+    per_sk = {sk: [] for sk in masks}
+    for (sk, _), metrics in zip(jobs, done):
+        per_sk[sk].extend(metrics)
+
+    scores = []
+    for i in range(len(grid)):
+        tot_ll = tot_brier = tot_n = 0
+        for sk in masks:
+            if per_sk[sk][i] is None:
+                continue
+            ll, brier, n = per_sk[sk][i]
+            tot_n     += n
+            tot_brier += brier * n
+            if not np.isnan(ll):
+                tot_ll += ll * n
+        scores.append((np.inf, np.inf) if tot_n == 0
+                      else (tot_ll / tot_n, tot_brier / tot_n))
+    return scores
+
+
+def score_params(match_cache, k, tau, w_scale, r_scale, masks=None):
+    return score_grid(match_cache, [(k, tau, w_scale, r_scale)], masks)[0]
 
-        draws  = (y == 0.5)
-        brier  = brier_score(y, p)
-        ce     = cross_entropy(y[~draws], p[~draws]) if (~draws).any() else np.nan
-        ll     = log_loss(np.round(y[~draws]), p[~draws]) if (~draws).any() else np.nan
-        n      = y.size
 
-        tot_n     += n
-        tot_brier += brier * n
-        if not np.isnan(ll):
-            tot_ll += ll * n
-
-    if tot_n == 0:
-        return np.inf, np.inf
-    return tot_ll / tot_n, tot_brier / tot_n
+# ──────────────────────────────
+# Bounded search
+# ──────────────────────────────
+def _to_params(u: np.ndarray) -> dict:
+    """Unit-cube point → parameters (6 significant digits, stable cache keys)."""
+    out = {}
+    for x, (name, (lo, hi)) in zip(np.clip(u, 0.0, 1.0), SEARCH_BOUNDS.items()):
+        val = (np.exp(np.log(lo) + x * (np.log(hi) - np.log(lo))) if name == "tau"
+               else lo + x * (hi - lo))
+        out[name] = float(f"{val:.6g}")
+    return out
+
+
+def _to_unit(params: dict) -> np.ndarray:
+    return np.array([
+        (np.log(params[n]) - np.log(lo)) / (np.log(hi) - np.log(lo)) if n == "tau"
+        else (params[n] - lo) / (hi - lo)
+        for n, (lo, hi) in SEARCH_BOUNDS.items()
+    ])
+
+
+def search_context(match_cache: dict, masks: dict) -> str:
+    """Fingerprint of the objective: split settings and match/test sizes."""
+    ctx = {"frac": FRAC, "seed": RNG_SEED, "min_cal": MIN_CAL_MATCHES,
+           "rows": {sk: [len(m), int(masks[sk].sum())] for sk, m in match_cache.items()
+                    if sk in masks}}
+    return hashlib.sha1(json.dumps(ctx, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def search(match_cache: dict, masks: dict, max_evals: int = SEARCH_MAX_EVALS,
+           cache_path: Path = SEARCH_CACHE) -> dict:
+    """Minimize log-loss with bounded Nelder-Mead; return the best record."""
+    ctx = search_context(match_cache, masks)
+    cache = {}
+    if cache_path.exists():
+        for line in cache_path.read_text().splitlines():
+            rec = json.loads(line)
+            if rec["context"] == ctx:
+                cache[tuple(rec[n] for n in SEARCH_BOUNDS)] = rec
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    print(f"Search cache: {len(cache)} points for context {ctx} in {cache_path}")
+
+    fresh = 0
+
+    def objective(u: np.ndarray) -> float:
+        nonlocal fresh
+        params = _to_params(u)
+        key = tuple(params.values())
+        tag = "cached"
+        if key not in cache:
+            ll, br = score_params(match_cache, params["K"], params["tau"],
+                                  params["wife_scale"], params["rate_scale"], masks)
+            cache[key] = rec = {**params, "log_loss": ll, "brier": br, "context": ctx}
+            with cache_path.open("a") as fh:
+                fh.write(json.dumps(rec) + "\n")
+            fresh, tag = fresh + 1, "new"
+        rec = cache[key]
+        print(f"K={params['K']:.3f}, τ={params['tau']:.0f}, w_s={params['wife_scale']:.3f}, "
+              f"r_s={params['rate_scale']:.1f} → log_loss={rec['log_loss']:.5f}  ({tag})")
+        return rec["log_loss"]
+
+    x0 = _to_unit(SEARCH_START)
+    simplex = np.vstack([x0] + [np.clip(x0 + 0.15 * e, 0.0, 1.0)
+                                for e in np.eye(len(x0))])
+    res = minimize(objective, x0, method="Nelder-Mead",
+                   bounds=[(0.0, 1.0)] * len(x0),
+                   options={"maxfev": max_evals, "initial_simplex": simplex,
+                            "xatol": 1e-3, "fatol": 1e-6})
+    best = cache[tuple(_to_params(res.x).values())]
+    print(f"\n{res.nfev} evaluations ({fresh} new, {res.nfev - fresh} from cache)")
+    return best
 
 
 def main():
-    data = load_scores(SCORES_DIR)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=["grid", "search"], default="grid")
+    parser.add_argument("--max-evals", type=int, default=SEARCH_MAX_EVALS,
+                        help="search mode: objective evaluations (default: %(default)s)")
+    parser.add_argument("--cache", type=Path, default=SEARCH_CACHE,
+                        help="search mode: evaluated-point cache (default: %(default)s)")
+    args = parser.parse_args()
 
-    # ---------- build matches once per skill-set -------------------- #
+    data = load_scores(SCORES_DIR, MATCH_COLUMNS)
+
+    # ---------- build (or reopen stored) matches per skill-set ------ #
     match_cache = {
-        sk: build_matches_for_skillset(data, sk) for sk in SKILLSETS
+        sk: stored_matches_for_skillset(data, sk, MATCH_STORE_DIR, compact=True)
+        for sk in SKILLSETS
     }
+    masks = holdout_masks(match_cache)
     # ---------------------------------------------------------------- #
 
+    if args.mode == "search":
+        best = search(match_cache, masks, args.max_evals, args.cache)
+        print("\n===== Best parameters (by log-loss) =====")
+        print(f"K = {best['K']}, τ = {best['tau']}, w_scale = {best['wife_scale']}, r_scale = {best['rate_scale']}  ⇒  "
+              f"log_loss = {best['log_loss']:.4f},  brier = {best['brier']:.4f}")
+        return
+
+    grid = list(itertools.product(K_GRID, TAU_GRID, WIFE_DIFF_SCALE_GRID, RATE_DIFF_SCALE_GRID))
+    t0 = time.perf_counter()
+    scores = score_grid(match_cache, grid, masks, workers=WORKERS)
+    elapsed = time.perf_counter() - t0
+
     results = []
-    for k, tau, w_scale, r_scale in itertools.product(K_GRID, TAU_GRID, WIFE_DIFF_SCALE_GRID, RATE_DIFF_SCALE_GRID):
-        ll, br = score_params(match_cache, k, tau, w_scale, r_scale)
+    for (k, tau, w_scale, r_scale), (ll, br) in zip(grid, scores):
         tau_lbl = "inf" if np.isinf(tau) else int(tau)
         results.append({"K": k, "tau": tau_lbl, "wife_scale": w_scale, "rate_scale": r_scale, "log_loss": ll, "brier": br})
         print(f"K={k:>2}, τ={tau_lbl:>4}, w_s={w_scale}, r_s={r_scale} → log_loss={ll:.4f}  brier={br:.4f}")
+    print(f"\n{len(grid)} configs in {elapsed:.1f}s → {len(grid) / elapsed:.2f} configs/s "
+          f"({WORKERS} workers)")
 
     results.sort(key=lambda d: d["log_loss"])
     best = results[0]
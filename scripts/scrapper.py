@@ -3,54 +3,105 @@
 Etterna Scores Scraper & *Incremental Updater*
 ================================================
 Downloads new scores for each player in a chosen rank range and stores
-**one Parquet per player**.  It *no longer* rebuilds the combined
-rank‑range Parquet, eliminating the heavy CPU / disk phase the original
-script triggered.
+**one Parquet per player** (new scores land in small append‑only delta
+Parquets next to it).  It *no longer* rebuilds the combined rank‑range
+Parquet, eliminating the heavy CPU / disk phase the original script
+triggered.
 
-Run this from a cron/systemd timer or with `nohup` — subsequent runs are
+Run this from a cron/systemd timer or with `nohup` — subsequent runs are
 fast when nothing new is available.
+
+Players are fetched concurrently with asyncio (`CONCURRENCY` users at a
+time over one pooled `requests` session whose blocking calls run in a
+thread pool — not an async HTTP client) while a token bucket keeps the
+whole run under `RATE_LIMIT` requests per second.  Each player is written
+as soon as their scores are in; a player whose requests keep failing is
+logged and skipped, the rest of the range still lands on disk.  Point
+`--api` (or `ETTERNA_API`) at `stub_api.py` to run it offline.
+
+Importing the module has no side effects; `scrape()` is the whole run and
+the stages (`fetch_usernames`, `fetch_all`, `append_scores`) can be used
+on their own.  Rank ranges can be sharded over several processes that
+share one output directory:
+
+    uv run scripts/scrapper.py --start-rank 1 --end-rank 200
+    uv run scripts/scrapper.py --start-rank 201 --end-rank 400 --concurrency 16
+    uv run scripts/scrapper.py --dry-run        # fetch + time stages, write nothing
 """
 from __future__ import annotations
 
 # ---------------------------------------------------------------------------
-# 0.  LOCAL OUTPUT SET‑UP
+# 1.  CONFIGURATION (defaults, see --help)
 # ---------------------------------------------------------------------------
 from pathlib import Path
-OUTDIR = Path("output/scores")
-OUTDIR.mkdir(parents=True, exist_ok=True)
+import os
 
-# ---------------------------------------------------------------------------
-# 1.  CONFIGURATION
-# ---------------------------------------------------------------------------
+OUTDIR     = Path("output/scores")
 START_RANK = 300         # inclusive, 1‑based
 END_RANK   = 400       # inclusive, 1‑based
-assert 1 <= START_RANK <= END_RANK
 
 PARQUET_COMPRESSION = "zstd"   # "zstd", "snappy", "gzip", …
 PARQUET_LEVEL       = 5        # zstd: 1‑22
 MAX_RETRIES_PER_PAGE = 20      # capped exponential back‑off
+CONCURRENCY          = 8       # users fetched at once (1 = sequential)
+RATE_LIMIT           = 5.0     # requests / second across all users
+
+API_BASE     = os.environ.get("ETTERNA_API", "https://api.etternaonline.com/api")
+PAGE_SIZE_LB = 25
+
+TRASH = {
+    "background", "backgroundTinyThumb", "backgroundSrcSet",
+    "banner",      "bannerTinyThumb",      "bannerSrcSet",
+}
+
+# Per‑player state index: newest score, row count and the player's files
+# (base parquet + append‑only delta parquets) with size / mtime / sha1.
+# While a player's files match their entry no parquet is opened for them;
+# the sha1 is only checked for a file whose mtime moved (copied, restored).
+# Shards sharing an output directory merge into it under an flock.
+STATE_FILE       = "scrape_state.json"
+MAX_DELTAS       = 8    # delta files per player before they are compacted
+STATE_SAVE_EVERY = 50   # players written between index saves
 
 # ---------------------------------------------------------------------------
-# 2.  LIBRARIES  &  HTTP SESSION
+# 2.  LIBRARIES  &  HTTP
 # ---------------------------------------------------------------------------
-import time, requests, pandas as pd
+import argparse, asyncio, glob, hashlib, io, json, time, requests, pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from requests.adapters import HTTPAdapter
 from tqdm.auto import tqdm
 
-session = requests.Session()
-session.headers.update({"Accept": "application/json"})
+try:
+    import fcntl
+except ImportError:            # Windows: shards then must not share an outdir
+    fcntl = None
 
-LEADER_URL   = "https://api.etternaonline.com/api/leaderboards/global"
-PAGE_SIZE_LB = 25
 
-# ---------------------------------------------------------------------------
-# 3.  COLLECT USERNAMES IN DESIRED RANK RANGE
-# ---------------------------------------------------------------------------
-page_from   = (START_RANK - 1) // PAGE_SIZE_LB + 1
-page_to     = (END_RANK   - 1) // PAGE_SIZE_LB + 1
-rows_needed = END_RANK - START_RANK + 1
+def make_session(concurrency: int = CONCURRENCY) -> requests.Session:
+    """JSON session whose connection pool fits *concurrency* requests."""
+    session = requests.Session()
+    session.headers.update({"Accept": "application/json"})
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
-def safe_get(url: str, **kwargs):
+def backoff_seconds(attempt: int, error: Exception) -> float:
+    """Capped exponential back‑off; a 429's Retry‑After wins if longer."""
+    sleep_s = min(60, 2 ** min(10, attempt))
+    response = getattr(error, "response", None)
+    if response is not None and response.status_code == 429:
+        try:
+            sleep_s = max(sleep_s, float(response.headers.get("Retry-After", 0)))
+        except ValueError:
+            pass
+    return sleep_s
+
+
+def safe_get(session: requests.Session, url: str, **kwargs):
     """GET with retries + exponential back‑off."""
     attempt = 0
     while True:
@@ -62,111 +113,422 @@ def safe_get(url: str, **kwargs):
             attempt += 1
             if attempt >= MAX_RETRIES_PER_PAGE:
                 raise RuntimeError(f"failed after {attempt} attempts: {e}") from e
-            sleep_s = min(60, 2 ** min(10, attempt))
             print(".", end="", flush=True)
-            time.sleep(sleep_s)
-
-usernames: list[str] = []
-with tqdm(total=rows_needed, desc="Leaderboard") as pbar:
-    for page in range(page_from, page_to + 1):
-        data = safe_get(LEADER_URL, params={"page": page}).json()["data"]
-        for i, entry in enumerate(data, start=1):
-            rank = (page - 1) * PAGE_SIZE_LB + i
-            if START_RANK <= rank <= END_RANK:
-                usernames.append(entry["username"])
-                pbar.update(1)
+            time.sleep(backoff_seconds(attempt, e))
+
+
+class TokenBucket:
+    """At most *rate* acquisitions per second, in bursts of up to *capacity*."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate     = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens   = self.capacity
+        self.updated  = time.monotonic()
+        self.lock     = asyncio.Lock()
+        self.count    = 0            # tokens handed out (= requests sent)
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.count += 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncClient:
+    """Pooled session + rate limit + executor shared by all concurrent fetches."""
+
+    def __init__(self, session: requests.Session, bucket: TokenBucket,
+                 executor: ThreadPoolExecutor, api_base: str = API_BASE):
+        self.session  = session
+        self.bucket   = bucket
+        self.executor = executor
+        self.api_base = api_base
+
+    async def get_json(self, url: str, **kwargs) -> dict:
+        """`safe_get` for the event loop: rate‑limited, pooled, capped back‑off."""
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            try:
+                r = await loop.run_in_executor(
+                    self.executor, lambda: self.session.get(url, timeout=30, **kwargs))
+                r.raise_for_status()
+                return r.json()
+            except requests.RequestException as e:
+                attempt += 1
+                if attempt >= MAX_RETRIES_PER_PAGE:
+                    raise RuntimeError(f"failed after {attempt} attempts: {e}") from e
+                print(".", end="", flush=True)
+                await asyncio.sleep(backoff_seconds(attempt, e))
+
+# ---------------------------------------------------------------------------
+# 3.  COLLECT USERNAMES IN DESIRED RANK RANGE
+# ---------------------------------------------------------------------------
+def fetch_usernames(session: requests.Session, start_rank: int, end_rank: int,
+                    api_base: str = API_BASE) -> list[str]:
+    """Usernames ranked *start_rank*…*end_rank* (inclusive, 1‑based)."""
+    if not 1 <= start_rank <= end_rank:
+        raise ValueError(f"bad rank range {start_rank}-{end_rank}")
+    page_from   = (start_rank - 1) // PAGE_SIZE_LB + 1
+    page_to     = (end_rank   - 1) // PAGE_SIZE_LB + 1
+    rows_needed = end_rank - start_rank + 1
+
+    usernames: list[str] = []
+    with tqdm(total=rows_needed, desc="Leaderboard") as pbar:
+        for page in range(page_from, page_to + 1):
+            data = safe_get(session, f"{api_base}/leaderboards/global",
+                            params={"page": page}).json()["data"]
+            for i, entry in enumerate(data, start=1):
+                rank = (page - 1) * PAGE_SIZE_LB + i
+                if start_rank <= rank <= end_rank:
+                    usernames.append(entry["username"])
+                    pbar.update(1)
+                if len(usernames) == rows_needed:
+                    break
             if len(usernames) == rows_needed:
                 break
-        if len(usernames) == rows_needed:
-            break
-print(f"Collected {len(usernames)} usernames (ranks {START_RANK}-{END_RANK})")
+    return usernames
 
 # ---------------------------------------------------------------------------
-# 4.  INCREMENTAL SCORE FETCHING
+# 4.  STATE INDEX  &  PER‑PLAYER PARQUETS
 # ---------------------------------------------------------------------------
-TRASH = {
-    "background", "backgroundTinyThumb", "backgroundSrcSet",
-    "banner",      "bannerTinyThumb",      "bannerSrcSet",
-}
+def load_state(outdir: Path) -> dict:
+    path = outdir / STATE_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+@contextmanager
+def state_lock(outdir: Path):
+    """Hold an exclusive lock on the state index (released when the file closes)."""
+    with open(outdir / f"{STATE_FILE}.lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def save_state(outdir: Path, state: dict, names) -> None:
+    """Write the entries of *names*, keeping those other shards wrote meanwhile."""
+    path = outdir / STATE_FILE
+    with state_lock(outdir):
+        merged = load_state(outdir)
+        for name in names:
+            if name in state:
+                merged[name] = state[name]
+            else:
+                merged.pop(name, None)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(merged, indent=1, sort_keys=True))
+        tmp.replace(path)
+
 
-from datetime import datetime, timezone
+def base_path(outdir: Path, name: str) -> Path:
+    return outdir / f"score_data_{name}.parquet"
 
-def most_recent_dt(path: Path) -> datetime | None:
-    """Return latest datetime in an existing parquet (UTC‑naïve)."""
-    if not path.exists():
+
+def file_entry(path: Path, data: bytes | None = None) -> dict:
+    """Index entry of *path*; pass the bytes just written to skip reading it back."""
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "sha1": hashlib.sha1(path.read_bytes() if data is None else data).hexdigest()}
+
+
+def entry_is_current(outdir: Path, entry: dict) -> bool:
+    """True when every file in *entry* is unchanged.
+
+    Size and mtime decide; a file of the recorded size whose mtime moved
+    is hashed, and if the sha1 still matches its new mtime is recorded.
+    """
+    for fname, info in entry["files"].items():
+        path = outdir / fname
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return False
+        if st.st_size != info["size"]:
+            return False
+        if st.st_mtime_ns != info["mtime_ns"]:
+            if hashlib.sha1(path.read_bytes()).hexdigest() != info["sha1"]:
+                return False
+            info["mtime_ns"] = st.st_mtime_ns
+    return True
+
+
+def describe_scores(df: pd.DataFrame) -> dict:
+    """Newest datetime (UTC‑naïve), its score id and the row count of *df*."""
+    dt = pd.to_datetime(df["datetime"], utc=True).dt.tz_convert(None)
+    newest = dt.idxmax()
+    return {"last_datetime": dt[newest].isoformat(),
+            "last_id": int(df.loc[newest, "id"]), "rows": len(df)}
+
+
+def next_delta_path(outdir: Path, name: str, entry: dict) -> Path:
+    """Where the next delta after those recorded in *entry* is written."""
+    deltas = sorted(f for f in entry["files"] if ".delta" in f)
+    last = int(deltas[-1].rsplit(".delta", 1)[1].split(".")[0]) if deltas else 0
+    return outdir / f"score_data_{name}.delta{last + 1:04d}.parquet"
+
+
+def player_state(outdir: Path, name: str, state: dict) -> dict | None:
+    """The player's index entry, rebuilt from the parquets only if stale.
+
+    The index is saved in batches, so a run killed in between leaves delta
+    files it does not list; the next delta already existing gives them away.
+    """
+    entry = state.get(name)
+    if entry is not None and entry_is_current(outdir, entry) \
+            and not next_delta_path(outdir, name, entry).exists():
+        return entry
+    base = base_path(outdir, name)
+    files = [base] if base.exists() else []
+    files += sorted(Path(f) for f in glob.glob(
+        str(outdir / f"score_data_{glob.escape(name)}.delta*.parquet")))
+    if not files:
+        state.pop(name, None)
         return None
-    col = pd.read_parquet(path, columns=["datetime"])["datetime"]
-    return pd.to_datetime(col, utc=True).max().tz_convert(None)
+    df = pd.concat((pd.read_parquet(f, columns=["id", "datetime"]) for f in files),
+                   ignore_index=True)
+    entry = {**describe_scores(df), "files": {f.name: file_entry(f) for f in files}}
+    state[name] = entry
+    return entry
+
+
+def most_recent_dt(entry: dict | None) -> datetime | None:
+    """Return latest stored datetime of a player (UTC‑naïve)."""
+    return None if entry is None else pd.Timestamp(entry["last_datetime"])
 
 
-def fetch_scores(username: str, since: datetime | None = None) -> pd.DataFrame:
-    """Download *only* scores newer than `since`."""
-    base   = f"https://api.etternaonline.com/api/users/{username}/scores"
+def write_parquet(df: pd.DataFrame, path: Path | io.BytesIO) -> None:
+    df.to_parquet(
+        path,
+        index=False,
+        compression=PARQUET_COMPRESSION,
+        compression_level=PARQUET_LEVEL,
+    )
+
+
+def write_tracked(df: pd.DataFrame, path: Path) -> dict:
+    """`write_parquet` *df* to *path* and return its index entry, hashed in memory."""
+    buffer = io.BytesIO()
+    write_parquet(df, buffer)
+    data = buffer.getvalue()
+    path.write_bytes(data)
+    return file_entry(path, data)
+
+
+def append_scores(outdir: Path, name: str, new_df: pd.DataFrame,
+                  entry: dict | None) -> dict:
+    """Persist *new_df* for *name* and return the updated index entry.
+
+    New scores go to a fresh delta parquet next to the base file; after
+    `MAX_DELTAS` deltas everything is compacted back into the base file.
+    """
+    new_df = new_df.drop_duplicates(subset="id")
+    base = base_path(outdir, name)
+    if entry is None:
+        return {**describe_scores(new_df), "files": {base.name: write_tracked(new_df, base)}}
+
+    if len(entry["files"]) - (base.name in entry["files"]) >= MAX_DELTAS:
+        files = [outdir / f for f in entry["files"]]
+        full = pd.concat([*(pd.read_parquet(f) for f in files), new_df],
+                         ignore_index=True).drop_duplicates(subset="id")
+        base_entry = write_tracked(full, base)
+        for f in files:
+            if f != base:
+                f.unlink()
+        return {**describe_scores(full), "files": {base.name: base_entry}}
+
+    path = next_delta_path(outdir, name, entry)
+    path_entry = write_tracked(new_df, path)
+    newest = describe_scores(new_df)
+    if pd.Timestamp(newest["last_datetime"]) <= pd.Timestamp(entry["last_datetime"]):
+        newest.update(last_datetime=entry["last_datetime"], last_id=entry["last_id"])
+    return {**newest, "rows": entry["rows"] + len(new_df),
+            "files": {**entry["files"], path.name: path_entry}}
+
+# ---------------------------------------------------------------------------
+# 5.  INCREMENTAL SCORE FETCHING
+# ---------------------------------------------------------------------------
+def scores_frame(username: str, rows: list[dict]) -> pd.DataFrame:
+    """API score entries → DataFrame in the per‑player parquet layout."""
+    df = pd.DataFrame.from_records(rows)
+    if df.empty:
+        return df
+
+    if "song" in df.columns:
+        df["song"] = df["song"].apply(lambda d: {k: v for k, v in d.items() if k not in TRASH})
+    df.insert(0, "player", username)
+    return df
+
+
+async def fetch_scores(client: AsyncClient, username: str,
+                       since: datetime | None) -> pd.DataFrame:
+    """Download *only* scores newer than `since`.
+
+    Pages are newest first, so an update walks them in order until it
+    reaches `since`; a first download fetches pages 2… concurrently once
+    page 1 has told how many there are.
+    """
+    base   = f"{client.api_base}/users/{username}/scores"
     params = {"limit": 25, "sort": "-datetime", "filter[valid]": 1}
 
-    def get(page: int):
-        return safe_get(base, params={**params, "page": page}).json()
+    async def get(page: int):
+        return await client.get_json(base, params={**params, "page": page})
+
+    first = await get(1)
+    last_page = first["meta"]["last_page"]
+    if since is None:
+        rest = await asyncio.gather(*(get(p) for p in range(2, last_page + 1)))
+        rows = [entry for chunk in (first, *rest) for entry in chunk["data"]]
+        return scores_frame(username, rows)
 
-    rows, page = [], 1
+    rows, page, chunk = [], 1, first
     while True:
-        chunk = get(page)
         stop_early = False
         for entry in chunk["data"]:
             ts = pd.to_datetime(entry["datetime"], utc=True).tz_convert(None)
-            if since is not None and ts <= since:
+            if ts <= since:
                 stop_early = True
                 break
             rows.append(entry)
-        if stop_early or page >= chunk["meta"]["last_page"]:
+        if stop_early or page >= last_page:
             break
         page += 1
+        chunk = await get(page)
+    return scores_frame(username, rows)
 
-    df = pd.DataFrame.from_records(rows)
-    if df.empty:
-        return df
 
-    if "song" in df.columns:
-        df["song"] = df["song"].apply(lambda d: {k: v for k, v in d.items() if k not in TRASH})
-    df.insert(0, "player", username)
-    return df
+async def fetch_all(session: requests.Session, since: dict[str, datetime | None],
+                    on_fetched, concurrency: int = CONCURRENCY,
+                    rate_limit: float = RATE_LIMIT,
+                    api_base: str = API_BASE) -> tuple[dict[str, str], int]:
+    """`fetch_scores` for every user in *since*, *concurrency* at a time.
 
-# ---------------------------------------------------------------------------
-# 5.  UPDATE / APPEND PER‑PLAYER PARQUETS
-# ---------------------------------------------------------------------------
-frames: list[pd.DataFrame] = []
-new_rows_total = 0
-for name in usernames:
-    path = OUTDIR / f"score_data_{name}.parquet"
-    since_dt = most_recent_dt(path)
-    new_df = fetch_scores(name, since=since_dt)
-
-    if new_df.empty:
-        print(f"{name:>12}: up‑to‑date")
-        if path.exists():
-            frames.append(pd.read_parquet(path))
-        continue
-
-    new_rows_total += len(new_df)
-
-    if path.exists():
-        old_df = pd.read_parquet(path)
-        full = pd.concat([old_df, new_df], ignore_index=True).drop_duplicates(subset="id")
-    else:
-        full = new_df
-
-    full.to_parquet(
-        path,
-        index=False,
-        compression=PARQUET_COMPRESSION,
-        compression_level=PARQUET_LEVEL,
-    )
-    frames.append(full)
-    print(f"{name:>12}: +{len(new_df)} new scores")
+    ``on_fetched(name, df)`` gets each user's new scores as soon as they
+    are in, so nothing waits for (or is lost with) the rest of the range.
+    A user whose requests fail is skipped.  Returns the failures (user →
+    error) and the number of requests sent.
+    """
+    bucket = TokenBucket(rate_limit)
+    limit  = asyncio.Semaphore(concurrency)
+    failed: dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+         tqdm(total=len(since), desc="Players") as pbar:
+        client = AsyncClient(session, bucket, executor, api_base)
+
+        async def one(name: str) -> None:
+            try:
+                async with limit:
+                    df = await fetch_scores(client, name, since[name])
+            except (RuntimeError, ValueError, KeyError) as e:   # retries exhausted / bad JSON
+                failed[name] = str(e)
+                print(f"{name:>12}: failed, skipped ({e})")
+            else:
+                on_fetched(name, df)
+            pbar.update(1)
+
+        await asyncio.gather(*(one(name) for name in since))
+    return failed, bucket.count
 
 # ---------------------------------------------------------------------------
-# 6.  SUMMARY — *no combined parquet is created*
+# 6.  DRIVER
 # ---------------------------------------------------------------------------
-print("\nDone.")
-print(f"Players processed: {len(frames)}")
-print(f"New rows added  : {new_rows_total:,}")
-print("Combined parquet was intentionally skipped to save CPU and disk I/O.")
+def scrape(start_rank: int = START_RANK, end_rank: int = END_RANK,
+           outdir: Path = OUTDIR, concurrency: int = CONCURRENCY,
+           rate_limit: float = RATE_LIMIT, api_base: str = API_BASE,
+           dry_run: bool = False) -> dict:
+    """Update the per‑player parquets of one rank range; return stage stats.
+
+    With *dry_run* every stage runs except writing parquets and the index.
+    """
+    stats: dict = {"start_rank": start_rank, "end_rank": end_rank,
+                   "concurrency": concurrency, "rate_limit": rate_limit}
+    outdir.mkdir(parents=True, exist_ok=True)
+    session = make_session(concurrency)
+
+    t0 = time.perf_counter()
+    usernames = fetch_usernames(session, start_rank, end_rank, api_base)
+    stats["leaderboard_s"] = time.perf_counter() - t0
+    print(f"Collected {len(usernames)} usernames (ranks {start_rank}-{end_rank})")
+
+    t0 = time.perf_counter()
+    state   = load_state(outdir)
+    entries = {name: player_state(outdir, name, state) for name in usernames}
+    stats["state_s"] = time.perf_counter() - t0
+
+    new_rows, unsaved = {}, []
+    stats["persist_s"] = 0.0
+
+    def persist(name: str, new_df: pd.DataFrame) -> None:
+        """Write one player's new scores as soon as they are fetched."""
+        if new_df.empty:
+            print(f"{name:>12}: up‑to‑date")
+            return
+        t = time.perf_counter()
+        new_rows[name] = len(new_df)
+        if not dry_run:
+            state[name] = append_scores(outdir, name, new_df, entries[name])
+            unsaved.append(name)
+            if len(unsaved) >= STATE_SAVE_EVERY:
+                save_state(outdir, state, unsaved)
+                unsaved.clear()
+        print(f"{name:>12}: +{len(new_df)} new scores")
+        stats["persist_s"] += time.perf_counter() - t
+
+    t0 = time.perf_counter()
+    try:
+        failed, stats["requests"] = asyncio.run(fetch_all(
+            session, {name: most_recent_dt(e) for name, e in entries.items()},
+            persist, concurrency, rate_limit, api_base))
+    finally:                           # also index what was written before a failure
+        if not dry_run:
+            save_state(outdir, state, usernames)
+    # fetching and writing overlap; fetch_s is the time not spent writing
+    stats["fetch_s"] = time.perf_counter() - t0 - stats["persist_s"]
+
+    stats.update(players=len(usernames), new_rows=sum(new_rows.values()),
+                 failed=sorted(failed))
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--start-rank", type=int, default=START_RANK)
+    parser.add_argument("--end-rank", type=int, default=END_RANK)
+    parser.add_argument("--outdir", type=Path, default=OUTDIR)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate-limit", type=float, default=RATE_LIMIT,
+                        help="requests / second (default: %(default)s)")
+    parser.add_argument("--api", default=API_BASE, help="API base URL")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="fetch and time every stage but write nothing")
+    args = parser.parse_args()
+
+    stats = scrape(args.start_rank, args.end_rank, args.outdir, args.concurrency,
+                   args.rate_limit, args.api, args.dry_run)
+
+    # -----------------------------------------------------------------------
+    # SUMMARY — *no combined parquet is created*
+    # -----------------------------------------------------------------------
+    print("\nDone." + ("  (dry run: nothing written)" if args.dry_run else ""))
+    print(f"Players processed: {stats['players']}")
+    if stats["failed"]:
+        print(f"Players skipped : {len(stats['failed'])} (failed: "
+              f"{', '.join(stats['failed'])}; rerun to retry them)")
+    print(f"New rows added  : {stats['new_rows']:,}")
+    print(f"Requests sent   : {stats['requests']:,} "
+          f"({stats['requests'] / stats['fetch_s']:.1f}/s)")
+    for stage in ("leaderboard", "state", "fetch", "persist"):
+        print(f"  {stage:<12}{stats[f'{stage}_s']:8.2f}s")
+    print("Combined parquet was intentionally skipped to save CPU and disk I/O.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+stub_api.py — local stand-in for the two EtternaOnline endpoints the
+scraper uses, so it can be run and timed offline.
+
+    GET /api/leaderboards/global?page=N
+    GET /api/users/{name}/scores?page=N&limit=25&sort=-datetime
+
+Users are ``user0000`` … in rank order.  Every user has
+``--scores-per-user`` scores, served newest first; score *j* of a user is
+generated from (seed, user, j) alone, so restarting with a larger count
+only adds newer scores — what an incremental scrape expects to see.
+``--latency`` and ``--fail-rate`` (503s) exercise concurrency and back-off.
+
+    uv run scripts/stub_api.py --port 8000 &
+    ETTERNA_API=http://127.0.0.1:8000/api uv run scripts/scrapper.py
+"""
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import random
+import time
+import numpy as np
+import pandas as pd
+
+from elo_core import SKILLSETS
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+N_USERS         = 500
+SCORES_PER_USER = 200
+PAGE_SIZE_LB    = 25
+EPOCH_START     = pd.Timestamp("2016-01-01", tz="UTC")
+N_CHARTS        = 5_000
+RATE_STEPS      = np.round(np.arange(0.7, 2.05, 0.05), 2)
+
+# ──────────────────────────────
+def score_entry(seed: int, user: int, j: int) -> dict:
+    """Score *j* (0 = oldest) of *user*, in the API's JSON layout."""
+    rng = np.random.default_rng([seed, user, j])
+    chart = int(rng.integers(0, N_CHARTS))
+    msd = np.random.default_rng([seed, chart]).uniform(15.0, 35.0, len(SKILLSETS))
+    when = EPOCH_START + pd.Timedelta(days=3 * j, seconds=int(rng.integers(0, 86_400)))
+    return {
+        "id":       (user * 1_000_000 + j) + 1,
+        "datetime": when.strftime("%Y-%m-%dT%H:%M:%S.000000Z"),
+        "wife":     round(float(rng.uniform(85.0, 99.9)), 4),
+        "rate":     float(RATE_STEPS[rng.integers(0, len(RATE_STEPS))]),
+        "valid":    True,
+        "overall":  round(float(msd.max()), 2),
+        **{sk: round(float(v), 2) for sk, v in zip(SKILLSETS, msd)},
+        "chart": {"id": chart + 1, "key": f"X{chart:039d}"},
+        "song": {
+            "name": f"Song {chart}", "packs": [{"name": f"Pack {chart % 97}"}],
+            "background": "bg.png", "backgroundTinyThumb": "bg.t.png",
+            "backgroundSrcSet": "bg.png 1x", "banner": "bn.png",
+            "bannerTinyThumb": "bn.t.png", "bannerSrcSet": "bn.png 1x",
+        },
+    }
+
+
+def page_meta(page: int, per_page: int, total: int) -> dict:
+    return {"current_page": page, "per_page": per_page, "total": total,
+            "last_page": max(1, -(-total // per_page))}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config: argparse.Namespace
+
+    def do_GET(self) -> None:
+        cfg = self.config
+        if cfg.latency:
+            time.sleep(cfg.latency)
+        if cfg.fail_rate and random.random() < cfg.fail_rate:
+            return self.reply(503, {"message": "Service Unavailable"})
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        page = int(query.get("page", ["1"])[0])
+        parts = url.path.strip("/").split("/")
+
+        if parts == ["api", "leaderboards", "global"]:
+            lo = (page - 1) * PAGE_SIZE_LB
+            data = [{"rank": r + 1, "username": f"user{r:04d}", "rating": 30.0 - r / 100}
+                    for r in range(lo, min(lo + PAGE_SIZE_LB, cfg.users))]
+            return self.reply(200, {"data": data,
+                                    "meta": page_meta(page, PAGE_SIZE_LB, cfg.users)})
+
+        if len(parts) == 4 and parts[:2] == ["api", "users"] and parts[3] == "scores":
+            name = parts[2]
+            if not (name.startswith("user") and name[4:].isdigit()
+                    and int(name[4:]) < cfg.users):
+                return self.reply(404, {"message": "User not found"})
+            limit = int(query.get("limit", ["25"])[0])
+            n = cfg.scores_per_user
+            newest = n - 1 - (page - 1) * limit          # newest first
+            data = [score_entry(cfg.seed, int(name[4:]), j)
+                    for j in range(newest, max(newest - limit, -1), -1)]
+            return self.reply(200, {"data": data, "meta": page_meta(page, limit, n)})
+
+        self.reply(404, {"message": "Not found"})
+
+    def reply(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args) -> None:      # keep the scraper's output readable
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--users", type=int, default=N_USERS)
+    parser.add_argument("--scores-per-user", type=int, default=SCORES_PER_USER)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    StubHandler.config = args
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Stub API on http://{args.host}:{args.port}/api "
+          f"({args.users} users × {args.scores_per_user} scores)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+synthetic.py — deterministic synthetic Etterna scores for benchmarks.
+
+`make_scores` returns a frame shaped like the output of
+`elo_core.load_scores` (one row per score, already WIFE-filtered), so the
+match builder and the Elo engines can be timed without the scraped data.
+`write_player_files` stores such a frame as per-player parquets in the
+scraper's layout, for benchmarks that start from the files.  The same
+arguments and seed always give the same corpus.
+
+Example:
+
+```python
+from synthetic import make_scores
+scores = make_scores(200_000, n_players=2_000, n_charts=20_000, seed=0)
+```
+
+or, from the shell, a scores directory `run_elo.py` can read:
+
+    uv run scripts/synthetic.py output/synthetic --scores 1000000 --players 2000
+
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from elo_core import SKILLSETS, WIFE_RANGE
+from scrapper import write_parquet
+
+# ──────────────────────────────
+# SETTINGS
+# ──────────────────────────────
+EPOCH_START = pd.Timestamp("2016-01-01")
+EPOCH_DAYS  = 9 * 365
+RATE_STEPS  = np.round(np.arange(0.7, 2.05, 0.05), 2)
+
+# ──────────────────────────────
+def make_scores(n_scores: int,
+                n_players: int = 1_000,
+                n_charts:  int = 10_000,
+                zipf:      float = 0.9,
+                seed:      int = 0) -> pd.DataFrame:
+    """Return *n_scores* synthetic scores in `load_scores` layout.
+
+    Chart popularity follows a Zipf-like law with exponent *zipf* so a few
+    charts are played by most of the player pool, like the real corpus.
+    Player skill shifts the rate played, and datetimes are uniform over
+    `EPOCH_DAYS`.
+    """
+    rng = np.random.default_rng(seed)
+
+    skill = rng.normal(0.0, 1.0, n_players)
+    pop = 1.0 / np.arange(1, n_charts + 1) ** zipf
+    pop /= pop.sum()
+
+    player_idx = rng.integers(0, n_players, n_scores)
+    chart_idx  = rng.choice(n_charts, size=n_scores, p=pop)
+
+    rate_pos = np.clip(
+        np.round(6 + 4 * skill[player_idx] + rng.normal(0, 2, n_scores)),
+        0, len(RATE_STEPS) - 1,
+    ).astype(int)
+    wife = rng.uniform(WIFE_RANGE[0] + 0.01, WIFE_RANGE[1] - 0.01, n_scores).round(4)
+
+    chart_sk  = rng.integers(0, len(SKILLSETS), n_charts)
+    chart_msd = rng.uniform(15.0, 35.0, n_charts)
+
+    df = pd.DataFrame({
+        "id":        np.arange(1, n_scores + 1, dtype=np.int64),
+        "player":    np.array([f"player{i:05d}" for i in range(n_players)], dtype=object)[player_idx],
+        "chart_key": np.array([f"X{i:039d}" for i in range(n_charts)], dtype=object)[chart_idx],
+        "chart_id":  chart_idx.astype(np.int64) + 1,
+        "wife":      wife,
+        "rate":      RATE_STEPS[rate_pos],
+        "datetime":  EPOCH_START + pd.to_timedelta(
+                         rng.integers(0, EPOCH_DAYS * 86_400, n_scores), unit="s"),
+    })
+    for i, sk in enumerate(SKILLSETS):
+        jitter = rng.uniform(0.6, 0.95, n_scores)
+        df[sk] = np.where(chart_sk[chart_idx] == i, 1.0, jitter) * chart_msd[chart_idx]
+    df["skillset"] = df[SKILLSETS].idxmax(axis=1)
+    return df
+
+
+def write_player_files(scores: pd.DataFrame, outdir: Path) -> int:
+    """Write *scores* as ``score_data_{player}.parquet`` files in *outdir*.
+
+    Columns and compression follow `scrapper.scores_frame` /
+    `scrapper.write_parquet`: ``datetime`` as an ISO string, ``valid``,
+    MSD columns plus ``overall``, nested ``chart`` {id, key} and ``song``
+    {name, packs} structs.  Returns the number of files written.
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+    n = 0
+    for name, g in scores.groupby("player", sort=True):
+        chart_id = g["chart_id"].to_numpy()
+        write_parquet(pd.DataFrame({
+            "player":   name,
+            "id":       g["id"].to_numpy(),
+            "datetime": g["datetime"].dt.strftime("%Y-%m-%dT%H:%M:%S.000000Z").to_numpy(),
+            "wife":     g["wife"].to_numpy(),
+            "rate":     g["rate"].to_numpy(),
+            "valid":    True,
+            "overall":  g[SKILLSETS].max(axis=1).to_numpy(),
+            **{sk: g[sk].to_numpy() for sk in SKILLSETS},
+            "chart": [{"id": int(i), "key": k} for k, i in zip(g["chart_key"], chart_id)],
+            "song":  [{"name": f"Song {i}", "packs": [{"name": f"Pack {i % 97}"}]}
+                      for i in chart_id],
+        }), outdir / f"score_data_{name}.parquet")
+        n += 1
+    return n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic per-player scores directory.")
+    parser.add_argument("outdir", type=Path)
+    parser.add_argument("--scores",  type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=1_000)
+    parser.add_argument("--charts",  type=int, default=10_000)
+    parser.add_argument("--zipf",    type=float, default=0.9,
+                        help="chart popularity exponent (higher = more players per chart)")
+    parser.add_argument("--seed",    type=int, default=0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    n_files = write_player_files(
+        make_scores(args.scores, n_players=args.players, n_charts=args.charts,
+                    zipf=args.zipf, seed=args.seed),
+        args.outdir)
+    print(f"Wrote {args.scores:,} scores in {n_files:,} files to {args.outdir} "
+          f"in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
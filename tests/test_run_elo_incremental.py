@@ -0,0 +1,95 @@
+"""run_elo.py --incremental against a full rebuild over the same scores.
+
+A synthetic corpus is rated in two temporary working directories: one
+rates the older scores and then resumes with ``--incremental`` once the
+newer ones are written (and once more with nothing new), the other rates
+everything in one full run.  Both record monthly snapshots.
+
+    python -m unittest discover tests
+"""
+from pathlib import Path
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import pandas as pd
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from run_elo import load_snapshots, snapshot_tables         # noqa: E402
+from synthetic import make_scores, write_player_files       # noqa: E402
+
+N_SCORES   = 20_000
+N_PLAYERS  = 200
+N_CHARTS   = 1_000
+RESUME_AT  = 0.9        # fraction of the scores (by time) rated before resuming
+TABLES     = ("elo_dtw_ord_skillsets.csv", "elo_dtw_ord_skillsets.md",
+              "elo_dtw_ord_peak_skillsets.csv", "elo_dtw_ord_peak_skillsets.md")
+
+
+def run_elo(cwd: Path, *args: str) -> None:
+    env = {**os.environ, "PYTHONPATH": str(SCRIPTS)}
+    subprocess.run([sys.executable, str(SCRIPTS / "run_elo.py"), "--workers", "1",
+                    "--snapshots", "monthly", *args],
+                   cwd=cwd, env=env, check=True, capture_output=True, text=True)
+
+
+class IncrementalMatchesFullRun(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        root = Path(cls.tmp.name)
+        scores = make_scores(N_SCORES, n_players=N_PLAYERS, n_charts=N_CHARTS, seed=1)
+        scores = scores.sort_values("datetime", kind="stable")
+        older = scores.iloc[:int(len(scores) * RESUME_AT)]
+
+        cls.full, cls.resumed = root / "full", root / "resumed"
+        write_player_files(scores, cls.full / "output" / "scores")
+        run_elo(cls.full)
+
+        write_player_files(older, cls.resumed / "output" / "scores")
+        run_elo(cls.resumed)
+        write_player_files(scores, cls.resumed / "output" / "scores")
+        run_elo(cls.resumed, "--incremental")
+        cls.after_resume = cls.read_tables(cls.resumed)
+        run_elo(cls.resumed, "--incremental")                    # no new scores
+        cls.after_noop = cls.read_tables(cls.resumed)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    @staticmethod
+    def read_tables(cwd: Path) -> dict:
+        return {name: (cwd / "output" / name).read_bytes() for name in TABLES}
+
+    def test_tables_are_byte_identical(self):
+        full = self.read_tables(self.full)
+        for name in TABLES:
+            with self.subTest(table=name):
+                self.assertEqual(full[name], self.after_resume[name])
+
+    def test_resume_without_new_scores_is_byte_identical(self):
+        full = self.read_tables(self.full)
+        for name in TABLES:
+            with self.subTest(table=name):
+                self.assertEqual(full[name], self.after_noop[name])
+
+    def test_resumed_snapshots_match_full_run(self):
+        full = load_snapshots(self.full / "output" / "snapshots.parquet")
+        resumed = load_snapshots(self.resumed / "output" / "snapshots.parquet")
+        dates = next(iter(full.values())).dates
+        self.assertGreater(len(dates), 2)
+        for sk in full:
+            self.assertTrue(resumed[sk].dates.equals(dates))
+        for i, when in enumerate(dates):
+            for f, r in zip(snapshot_tables(full, i), snapshot_tables(resumed, i)):
+                with self.subTest(date=when):
+                    pd.testing.assert_frame_equal(f.sort_index(), r.sort_index())
+
+
+if __name__ == "__main__":
+    unittest.main()
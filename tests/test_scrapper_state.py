@@ -0,0 +1,74 @@
+"""The scraper's state index: when a player's files count as unchanged.
+
+    python -m unittest discover tests
+"""
+from pathlib import Path
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from scrapper import append_scores, entry_is_current, player_state   # noqa: E402
+
+
+def scores(first_id: int, n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "player":   "alice",
+        "id":       range(first_id, first_id + n),
+        "datetime": [f"2024-01-{d:02d}T12:00:00.000000Z" for d in range(1, n + 1)],
+        "wife":     90.0,
+        "rate":     1.0,
+    })
+
+
+class StateIndexEntries(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.outdir = Path(self.tmp.name)
+        entry = append_scores(self.outdir, "alice", scores(1, 5), None)
+        self.entry = append_scores(self.outdir, "alice", scores(100, 3), entry)
+        self.delta = self.outdir / "score_data_alice.delta0001.parquet"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch(self, path: Path) -> None:
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_hashes_are_of_the_written_files(self):
+        for fname, info in self.entry["files"].items():
+            data = (self.outdir / fname).read_bytes()
+            self.assertEqual(info["sha1"], hashlib.sha1(data).hexdigest())
+            self.assertEqual(info["size"], len(data))
+
+    def test_untouched_files_are_current(self):
+        self.assertTrue(entry_is_current(self.outdir, self.entry))
+
+    def test_moved_mtime_with_same_content_is_current(self):
+        self.touch(self.delta)
+        self.assertTrue(entry_is_current(self.outdir, self.entry))
+        info = self.entry["files"][self.delta.name]
+        self.assertEqual(info["mtime_ns"], self.delta.stat().st_mtime_ns)   # recorded
+        state = {"alice": self.entry}
+        self.assertIs(player_state(self.outdir, "alice", state), self.entry)
+
+    def test_moved_mtime_with_other_content_is_stale(self):
+        data = bytearray(self.delta.read_bytes())
+        data[len(data) // 2] ^= 0xFF                                       # same size
+        self.delta.write_bytes(bytes(data))
+        self.touch(self.delta)
+        self.assertFalse(entry_is_current(self.outdir, self.entry))
+
+    def test_other_size_is_stale(self):
+        self.delta.write_bytes(self.delta.read_bytes() + b"\0")
+        self.assertFalse(entry_is_current(self.outdir, self.entry))
+
+
+if __name__ == "__main__":
+    unittest.main()